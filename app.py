@@ -1,170 +1,109 @@
+import os
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
-from dateutil import parser
+from scrapy.utils.project import get_project_settings
+
+from euraxess.export import EXPORT_COLUMNS, MIME_TYPES, export_selection
+from euraxess.live import LiveDataset
+from euraxess.processing import PROFILE_PATTERNS, ProcessedDataset, processed_schema
+from euraxess.snapshot import SnapshotStore
 
 # Configure Streamlit page - must be first Streamlit command
 st.set_page_config(
     page_title="Euraxess Data", layout="wide", initial_sidebar_state="expanded", menu_items={"About": "Euraxess Job Listings Dashboard"}
 )
 
+SETTINGS = get_project_settings()
+# The long description text is only read when it is shown, and the raw field
+# text is not shown at all (the filters and the table use field_1/field_2)
+LISTING_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def load_and_process_data():
-    """Load and preprocess the CSV data with caching."""
-    try:
-        # Load the CSV file
-        df = pd.read_csv("output/jobs.csv")
-
-        # Clean the 'posted_on' column
-        df["posted_on"] = df["posted_on"].str.replace("Posted on: ", "")
-        df["posted_on"] = pd.to_datetime(df["posted_on"], errors="coerce")
+# Results table: sortable columns by label, and the page sizes offered
+SORT_COLUMNS = {"Posted": "posted_on", "Deadline": "application_deadline", "Country": "country", "University": "university", "Title": "title"}
+PAGE_SIZES = [25, 50, 100, 200]
 
-        # Create boolean columns for each profile (optimized to avoid fragmentation)
-        profile_patterns = ["R1", "R2", "R3", "R4"]
-        profile_columns = {pattern: df["profile"].str.contains(pattern, case=False, na=False) for pattern in profile_patterns}
-        profile_df = pd.DataFrame(profile_columns, index=df.index)
-        df = pd.concat([df, profile_df], axis=1)
+# Session state key of the sidebar filter of every dimension
+SELECTION_KEYS = {"country": "countries", "profile": "profiles", "field": "fields", "sub_field": "sub_fields", "funding_program": "funding_programs"}
 
-        # Apply the extraction function to the 'field' column
-        field_results = df["field"].apply(extract_relevant_items)
-        df["field_1"], df["field_2"] = zip(*field_results)
 
-        # Convert 'application_deadline' to datetime (vectorized)
-        df["application_deadline"] = df["application_deadline"].apply(lambda x: parser.parse(x.split("(")[0].strip()) if pd.notnull(x) else None)
+@st.cache_resource
+def get_live_dataset():
+    """The processed dataset written by the pipeline, shared by all sessions."""
+    # Derived columns are computed at ingest, see euraxess/processing.py; the
+    # frame and filter index are mapped from the published snapshot if there is one
+    snapshot_dir = SETTINGS.get("EURAXESS_SNAPSHOT_DIR")
+    return LiveDataset(
+        ProcessedDataset(SETTINGS.get("EURAXESS_PROCESSED_DIR")),
+        columns=LISTING_COLUMNS,
+        search_index_path=SETTINGS.get("EURAXESS_SEARCH_INDEX_PATH"),
+        snapshots=SnapshotStore(snapshot_dir) if snapshot_dir else None,
+    )
 
-        # Filter out rows where 'application_deadline' is in the past
-        current_time = pd.Timestamp.now()
-        df = df[df["application_deadline"].isna() | (df["application_deadline"] >= current_time)]
 
-        return df
+def load_and_process_data():
+    """Catch up with the pipeline's latest output; only new parts are loaded."""
+    try:
+        return get_live_dataset().refresh()
     except FileNotFoundError:
-        st.error("❌ jobs.csv file not found in output directory. Please run the scraper first.")
+        st.error("❌ No processed jobs found in the output directory. Please run the scraper first.")
         st.stop()
     except Exception as e:
         st.error(f"❌ Error loading data: {str(e)}")
         st.stop()
 
 
-@st.cache_data
-def extract_relevant_items(s):
-    """Extract relevant items from the 'field' column with caching."""
-    try:
-        items = [item.strip() for item in s.split(";")]
-    except Exception:
-        return None, None
-
-    class_1 = []
-    class_2 = []
-    for i in range(len(items)):
-        curr = items[i]
-        prev = items[i - 1] if i > 0 else ""
-        next_item = items[i + 1] if i < len(items) - 1 else ""
-
-        if next_item == "»":
-            class_1.append(curr)
-        elif prev == "»":
-            class_2.append(curr)
-        elif prev != "»" and next_item != "»" and curr != "»":
-            class_1.append(curr)
-
-    return ",".join(set(class_1)), ",".join(set(class_2))
-
-
-@st.cache_data
-def prepare_filter_options(df):
-    """Prepare filter options with caching."""
-    # Create lists of unique fields and countries (optimized)
-    all_main_fields = []
-    all_sub_fields = []
-
-    # Use vectorized operations where possible
-    field_1_values = df["field_1"].dropna()
-    field_2_values = df["field_2"].dropna()
-
-    for field_str in field_1_values:
-        if field_str:
-            all_main_fields.extend(field_str.split(","))
-
-    for field_str in field_2_values:
-        if field_str:
-            all_sub_fields.extend(field_str.split(","))
-
-    all_main_fields = sorted(set(all_main_fields), key=lambda x: x.lower())
-    all_sub_fields = sorted(set(all_sub_fields), key=lambda x: x.lower())
-
-    # Create boolean columns for each unique field (optimized to avoid fragmentation)
-    # Create all main field columns at once
-    main_field_columns = {}
-    for field in all_main_fields:
-        if field not in df.columns:
-            main_field_columns[field] = df["field_1"].str.contains(field, case=False, na=False)
-
-    # Create all sub field columns at once
-    sub_field_columns = {}
-    for field in all_sub_fields:
-        if field not in df.columns:
-            sub_field_columns[field] = df["field_2"].str.contains(field, case=False, na=False)
-
-    # Concatenate all new columns at once to avoid fragmentation
-    if main_field_columns or sub_field_columns:
-        all_new_columns = {**main_field_columns, **sub_field_columns}
-        new_df = pd.DataFrame(all_new_columns, index=df.index)
-        df = pd.concat([df, new_df], axis=1)
-
-    # Get unique countries
-    all_countries = sorted(df["country"].dropna().unique().tolist(), key=lambda x: x.lower())
-    all_profiles = ["R1", "R2", "R3", "R4"]
-
-    return df, all_countries, all_profiles, all_main_fields, all_sub_fields
-
-
-@st.cache_data
-def filter_dataframe(df, selected_countries, selected_profiles, selected_fields, selected_sub_fields):
-    """Filter dataframe with caching."""
-    df_filtered = df.copy()
-
-    if selected_countries:
-        df_filtered = df_filtered[df_filtered["country"].isin(selected_countries)]
-
-    if selected_profiles:
-        df_filtered = df_filtered[df_filtered[selected_profiles].any(axis=1)]
-
-    if selected_fields:
-        df_filtered = df_filtered[df_filtered[selected_fields].any(axis=1)]
-
-    if selected_sub_fields:
-        df_filtered = df_filtered[df_filtered[selected_sub_fields].any(axis=1)]
-
-    return df_filtered
-
-
 # Main app logic
 def main():
     # Add loading spinner for data loading
     with st.spinner("Loading data..."):
-        df = load_and_process_data()
-        df, all_countries, all_profiles, all_main_fields, all_sub_fields = prepare_filter_options(df)
+        engine = load_and_process_data()
+        df = engine.df
+
+    all_countries = engine.filter_index.values("country")
+    all_profiles = list(PROFILE_PATTERNS)
+    all_main_fields = engine.filter_index.values("field")
+    all_sub_fields = engine.filter_index.values("sub_field")
+    all_funding_programs = engine.filter_index.values("funding_program")
+
+    # Matching jobs per filter value under the current selection, read from the
+    # facet counts instead of the frame; each filter is counted ignoring itself
+    facet_counts = engine.facet_counts(
+        {dimension: st.session_state.get(key, []) for dimension, key in SELECTION_KEYS.items()}, st.session_state.get("search_term")
+    )
+
+    def with_count(dimension):
+        return lambda value: f"{value} ({facet_counts[dimension].get(value, 0):,})"
 
     # Sidebar for filters with improved UI
     with st.sidebar:
         st.header("🔍 Filters")
 
+        search_term = st.text_input("Search titles and descriptions", placeholder="Enter keywords...", key="search_term")
+
         # Add search functionality for countries
         country_search = st.text_input("Search Countries", placeholder="Type to filter countries...")
         filtered_countries = [c for c in all_countries if country_search.lower() in c.lower()] if country_search else all_countries
-        selected_countries = st.multiselect("Country", options=filtered_countries, key="countries")
+        selected_countries = st.multiselect("Country", options=filtered_countries, format_func=with_count("country"), key="countries")
 
-        selected_profiles = st.multiselect("Profile", options=all_profiles, key="profiles")
+        selected_profiles = st.multiselect("Profile", options=all_profiles, format_func=with_count("profile"), key="profiles")
 
         # Add search for fields
         field_search = st.text_input("Search Fields", placeholder="Type to filter fields...")
         filtered_fields = [f for f in all_main_fields if field_search.lower() in f.lower()] if field_search else all_main_fields
-        selected_fields = st.multiselect("Field", options=filtered_fields, key="fields")
+        selected_fields = st.multiselect("Field", options=filtered_fields, format_func=with_count("field"), key="fields")
 
         # Add search for sub-fields
         subfield_search = st.text_input("Search Sub-fields", placeholder="Type to filter sub-fields...")
         filtered_sub_fields = [f for f in all_sub_fields if subfield_search.lower() in f.lower()] if subfield_search else all_sub_fields
-        selected_sub_fields = st.multiselect("Sub-field", options=filtered_sub_fields, key="sub_fields")
+        selected_sub_fields = st.multiselect("Sub-field", options=filtered_sub_fields, format_func=with_count("sub_field"), key="sub_fields")
+
+        selected_funding_programs = st.multiselect(
+            "Funding Programme", options=all_funding_programs, format_func=with_count("funding_program"), key="funding_programs"
+        )
+
+        show_descriptions = st.checkbox("Show descriptions", value=False, key="show_descriptions")
 
         # Add clear all button
         if st.button("Clear All Filters", type="secondary"):
@@ -173,25 +112,48 @@ def main():
     # Main content area
     st.title("🎓 Euraxess Job Listings")
 
-    # Add statistics
+    # Add statistics from the facet counts of the live rows (superseded and expired rows excluded)
+    facets = engine.facets
     col1, col2, col3, col4 = st.columns(4)
     with col1:
-        st.metric("Total Jobs", len(df))
+        st.metric("Total Jobs", facets.n_live)
     with col2:
-        st.metric("Countries", df["country"].nunique())
+        st.metric("Countries", len(facets.values["country"]))
     with col3:
-        st.metric("Universities", df["university"].nunique())
+        st.metric("Universities", len(facets.universities))
     with col4:
-        recent_jobs = len(df[df["posted_on"] >= (pd.Timestamp.now() - pd.Timedelta(days=7))])
-        st.metric("New This Week", recent_jobs)
-
-    # Filter data with caching
-    df_filtered = filter_dataframe(df, selected_countries, selected_profiles, selected_fields, selected_sub_fields)
+        st.metric("New This Week", facets.posted_since(pd.Timestamp.now() - pd.Timedelta(days=7)))
+
+    selection = {
+        "country": selected_countries,
+        "profile": selected_profiles,
+        "field": selected_fields,
+        "sub_field": selected_sub_fields,
+        "funding_program": selected_funding_programs,
+    }
+    # Sort controls, above the table; sorting by relevance keeps the search ranking
+    sort_col, order_col, size_col = st.columns([2, 1, 1])
+    with sort_col:
+        sort_label = st.selectbox("Sort by", options=["Relevance", *SORT_COLUMNS], key="sort_by")
+    with order_col:
+        descending = st.checkbox("Descending", value=False, key="descending")
+    with size_col:
+        page_size = st.selectbox("Rows per page", options=PAGE_SIZES, index=1, key="page_size")
+    sort_by = SORT_COLUMNS.get(sort_label)
+
+    # Cached by selection, sort order and dataset version; a search term ranks the matches by relevance
+    positions = engine.sorted_positions(selection, search_term, sort_by, descending)
+    n_results = len(positions)
+
+    cache_stats = engine.cache.stats()
+    st.sidebar.caption(f"Query cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['size']} entries")
+    frame_bytes = df.memory_usage(deep=True).sum()
+    st.sidebar.caption(f"Frame memory: {frame_bytes / 1e6:.1f} MB, {frame_bytes / max(len(df), 1):.0f} bytes per row")
 
     # Display results
-    st.subheader(f"📊 Results ({len(df_filtered)} jobs)")
+    st.subheader(f"📊 Results ({n_results} jobs)")
 
-    if len(df_filtered) == 0:
+    if n_results == 0:
         st.warning("No jobs match your current filter criteria. Try adjusting your filters.")
         return
 
@@ -203,7 +165,6 @@ def main():
         "link",
         "application_deadline",
         "posted_on",
-        "description",
         "department",
         "location",
         "funding_program",
@@ -223,15 +184,50 @@ def main():
         "description": st.column_config.TextColumn("Description", width="medium"),
     }
 
-    # Display dataframe with pagination-like behavior
-    st.dataframe(df_filtered[show_columns], use_container_width=True, height=500, column_config=column_config, hide_index=True)
-
-    # Add export functionality
-    # if st.button("📥 Export Filtered Results to CSV"):
-    #     csv = df_filtered.to_csv(index=False)
-    #     st.download_button(
-    #         label="Download CSV", data=csv, file_name=f"euraxess_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv", mime="text/csv"
-    #     )
+    # Only the rows of the current page are materialized and sent to the browser
+    n_pages = -(-n_results // page_size)
+    st.session_state["page"] = min(st.session_state.get("page", 1), n_pages)
+    page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, step=1, key="page")
+    df_page = engine.page(positions, page - 1, page_size, ["id"] + show_columns)
+
+    if show_descriptions:
+        df_page = df_page.assign(description=df_page["id"].map(get_live_dataset().descriptions(df_page["id"].tolist())))
+        show_columns.insert(show_columns.index("posted_on") + 1, "description")
+
+    first = (page - 1) * page_size
+    st.caption(f"Showing {first + 1}–{first + len(df_page)} of {n_results} jobs")
+    st.dataframe(df_page[show_columns], use_container_width=True, column_config=column_config, hide_index=True)
+
+    # Export: the selection is streamed from the processed dataset to a file in chunks, never built in memory
+    with st.expander("📥 Export filtered results"):
+        format_col, descriptions_col = st.columns(2)
+        with format_col:
+            export_format = st.selectbox("Format", options=list(MIME_TYPES), key="export_format")
+        with descriptions_col:
+            export_descriptions = st.checkbox("Include descriptions", value=True, key="export_descriptions")
+        if st.button("Export", key="export"):
+            file_name = f"euraxess_filtered_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+            path = os.path.join(SETTINGS.get("EURAXESS_EXPORT_DIR"), file_name)
+            columns = [column for column in EXPORT_COLUMNS if export_descriptions or column != "description"]
+            with st.spinner(f"Exporting {n_results} jobs..."):
+                export_selection(get_live_dataset(), selection, search_term, path, export_format, columns, sort_by=sort_by, descending=descending)
+            st.session_state["export_path"] = path
+
+        path = st.session_state.get("export_path")
+        if path and os.path.exists(path):
+            size = os.path.getsize(path)
+            st.caption(f"Exported to `{path}` ({size / 1e6:.1f} MB)")
+            if size <= SETTINGS.getint("EURAXESS_EXPORT_DOWNLOAD_MAX_MB") * 1_000_000:
+                st.download_button(
+                    label="Download",
+                    # Read on click only, not on every rerun
+                    data=Path(path).read_bytes,
+                    file_name=os.path.basename(path),
+                    mime=MIME_TYPES[os.path.splitext(path)[1][1:]],
+                    key="export_download",
+                )
+            else:
+                st.info("This export is too large to download through the app; copy it from the path above.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+"""Load test of the JSON query API.
+
+Writes --rows synthetic jobs (all with open deadlines) to a processed dataset
+with a search index, starts ``python -m euraxess.api`` on it in a child
+process, and runs --clients client processes against it for --seconds each:
+once with keep-alive connections and once with a new connection per request.
+Each client draws from a pool of filter, search, sort and page queries,
+popular ones more often. Reports throughput, client-side latency and the
+server's own /metrics, and checks the API's answers against a query engine
+built in this process.
+
+    python benchmarks/bench_api.py --rows 100000 --clients 8 --seconds 10
+"""
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+from urllib.parse import urlencode
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.processing import ProcessedDataset, process_frame, processed_schema  # noqa: E402
+from euraxess.search import SearchIndex, job_text  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import COUNTRIES, FIELDS, PROFILES, iter_jobs  # noqa: E402
+
+LISTING_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
+SEARCHES = ["machine learning", "quantum", "marine ecology", "genome", "neural network"]
+SORTS = [None, "posted_on", "application_deadline", "title"]
+
+
+def make_queries(n: int, seed: int = 0):
+    """``n`` distinct-ish query parameter lists for /jobs."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        params = [("country", country) for country in rng.sample(COUNTRIES, rng.choice([0, 1, 1, 2]))]
+        params += [("profile", profile) for profile in rng.sample(PROFILES, rng.choice([0, 0, 1, 2]))]
+        if rng.random() < 0.3:
+            params.append(("field", rng.choice(list(FIELDS))))
+        if rng.random() < 0.25:
+            params.append(("q", rng.choice(SEARCHES)))
+        sort = rng.choice(SORTS)
+        if sort:
+            params += [("sort", sort), ("order", rng.choice(["asc", "desc"]))]
+        params += [("page", rng.choice([1, 1, 1, 2, 3])), ("page_size", 50)]
+        queries.append(params)
+    return queries
+
+
+def client(base: str, keep_alive: bool, seconds: float, seed: int):
+    """Send requests for ``seconds``; returns the latency of each."""
+    host, port = base.split("//")[1].split(":")
+    queries = make_queries(200)
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(queries))]
+    latencies, errors = [], 0
+    connection = http.client.HTTPConnection(host, int(port))
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        path = "/jobs?" + urlencode(rng.choices(queries, weights)[0])
+        start = time.perf_counter()
+        if not keep_alive:
+            connection = http.client.HTTPConnection(host, int(port))
+        connection.request("GET", path)
+        response = connection.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        errors += response.status != 200
+        if not keep_alive:
+            connection.close()
+    connection.close()
+    return latencies, errors
+
+
+def get(base: str, path: str):
+    host, port = base.split("//")[1].split(":")
+    connection = http.client.HTTPConnection(host, int(port))
+    connection.request("GET", path)
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--clients", type=int, default=8)
+    arg_parser.add_argument("--seconds", type=float, default=10)
+    arg_parser.add_argument("--response-cache-size", type=int, default=1024, help="0 to measure the query engine alone")
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(f"{tmp}/processed")
+        dataset.reset()
+        search_index = SearchIndex()
+        jobs = iter_jobs(args.rows)
+        while chunk := list(islice(jobs, 50_000)):
+            chunk = pd.DataFrame(chunk)[FIELDNAMES].assign(application_deadline="31 Dec 2099 - 23:59 (Europe/Brussels)")
+            dataset.append(process_frame(chunk))
+            search_index.add_many(chunk["id"], (job_text(t, d) for t, d in zip(chunk["title"], chunk["description"])))
+        search_index.save(f"{tmp}/search_index.pkl")
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        base = f"http://127.0.0.1:{port}"
+        command = [sys.executable, "-m", "euraxess.api", "--port", str(port), "--processed-dir", dataset.root, "--search-index", f"{tmp}/search_index.pkl"]
+        command += ["--response-cache-size", str(args.response_cache_size), "--snapshot-dir", ""]
+        server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            start = time.perf_counter()
+            while True:
+                try:
+                    get(base, "/health")
+                    break
+                except ConnectionRefusedError:
+                    if server.poll() is not None:
+                        raise RuntimeError("API server exited")
+                    time.sleep(0.1)
+            print(f"{args.rows:,} jobs, server ready in {time.perf_counter() - start:.1f}s; {args.clients} clients for {args.seconds:.0f}s each")
+            # Every query once, so both runs are measured against warm caches
+            for params in make_queries(200):
+                get(base, "/jobs?" + urlencode(params))
+
+            with multiprocessing.Pool(args.clients) as pool:
+                for keep_alive in (True, False):
+                    results = pool.starmap(client, [(base, keep_alive, args.seconds, seed) for seed in range(args.clients)])
+                    latencies = np.concatenate([latency for latency, _ in results]) * 1000
+                    errors = sum(error for _, error in results)
+                    print(
+                        f"{'keep-alive' if keep_alive else 'new connection per request':<28}: {len(latencies) / args.seconds:7.0f} queries/s, "
+                        f"p50 {np.quantile(latencies, 0.5):6.2f} ms, p99 {np.quantile(latencies, 0.99):6.2f} ms, {errors} errors"
+                    )
+
+            _, metrics = get(base, "/metrics")
+            jobs_metrics = metrics["endpoints"]["/jobs"]
+            print(
+                f"server /jobs: {jobs_metrics['requests']} requests, p50 {jobs_metrics['p50_ms']} ms, p99 {jobs_metrics['p99_ms']} ms; "
+                f"response cache hit rate {metrics['response_cache']['hit_rate']:.0%}, query cache {metrics['cache']['hit_rate']:.0%}"
+            )
+
+            engine = LiveDataset(ProcessedDataset(dataset.root), columns=LISTING_COLUMNS).refresh()
+            engine.search_index = search_index
+            same = True
+            for params in make_queries(20, seed=1):
+                query = {key: [value for k, value in params if k == key] for key, _ in params}
+                selection = {dimension: query.get(dimension, []) for dimension in ("country", "profile", "field")}
+                sort_by = query.get("sort", [None])[0]
+                positions = engine.sorted_positions(selection, query.get("q", [None])[0], sort_by, query.get("order", ["asc"])[0] == "desc")
+                page = int(query["page"][0])
+                expected = engine.page(positions, page - 1, 50, ["id"])["id"].tolist()
+                status, answer = get(base, "/jobs?" + urlencode(params))
+                same &= status == 200 and answer["total"] == len(positions) and [job["id"] for job in answer["jobs"]] == expected
+            print(f"same answers as an in-process query engine: {same}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
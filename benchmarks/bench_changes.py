@@ -0,0 +1,88 @@
+"""Rows written per crawl with change tracking, as postings get edited.
+
+Crawls the mock listing three times with the pipeline writing to a temporary
+output directory: a first full crawl, a crawl after --edited postings had
+their application deadline extended, and a crawl with nothing changed. Only
+new and changed jobs should reach the job store, and the processed dataset
+should hold the extended deadlines.
+
+    python benchmarks/bench_changes.py --jobs 1000 --edited 50
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+from scrapy.settings import Settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess  # noqa: E402
+from euraxess.idindex import JobIdIndex  # noqa: E402
+from euraxess.processing import ProcessedDataset  # noqa: E402
+from euraxess.storage import get_job_store  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=1000)
+    arg_parser.add_argument("--edited", type=int, default=50)
+    arg_parser.add_argument("--latency", type=float, default=0.0)
+    arg_parser.add_argument("--storage", choices=["csv", "parquet"], default="csv")
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.jobs)
+    server = MockEuraxessServer(("127.0.0.1", 0), jobs, latency=args.latency)
+    server.start_in_thread()
+    with tempfile.TemporaryDirectory() as tmp:
+        overrides = {
+            "ITEM_PIPELINES": {"euraxess.pipelines.EuraxessPipeline": 300},
+            "EURAXESS_STORAGE": args.storage,
+            "EURAXESS_JOBS_CSV": f"{tmp}/jobs.csv",
+            "EURAXESS_PARQUET_DIR": f"{tmp}/jobs_parquet",
+            "EURAXESS_PROCESSED_DIR": f"{tmp}/processed",
+            "EURAXESS_SEARCH_INDEX_PATH": f"{tmp}/search_index.pkl",
+            "EURAXESS_SNAPSHOT_DIR": f"{tmp}/snapshots",
+            "EURAXESS_ID_INDEX_PATH": f"{tmp}/jobs_ids.sqlite",
+            "EURAXESS_WATERMARK_PATH": f"{tmp}/watermark.json",
+        }
+        store = get_job_store(Settings(overrides))
+
+        def crawl(label: str) -> int:
+            before = len(store.read(columns=["id"])) if store.exists() else 0
+            result = crawl_in_subprocess(server.base_url, overrides)
+            written = len(store.read(columns=["id"])) - before
+            print(f"{label:<16}: {result['seconds']:6.2f}s, {result['items']:5} jobs scraped, {written:5} rows written")
+            return written
+
+        crawl("first crawl")
+        edited = random.Random(0).sample(jobs, args.edited)
+        for job in edited:
+            job["application_deadline"] = "31 Dec 2099 - 23:59 (Europe/Brussels)"
+        changed_rows = crawl("after edits")
+        unchanged_rows = crawl("nothing changed")
+
+        index = JobIdIndex(overrides["EURAXESS_ID_INDEX_PATH"]).open()
+        per_crawl = index.crawl_changes()
+        changed_ids = set(index.changes(per_crawl["crawl"].iloc[0])["id"]) if len(per_crawl) else set()
+        index.close()
+        print(per_crawl.to_string(index=False))
+
+        current = ProcessedDataset(overrides["EURAXESS_PROCESSED_DIR"]).load(columns=["id", "application_deadline"])
+        deadlines = current.set_index("id")["application_deadline"]
+        edited_ids = {str(job["id"]) for job in edited}
+        print(f"only edited jobs rewritten: {changed_rows == args.edited and changed_ids == edited_ids}")
+        print(f"nothing rewritten without edits: {unchanged_rows == 0}")
+        print(f"current view has the new deadlines: {(deadlines[list(edited_ids)] == pd.Timestamp('2099-12-31 23:59')).all()}")
+        print(f"current view has one row per job: {len(current) == len(jobs)}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Serial vs fan-out crawl benchmark against the local mock server.
+
+Both modes must scrape the same ids; the serial baseline runs without the
+politeness delay so the comparison measures scheduling rather than sleeping.
+
+    python benchmarks/bench_crawl.py --jobs 300 --latency 0.2 --concurrency 8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=300)
+    arg_parser.add_argument("--latency", type=float, default=0.2)
+    arg_parser.add_argument("--concurrency", type=int, default=8)
+    args = arg_parser.parse_args()
+
+    server = MockEuraxessServer(("127.0.0.1", 0), generate_jobs(args.jobs), latency=args.latency)
+    server.start_in_thread()
+    serial = crawl_in_subprocess(server.base_url, {"CONCURRENT_REQUESTS": 1})
+    fan_out = crawl_in_subprocess(
+        server.base_url, {"EURAXESS_FAN_OUT": True, "EURAXESS_FAN_OUT_CONCURRENCY": args.concurrency}
+    )
+    server.shutdown()
+
+    print(f"serial : {serial['seconds']:.2f}s, {serial['items']} items")
+    print(f"fan-out: {fan_out['seconds']:.2f}s, {fan_out['items']} items (concurrency {args.concurrency})")
+    print(f"speedup: {serial['seconds'] / fan_out['seconds']:.1f}x")
+    print(f"same ids: {serial['ids'] == fan_out['ids']}")
+
+
+if __name__ == "__main__":
+    main()
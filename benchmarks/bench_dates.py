@@ -0,0 +1,55 @@
+"""Per-row dateutil deadline parsing vs the bulk DateParser.
+
+Also checks the edge cases of a batch: only missing deadlines, and a string
+only dateutil parses that carries a UTC offset.
+
+    python benchmarks/bench_dates.py --rows 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+from dateutil import parser
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.dates import DEADLINE_FORMATS, DateParser  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    raw = pd.Series([job["application_deadline"] for job in generate_jobs(args.rows)])
+    print(f"{len(raw):,} deadlines, {raw.nunique():,} distinct")
+
+    start = time.perf_counter()
+    per_row = raw.apply(lambda x: parser.parse(x.split("(")[0].strip()) if pd.notnull(x) else None)
+    print(f"per-row dateutil : {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    bulk = DateParser(DEADLINE_FORMATS).parse(raw)
+    print(f"DateParser (cold): {time.perf_counter() - start:.3f}s")
+
+    date_parser = DateParser(DEADLINE_FORMATS)
+    date_parser.parse(raw)
+    start = time.perf_counter()
+    date_parser.parse(raw)
+    print(f"DateParser (warm): {time.perf_counter() - start:.3f}s")
+
+    print(f"same values: {bool((pd.to_datetime(per_row) == bulk.values).all())}, outliers: {len(bulk.outliers)}")
+
+    missing = DateParser(DEADLINE_FORMATS).parse(pd.Series([None, None], dtype=object))
+    print(f"batch of missing deadlines all NaT: {bool(missing.values.isna().all() and len(missing.values) == 2)}")
+    offset = DateParser(DEADLINE_FORMATS).parse(pd.Series(["Sun Nov 30 2025 23:59 +0100"]))
+    print(f"dateutil outlier with an offset kept as wall time: {offset.values[0] == pd.Timestamp('2025-11-30 23:59')}")
+
+
+if __name__ == "__main__":
+    main()
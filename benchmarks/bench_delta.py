@@ -0,0 +1,63 @@
+"""Full crawl vs delta crawl after a handful of new postings.
+
+A first full crawl of an older snapshot of the listing sets the watermark,
+then a delta crawl runs against the listing with new jobs on top.
+
+    python benchmarks/bench_delta.py --jobs 1000 --new 25 --latency 0.05
+"""
+
+import argparse
+import csv
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=1000)
+    arg_parser.add_argument("--new", type=int, default=25)
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.jobs)
+    with tempfile.TemporaryDirectory() as tmp:
+        overrides = {
+            "CONCURRENT_REQUESTS": 1,
+            "EURAXESS_JOBS_CSV": f"{tmp}/jobs.csv",
+            "EURAXESS_WATERMARK_PATH": f"{tmp}/watermark.json",
+            "EURAXESS_ID_INDEX_PATH": f"{tmp}/jobs_ids.sqlite",
+        }
+
+        server = MockEuraxessServer(("127.0.0.1", 0), jobs[args.new :], latency=args.latency)
+        server.start_in_thread()
+        first = crawl_in_subprocess(server.base_url, overrides)
+        server.shutdown()
+
+        # Stand-in for what the pipeline stored during the first crawl
+        with open(f"{tmp}/jobs.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(jobs[0]))
+            writer.writeheader()
+            writer.writerows(jobs[args.new :])
+
+        server = MockEuraxessServer(("127.0.0.1", 0), jobs, latency=args.latency)
+        server.start_in_thread()
+        delta = crawl_in_subprocess(server.base_url, {**overrides, "EURAXESS_DELTA": True})
+        full = crawl_in_subprocess(server.base_url, overrides)
+        server.shutdown()
+
+    new_ids = {job["id"] for job in jobs[: args.new]}
+    print(f"first crawl: {first['responses']} pages")
+    print(f"full crawl : {full['seconds']:.2f}s, {full['responses']} pages, {full['items']} items")
+    print(f"delta crawl: {delta['seconds']:.2f}s, {delta['responses']} pages, {delta['items']} items")
+    print(f"all new jobs seen by delta: {new_ids <= set(delta['ids'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Detail crawl: first fetch, unchanged re-crawl and re-crawl after some edits.
+
+Runs the euraxess_details spider three times against the mock server, once
+with ETag/Last-Modified validators and once with a server that sends none (so
+only the content hash can tell a page did not change), and counts what the
+server answered.
+
+    python benchmarks/bench_details.py --jobs 1000 --edited 50 --latency 0.05
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess  # noqa: E402
+from euraxess.storage import CsvJobStore  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+SPIDER = "euraxess.spiders.details.EuraxessDetailsSpider"
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=1000)
+    arg_parser.add_argument("--edited", type=int, default=50)
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    arg_parser.add_argument("--concurrency", type=int, default=16)
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.jobs)
+    for validators in (True, False):
+        server = MockEuraxessServer(("127.0.0.1", 0), jobs, latency=args.latency, validators=validators)
+        server.start_in_thread()
+        with tempfile.TemporaryDirectory() as tmp:
+            # Stand-in for what the listing crawl stored, pointing at the mock
+            store = CsvJobStore(f"{tmp}/jobs.csv")
+            store.open()
+            for job in jobs:
+                store.write({**job, "link": f"{server.base_url}/jobs/{job['id']}"})
+            store.close()
+
+            overrides = {
+                "ITEM_PIPELINES": {"euraxess.pipelines.EuraxessDetailsPipeline": 300},
+                "EURAXESS_JOBS_CSV": f"{tmp}/jobs.csv",
+                "EURAXESS_DETAILS_PATH": f"{tmp}/job_details.sqlite",
+                "EURAXESS_DETAILS_CONCURRENCY": args.concurrency,
+                "EURAXESS_DETAILS_DELAY": 0,
+            }
+            print("with ETag/Last-Modified" if validators else "without validators (content hash only)")
+            for run in ("first crawl", "unchanged", f"{args.edited} edited"):
+                if run.endswith("edited"):
+                    for job in random.Random(0).sample(jobs, args.edited):
+                        server.update_job(str(job["id"]))
+                server.status_counts.clear()
+                result = crawl_in_subprocess(server.base_url, overrides, spider=SPIDER)
+                statuses = ", ".join(f"{count} x {status}" for status, count in sorted(server.status_counts.items()))
+                print(f"    {run:12} {result['seconds']:6.2f}s  {statuses:22}  {result['items']:5} pages parsed and stored")
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
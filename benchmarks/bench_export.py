@@ -0,0 +1,125 @@
+"""Peak memory and time of exporting a selection, in-memory vs streamed.
+
+Writes --rows synthetic jobs (all with open deadlines) to a processed dataset,
+plus a part of updated versions of --updated of them, then exports every job
+with its description, each export in its own interpreter so its peak RSS can
+be read: once as the dashboard's commented-out export would have done it
+(the whole frame loaded and turned into one ``to_csv`` string), and streamed
+by ``euraxess.export`` to CSV, JSON Lines and Parquet, and to Parquet
+sorted by posting date as the results table can be. The streamed CSV is
+checked against the in-memory one, the sorted export against the table's
+order. The sorted export's peak RSS includes the pages of its memory-mapped
+spill file, which are page cache the kernel can drop, not heap.
+
+    python benchmarks/bench_export.py --rows 500000 --chunksize 10000
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.export import EXPORT_COLUMNS, export_selection  # noqa: E402
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.processing import ProcessedDataset, process_frame, processed_schema  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import iter_jobs  # noqa: E402
+
+LISTING_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
+MODES = {"in-memory": "csv", "csv": "csv", "jsonl": "jsonl", "parquet": "parquet", "sorted": "parquet"}
+SORT = ("posted_on", True)
+
+
+def _rss_mb(field: str = "VmRSS") -> float:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(f"{field}:")) / 1e3
+
+
+def _reset_peak_rss():
+    # Resets VmHWM to the current RSS, so the peak is the export's own (Linux 4.0+)
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def worker(mode: str, root: str, path: str, chunksize: int):
+    """Export every live job in this interpreter and print a JSON summary."""
+    live = LiveDataset(ProcessedDataset(root), columns=LISTING_COLUMNS)
+    engine = live.refresh()
+    _reset_peak_rss()
+    before = _rss_mb()
+    start = time.perf_counter()
+    if mode == "in-memory":
+        df = live.dataset.load(EXPORT_COLUMNS)
+        df = df[df["id"].isin(engine.df["id"].take(engine.select({})))]
+        data = df.to_csv(index=False)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(data)
+        rows = len(df)
+    elif mode == "sorted":
+        rows = export_selection(live, {}, None, path, MODES[mode], chunksize=chunksize, sort_by=SORT[0], descending=SORT[1])
+    else:
+        rows = export_selection(live, {}, None, path, MODES[mode], chunksize=chunksize)
+    seconds = time.perf_counter() - start
+    peak = _rss_mb("VmHWM")
+    print(json.dumps({"rows": rows, "seconds": seconds, "rss_before": before, "rss_peak": peak}))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--updated", type=int, default=1_000)
+    arg_parser.add_argument("--chunksize", type=int, default=10_000)
+    arg_parser.add_argument("--worker", nargs=3, metavar=("MODE", "ROOT", "PATH"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.worker:
+        worker(*args.worker, args.chunksize)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(f"{tmp}/processed")
+        dataset.reset()
+        jobs = iter_jobs(args.rows)
+        while chunk := list(islice(jobs, 50_000)):
+            chunk = pd.DataFrame(chunk)[FIELDNAMES].assign(application_deadline="31 Dec 2099 - 23:59 (Europe/Brussels)")
+            dataset.append(process_frame(chunk))
+        updated = pd.DataFrame(list(islice(iter_jobs(args.rows), args.updated)))[FIELDNAMES]
+        updated = updated.assign(title="Updated: " + updated["title"], application_deadline="31 Dec 2099 - 23:59 (Europe/Brussels)")
+        dataset.append(process_frame(updated))
+        print(f"{args.rows:,} jobs, {args.updated:,} of them updated in a later part, exported with descriptions")
+
+        for mode, fmt in MODES.items():
+            path = f"{tmp}/export-{mode}.{fmt}"
+            command = [sys.executable, __file__, "--worker", mode, dataset.root, path, "--chunksize", str(args.chunksize)]
+            result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout.splitlines()[-1])
+            size = Path(path).stat().st_size
+            print(
+                f"{mode:<10}: {result['rows']:>8,} rows in {result['seconds']:6.2f}s, {size / 1e6:7.1f} MB written, "
+                f"RSS {result['rss_before']:6.0f} MB before, peak {result['rss_peak']:6.0f} MB"
+            )
+
+        with open(f"{tmp}/export-in-memory.csv", "rb") as expected, open(f"{tmp}/export-csv.csv", "rb") as streamed:
+            same = all(a == b for a, b in zip(expected, streamed)) and not expected.read() and not streamed.read()
+        print(f"streamed CSV same as in-memory CSV: {same}")
+        expected = pd.read_csv(f"{tmp}/export-csv.csv", dtype=str, usecols=["id", "title"])
+        with open(f"{tmp}/export-jsonl.jsonl", encoding="utf-8") as f:
+            jsonl = [json.loads(line)["id"] for line in f]
+        parquet = pd.read_parquet(f"{tmp}/export-parquet.parquet", columns=["id"])["id"]
+        print(f"updated titles exported once: {expected['title'].str.startswith('Updated: ').sum() == args.updated}")
+        print(f"same jobs in JSON Lines and Parquet: {set(jsonl) == set(parquet) == set(expected['id'])}")
+        engine = LiveDataset(dataset, columns=LISTING_COLUMNS).refresh()
+        table_order = engine.df["id"].take(engine.sorted_positions({}, None, *SORT)).tolist()
+        exported = pd.read_parquet(f"{tmp}/export-sorted.parquet", columns=["id"])["id"].tolist()
+        print(f"sorted export in the order of the results table: {exported == table_order}")
+
+
+if __name__ == "__main__":
+    main()
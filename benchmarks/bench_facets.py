@@ -0,0 +1,115 @@
+"""Facet counts and metrics: frame scans vs the maintained facet counts.
+
+Times what a rerun spends on the headline metrics and on per-value counts
+for the sidebar, computed by scanning the frame (as the app did) and read
+from the facet counts or the filter index bitsets. Then appends a part of new
+and updated jobs through the live dataset and checks the incrementally
+maintained counts against counts built from scratch and against pandas.
+
+    python benchmarks/bench_facets.py --rows 100000 --new 2000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.facets import FacetCounts  # noqa: E402
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.processing import ProcessedDataset, process_frame, processed_schema  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+LISTING_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
+SELECTION = {"country": ["Germany", "France"], "profile": ["R1"]}
+
+
+def _timed(fn, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def scan_metrics(engine):
+    current = engine.rows(engine.select({}), ["country", "university", "posted_on"])
+    recent = len(current[current["posted_on"] >= (pd.Timestamp.now() - pd.Timedelta(days=7))])
+    return len(current), current["country"].nunique(), current["university"].nunique(), recent
+
+
+def facet_metrics(engine):
+    facets = engine.facets
+    since = pd.Timestamp.now() - pd.Timedelta(days=7)
+    return facets.n_live, len(facets.values["country"]), len(facets.universities), facets.posted_since(since)
+
+
+def scan_counts(engine, selection):
+    """Per-value counts of every dimension by filtering the frame, as pandas would."""
+    counts = {}
+    for dimension in ("country", "funding_program"):
+        others = {key: value for key, value in selection.items() if key != dimension}
+        rows = engine.rows(engine.select(others), [dimension])
+        counts[dimension] = {str(k): int(v) for k, v in rows[dimension].value_counts().items() if v}
+    return counts
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--new", type=int, default=2_000)
+    args = arg_parser.parse_args()
+
+    jobs = pd.DataFrame(generate_jobs(args.rows + args.new))[FIELDNAMES].iloc[::-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(tmp)
+        dataset.reset()
+        for start in range(0, args.rows, 50_000):
+            dataset.append(process_frame(jobs.iloc[start : min(start + 50_000, args.rows)]))
+        live = LiveDataset(dataset, columns=LISTING_COLUMNS)
+        engine = live.refresh()
+        print(f"{engine.filter_index.n_live:,} live rows of {args.rows:,}")
+
+        scan, scanned = _timed(lambda: scan_metrics(engine))
+        facet, counted = _timed(lambda: facet_metrics(engine))
+        print(f"metrics      : frame scan {scan * 1000:7.2f} ms, facet counts {facet * 1000:6.3f} ms, same: {scanned == counted}")
+
+        def uncached():
+            engine.cache.entries.clear()
+            return engine.facet_counts(SELECTION)
+
+        scan, _ = _timed(lambda: scan_counts(engine, SELECTION))
+        cold, _ = _timed(uncached)
+        warm, counts = _timed(lambda: engine.facet_counts(SELECTION))
+        same = all(counts[d] == c for d, c in scan_counts(engine, SELECTION).items())
+        print(
+            f"sidebar counts under {SELECTION}: frame scan of 2 dimensions {scan * 1000:7.2f} ms, "
+            f"bitsets for all 5 {cold * 1000:6.2f} ms, cached {warm * 1000:6.3f} ms, same: {same}"
+        )
+
+        updates = jobs.iloc[args.rows - args.new // 4 : args.rows]
+        dataset.append(process_frame(pd.concat([jobs.iloc[args.rows :], updates])))
+        start = time.perf_counter()
+        engine = live.refresh()
+        print(f"append of {args.new:,} new and {len(updates):,} updated jobs: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+        rebuilt, fresh = _timed(lambda: FacetCounts.build(engine.df, engine.filter_index), repeat=3)
+        incremental = engine.facets
+        same = (
+            incremental.values == fresh.values
+            and incremental.universities == fresh.universities
+            and incremental.posted_days == fresh.posted_days
+            and incremental.n_live == fresh.n_live
+        )
+        print(f"facet counts after the append match a rebuild ({rebuilt * 1000:.1f} ms): {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Substring boolean columns vs the bitset FilterIndex.
+
+The "columns" variant reproduces the previous prepare_filter_options and
+filter_dataframe: one str.contains scan per field value, then .any(axis=1).
+
+    python benchmarks/bench_filtering.py --rows 100000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.filter_index import FilterIndex  # noqa: E402
+from euraxess.processing import process_frame  # noqa: E402
+from euraxess.taxonomy import LABEL_SEPARATOR  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+SELECTIONS = [
+    {"country": ["Germany"]},
+    {"country": ["Germany", "France"], "profile": ["R1"]},
+    {"field": ["Biological sciences"], "sub_field": ["Biology"]},
+    {"country": ["Spain"], "profile": ["R2", "R3"], "field": ["Engineering", "Physics"], "sub_field": ["Optics"]},
+]
+
+
+def _field_values(series: pd.Series):
+    return sorted({value for values in series.dropna() for value in values.split(LABEL_SEPARATOR) if value})
+
+
+def columns_prepare(df: pd.DataFrame) -> pd.DataFrame:
+    columns = {}
+    for field in _field_values(df["field_1"]):
+        columns[field] = df["field_1"].str.contains(field, case=False, na=False)
+    for field in _field_values(df["field_2"]):
+        columns[field] = df["field_2"].str.contains(field, case=False, na=False)
+    return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+
+def columns_filter(df: pd.DataFrame, selection: dict) -> pd.DataFrame:
+    df_filtered = df.copy()
+    if selection.get("country"):
+        df_filtered = df_filtered[df_filtered["country"].isin(selection["country"])]
+    for dimension in ("profile", "field", "sub_field"):
+        if selection.get(dimension):
+            df_filtered = df_filtered[df_filtered[selection[dimension]].any(axis=1)]
+    return df_filtered
+
+
+def _timed(fn, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    df = process_frame(pd.DataFrame(generate_jobs(args.rows)))
+    print(f"{len(df):,} rows")
+
+    seconds, wide = _timed(lambda: columns_prepare(df), repeat=1)
+    print(f"columns prepare : {seconds:.3f}s ({wide.shape[1] - df.shape[1]} boolean columns)")
+    seconds, index = _timed(lambda: FilterIndex.build(df))
+    print(f"index build     : {seconds:.3f}s ({sum(len(values) for values in index.bitsets.values())} bitsets)")
+
+    for selection in SELECTIONS:
+        columns_seconds, by_columns = _timed(lambda: columns_filter(wide, selection))
+        index_seconds, by_index = _timed(lambda: df.iloc[index.positions(selection)])
+        print(
+            f"{selection}\n"
+            f"    columns {columns_seconds * 1000:7.2f} ms, {len(by_columns):6,} rows | "
+            f"index {index_seconds * 1000:7.2f} ms, {len(by_index):6,} rows"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Startup and lookup cost of the job id index as the history grows.
+
+    python benchmarks/bench_idindex.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from euraxess.idindex import JobIdIndex  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    arg_parser.add_argument("--lookups", type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = f"{tmp}/ids.sqlite"
+            index = JobIdIndex(path).open()
+            index.add_many(range(size))
+            index.close()
+
+            start = time.perf_counter()
+            index = JobIdIndex(path).open()
+            opened = time.perf_counter() - start
+
+            probes = [random.randrange(size * 2) for _ in range(args.lookups)]
+            start = time.perf_counter()
+            hits = sum(probe in index for probe in probes)
+            lookup = (time.perf_counter() - start) / args.lookups
+            index.close()
+        print(f"{size:>9,} ids: open {opened * 1000:6.2f} ms, lookup {lookup * 1e6:5.1f} us ({hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Memory of the dashboard's frame, per column and in bytes per row.
+
+Loads --rows processed jobs with the listing columns the app uses and
+reports the deep memory usage of three layouts: every text column as Python
+object strings (what pandas 2 returns by default), the frame as loaded, and
+the compact frame the app holds (``processing.compact_frame``). Also checks
+that the filter index answers the same on the compact frame.
+
+    python benchmarks/bench_memory.py --rows 100000
+"""
+
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.filter_index import FilterIndex  # noqa: E402
+from euraxess.processing import ProcessedDataset, compact_frame, process_frame, processed_schema  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+# The columns app.py loads
+LISTING_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
+SELECTIONS = [{"country": ["Germany"]}, {"profile": ["R1", "R4"]}, {"field": ["Biological sciences"], "profile": ["R2"]}]
+
+
+def as_objects(df: pd.DataFrame) -> pd.DataFrame:
+    text = df.select_dtypes(include=["string", "object"]).columns
+    return df.astype({column: object for column in text})
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    jobs = pd.DataFrame(generate_jobs(args.rows))[FIELDNAMES]
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(tmp)
+        dataset.reset()
+        for start in range(0, args.rows, 50_000):
+            dataset.append(process_frame(jobs.iloc[start : start + 50_000]))
+        loaded = dataset.load(LISTING_COLUMNS)
+        taxonomy = dataset.read_taxonomy()
+        descriptions = dataset.load(["id", "description"])["description"]
+
+    layouts = {"objects": as_objects(loaded), "loaded": loaded, "compact": compact_frame(loaded)}
+    usage = pd.DataFrame({name: df.memory_usage(deep=True, index=False) for name, df in layouts.items()}) / len(loaded)
+    print(f"{len(loaded):,} rows, bytes per row by column")
+    print(usage.fillna(0).round(1).to_string())
+    print("total     " + "  ".join(f"{name} {usage[name].sum():7.1f}" for name in layouts))
+    print(f"description, left out until shown: {descriptions.memory_usage(deep=True, index=False) / len(loaded):.1f} bytes/row")
+
+    before, after = FilterIndex.build(loaded, taxonomy), FilterIndex.build(layouts["compact"], taxonomy)
+    same = all(np.array_equal(before.positions(selection), after.positions(selection)) for selection in SELECTIONS)
+    print(f"same filter results on the compact frame: {same}")
+
+
+if __name__ == "__main__":
+    main()
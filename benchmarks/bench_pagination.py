@@ -0,0 +1,78 @@
+"""Rerun cost of the results table: whole result vs one page.
+
+For selections of growing size, times what a rerun spends turning the
+result into the table: materializing the rows and serializing them to Arrow
+IPC, which is what ``st.dataframe`` sends to the browser. Before, the whole
+result was sent; now only the page being shown, sorted through the cached
+query layer.
+
+    python benchmarks/bench_pagination.py --rows 100000 --page-size 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.filter_index import FilterIndex  # noqa: E402
+from euraxess.processing import compact_frame, process_frame  # noqa: E402
+from euraxess.query import QueryEngine  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+SHOW_COLUMNS = ["country", "university", "title", "link", "application_deadline", "posted_on", "department", "location", "funding_program", "type", "profile", "field_1"]
+
+
+def serialized_bytes(df: pd.DataFrame) -> int:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().size
+
+
+def _timed(fn, repeat: int = 5):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--page-size", type=int, default=50)
+    args = arg_parser.parse_args()
+
+    df = compact_frame(process_frame(pd.DataFrame(generate_jobs(args.rows))[FIELDNAMES]))
+    engine = QueryEngine(df, FilterIndex.build(df), version=1)
+    countries = df["country"].value_counts().index.tolist()
+    selections = [{"country": countries[:1]}, {"country": countries[: len(countries) // 2]}, {}]
+
+    print(f"{args.rows:,} rows, page of {args.page_size}")
+    for selection in selections:
+        positions = engine.select(selection)
+        whole, size = _timed(lambda: serialized_bytes(df.iloc[positions][SHOW_COLUMNS]))
+        # The first call sorts and caches, reruns are served from the cache
+        engine.sorted_positions(selection, sort_by="posted_on", descending=True)
+        paged, page_size = _timed(
+            lambda: serialized_bytes(
+                engine.page(engine.sorted_positions(selection, sort_by="posted_on", descending=True), 0, args.page_size, SHOW_COLUMNS)
+            )
+        )
+        print(
+            f"{len(positions):>8,} results: whole table {whole * 1000:8.2f} ms ({size / 1e6:6.2f} MB), "
+            f"sorted page {paged * 1000:6.2f} ms ({page_size / 1e3:5.1f} kB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
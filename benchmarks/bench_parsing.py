@@ -0,0 +1,149 @@
+"""Listing parser throughput on saved pages, against the previous per-field XPaths.
+
+Parses every ``*.html`` page of a fixture directory (the synthetic pages in
+benchmarks/fixtures by default, or a directory of archived Euraxess pages)
+with both parsers and reports pages and items per second. Pages that have an
+expected ``<name>.json`` next to them are checked against it, so a layout
+change that breaks extraction shows up as a failed check; pages the previous
+parser can read must also give the same jobs with both.
+
+    python benchmarks/bench_parsing.py --repeat 200
+    python benchmarks/bench_parsing.py --fixtures path/to/archive --repeat 1
+    python benchmarks/bench_parsing.py --write-fixtures
+"""
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from parsel import Selector
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.parsing import parse_cards, parse_html, total_pages  # noqa: E402
+from mock_server import render_listing_page  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+BASE_URL = "https://euraxess.ec.europa.eu/jobs/search"
+
+
+def legacy_parse(html: bytes, url: str):
+    """The spider's parse_jobs before euraxess.parsing, one XPath per field."""
+
+    def _clean_line_breaks(text: str) -> str:
+        return text.replace("\n", "").strip() if text else None
+
+    response = Selector(body=html, type="html")
+    final_number = response.xpath('//*[@id="oe-list-container"]/div[3]/div/nav/ul/li[5]/a/text()').get()
+    jobs = []
+    for job in response.xpath('//*[@id="oe-list-container"]/div[3]/div/ul/li'):
+        link = urljoin(url, job.xpath(".//h3/a/@href").get())
+        jobs.append(
+            {
+                "id": link.split("/")[-1],
+                "type": job.xpath(".//div/div[1]/ul/li[1]/span/text()").get(),
+                "country": job.xpath(".//div/div[1]/ul/li[2]/span/text()").get(),
+                "university": job.xpath(".//article/div/ul[1]/li[1]/a/text()").get(),
+                "posted_on": job.xpath(".//article/div/ul[1]/li[2]/text()").get().replace("Posted on ", ""),
+                "title": job.xpath(".//h3/a/span/text()").get(),
+                "link": link,
+                "description": job.xpath('.//div[@class="ecl-content-block__description"]/p/text()').get(),
+                "department": _clean_line_breaks(job.xpath('.//div[contains(@class,"id-Department")]//div[2]/text()').get()),
+                "location": _clean_line_breaks(job.xpath('.//div[contains(@class,"id-Work-Locations")]//div[2]/text()').get()),
+                "field": _clean_line_breaks(";".join(job.xpath('.//div[contains(@class,"id-Research-Field")]/div[2]//text()').getall())),
+                "profile": _clean_line_breaks(";".join(job.xpath('.//div[contains(@class,"id-Researcher-Profile")]//a/text()').getall())),
+                "funding_program": job.xpath('.//div[contains(@class,"id-Funding-Programme")]//a/text()').get(),
+                "application_deadline": job.xpath('.//div[contains(@class,"id-Application-Deadline")]//time/text()').get(),
+            }
+        )
+    return int(final_number.strip()) if final_number else 0, jobs
+
+
+def fast_parse(html: bytes, url: str):
+    root = parse_html(html)
+    return total_pages(root), list(parse_cards(root, url))
+
+
+def write_fixtures():
+    """Regenerate the synthetic fixture pages and their expected output."""
+    FIXTURES.mkdir(exist_ok=True)
+    jobs = generate_jobs(120, seed=7)
+    pages = {f"listing_page_{page}": render_listing_page(jobs, page) for page in (0, 5, 11)}
+
+    # Cards lacking nodes the parser must tolerate: no posting date, no
+    # department, no funding programme link, no profile
+    edge = render_listing_page(jobs, 3)
+    edge = edge.replace(f"<li class=\"ecl-content-block__primary-meta-item\">{jobs[30]['posted_on']}</li>", "", 1)
+    edge = edge.replace('<div class="ecl-description-list__item id-Department">', '<div class="ecl-description-list__item">', 1)
+    edge = edge.replace(f"<a>{jobs[32]['funding_program']}</a>", "", 1) if jobs[32]["funding_program"] else edge
+    edge = re.sub(r'<div class="ecl-description-list__item id-Researcher-Profile">.*?</div></div>', "", edge, count=1)
+    pages["listing_page_missing_nodes"] = edge
+
+    for name, html in pages.items():
+        (FIXTURES / f"{name}.html").write_text(html, encoding="utf-8")
+        pages_count, parsed = fast_parse(html.encode("utf-8"), BASE_URL)
+        expected = {"total_pages": pages_count, "jobs": parsed}
+        (FIXTURES / f"{name}.json").write_text(json.dumps(expected, indent=1, ensure_ascii=False) + "\n", encoding="utf-8")
+    print(f"Wrote {len(pages)} fixture pages to {FIXTURES}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--fixtures", type=Path, default=FIXTURES)
+    arg_parser.add_argument("--repeat", type=int, default=100, help="times every page is parsed")
+    arg_parser.add_argument("--write-fixtures", action="store_true")
+    args = arg_parser.parse_args()
+
+    if args.write_fixtures:
+        write_fixtures()
+        return
+
+    pages = {path: path.read_bytes() for path in sorted(args.fixtures.glob("*.html"))}
+    if not pages:
+        sys.exit(f"No *.html pages in {args.fixtures}")
+
+    failures = 0
+    for path, html in pages.items():
+        expected_path = path.with_suffix(".json")
+        if expected_path.exists():
+            expected = json.loads(expected_path.read_text(encoding="utf-8"))
+            pages_count, parsed = fast_parse(html, BASE_URL)
+            if {"total_pages": pages_count, "jobs": parsed} != expected:
+                failures += 1
+                print(f"CHECK FAILED {path.name}: parsed output differs from {expected_path.name}")
+        try:
+            legacy = legacy_parse(html, BASE_URL)
+        except AttributeError:
+            continue
+        if legacy != fast_parse(html, BASE_URL):
+            failures += 1
+            print(f"CHECK FAILED {path.name}: parsers disagree")
+
+    for name, parse in (("xpath per field", legacy_parse), ("single pass", fast_parse)):
+        items, errors = 0, 0
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            for html in pages.values():
+                try:
+                    items += len(parse(html, BASE_URL)[1])
+                except AttributeError:
+                    errors += 1
+        elapsed = time.perf_counter() - start
+        n_pages = args.repeat * len(pages)
+        print(
+            f"{name:16} {n_pages / elapsed:8.0f} pages/s {items / elapsed:9.0f} items/s"
+            + (f"  ({errors} pages raised on missing nodes)" if errors else "")
+        )
+
+    print(f"{len(pages)} pages checked, {failures} failed")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Replays dashboard reruns against the QueryEngine cache.
+
+Each rerun used to hash the whole frame to look up the cached filter result
+(st.cache_data hashes its arguments; ``hash_pandas_object`` stands in for that
+here) and then copy the matching rows. The engine looks up the normalized
+selection instead and hands back row positions.
+
+    python benchmarks/bench_query.py --rows 100000 --reruns 500
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.filter_index import FilterIndex  # noqa: E402
+from euraxess.processing import process_frame  # noqa: E402
+from euraxess.query import QueryEngine  # noqa: E402
+from euraxess.search import SearchIndex, job_text  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+SELECTIONS = [
+    ({}, None),
+    ({"country": ["Germany"]}, None),
+    ({"country": ["France", "Germany"], "profile": ["R1"]}, None),
+    ({"country": ["Germany", "France"], "profile": ["R1"]}, None),
+    ({"field": ["Biological sciences"], "sub_field": ["Biology"]}, None),
+    ({"profile": ["R2", "R3"]}, "machine learning"),
+    ({}, "quantum"),
+    ({"country": ["Spain"]}, "Marine  Ecology"),
+]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    arg_parser.add_argument("--reruns", type=int, default=500)
+    args = arg_parser.parse_args()
+
+    df = process_frame(pd.DataFrame(generate_jobs(args.rows)))
+    search_index = SearchIndex()
+    search_index.add_many(df["id"], (job_text(t, d) for t, d in zip(df["title"], df["description"])))
+    engine = QueryEngine(df, FilterIndex.build(df), search_index, version=1)
+
+    # Popular selections come up far more often, as in real sessions
+    rng = random.Random(0)
+    workload = rng.choices(SELECTIONS, weights=[1 / (rank + 1) for rank in range(len(SELECTIONS))], k=args.reruns)
+
+    start = time.perf_counter()
+    for _ in range(min(args.reruns, 20)):
+        pd.util.hash_pandas_object(df)
+    hashing = (time.perf_counter() - start) / min(args.reruns, 20)
+    print(f"{len(df):,} rows; hashing the frame costs {hashing * 1000:.1f} ms per rerun")
+
+    latencies = []
+    for selection, search_term in workload:
+        start = time.perf_counter()
+        engine.select(selection, search_term)
+        latencies.append(time.perf_counter() - start)
+
+    stats = engine.cache.stats()
+    latencies = pd.Series(latencies) * 1000
+    print(
+        f"{args.reruns} reruns: {stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%}); "
+        f"median {latencies.median():.3f} ms, p99 {latencies.quantile(0.99):.2f} ms, total {latencies.sum():.0f} ms "
+        f"vs {hashing * args.reruns * 1000:.0f} ms spent hashing before"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Fixed vs adaptive download rate against a mock server that throttles.
+
+The mock answers 429 with Retry-After beyond --max-inflight concurrent
+requests or --max-rate requests per second. A fixed aggressive rate loses
+pages once retries run out, a fixed conservative one is slow, and the AIMD
+controller should scrape every job with few 429s.
+
+    python benchmarks/bench_ratecontrol.py --jobs 2000 --max-inflight 4 --max-rate 20
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=400)
+    arg_parser.add_argument("--latency", type=float, default=0.05)
+    arg_parser.add_argument("--max-inflight", type=int, default=4)
+    arg_parser.add_argument("--max-rate", type=float, default=20.0)
+    arg_parser.add_argument("--concurrency", type=int, default=16, help="fixed aggressive concurrency, and the controller's ceiling")
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.jobs)
+    fan_out = {"EURAXESS_FAN_OUT": True, "EURAXESS_FAN_OUT_DELAY": 0}
+    runs = {
+        "fixed aggressive": {**fan_out, "EURAXESS_FAN_OUT_CONCURRENCY": args.concurrency},
+        "fixed conservative": {**fan_out, "EURAXESS_FAN_OUT_CONCURRENCY": 1},
+        "adaptive (AIMD)": {
+            **fan_out,
+            "EURAXESS_FAN_OUT_CONCURRENCY": 1,
+            "EURAXESS_RATE_CONTROL": True,
+            "EURAXESS_RATE_MIN_DELAY": 0,
+            "EURAXESS_RATE_DELAY_STEP": 0.1,
+            "EURAXESS_RATE_MAX_CONCURRENCY": args.concurrency,
+            # The mock's latency doubles as it fills up, back off before it is full
+            "EURAXESS_RATE_TARGET_LATENCY": args.latency * 1.75,
+        },
+    }
+    for name, overrides in runs.items():
+        server = MockEuraxessServer(
+            ("127.0.0.1", 0), jobs, latency=args.latency, max_inflight=args.max_inflight, max_rate=args.max_rate
+        )
+        server.start_in_thread()
+        result = crawl_in_subprocess(server.base_url, overrides)
+        server.shutdown()
+        statuses = ", ".join(f"{count} x {status}" for status, count in sorted(server.status_counts.items()))
+        print(f"{name:20} {result['seconds']:6.2f}s  {result['items']:5}/{args.jobs} jobs  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Full reload vs incremental append when the pipeline publishes a new part.
+
+Loads a processed dataset of --rows jobs into a LiveDataset, appends a part of
+--new jobs (some of them updates of loaded ones) and times how long the
+dashboard takes to catch up, against loading everything again.
+
+    python benchmarks/bench_reload.py --rows 200000 --new 2000
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.processing import ProcessedDataset, process_frame, processed_schema  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+LISTING_COLUMNS = [column for column in processed_schema().names if column != "description"]
+SELECTIONS = [{}, {"country": ["Germany"]}, {"field": ["Biological sciences"], "profile": ["R1"]}]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--new", type=int, default=2_000)
+    args = arg_parser.parse_args()
+
+    # Oldest first, as the pipeline would have appended them
+    jobs = pd.DataFrame(generate_jobs(args.rows + args.new))[FIELDNAMES].iloc[::-1]
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(tmp)
+        dataset.reset()
+        for start in range(0, args.rows, 50_000):
+            dataset.append(process_frame(jobs.iloc[start : min(start + 50_000, args.rows)]))
+
+        live = LiveDataset(dataset, columns=LISTING_COLUMNS)
+        start = time.perf_counter()
+        live.refresh()
+        print(f"initial load of {args.rows:,} jobs: {time.perf_counter() - start:.3f}s")
+
+        updates = jobs.iloc[args.rows - args.new // 4 : args.rows]
+        dataset.append(process_frame(pd.concat([jobs.iloc[args.rows :], updates])))
+
+        start = time.perf_counter()
+        engine = live.refresh()
+        incremental = time.perf_counter() - start
+        start = time.perf_counter()
+        reloaded = LiveDataset(dataset, columns=LISTING_COLUMNS).refresh()
+        full = time.perf_counter() - start
+        print(f"after a part of {args.new:,} new and {len(updates):,} updated jobs: append {incremental:.3f}s, full reload {full:.3f}s")
+
+        for selection in SELECTIONS:
+            same = set(engine.rows(engine.select(selection), ["id"])["id"]) == set(reloaded.rows(reloaded.select(selection), ["id"])["id"])
+            print(f"    {selection}: {'same rows' if same else 'ROWS DIFFER'}")
+
+
+if __name__ == "__main__":
+    main()
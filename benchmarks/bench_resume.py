@@ -0,0 +1,121 @@
+"""Kill a listing crawl halfway and resume it from its checkpoint.
+
+Each round starts a crawl with the pipeline writing to a temporary output
+directory, SIGKILLs it after --kill-after seconds (no close_spider, no final
+flush, like a preempted worker) and resumes with ``-a resume=1``. Afterwards
+the job store must hold every job exactly once.
+
+Before that, the pipeline is stopped between its first store flush and its
+first checkpoint (the window a timed kill rarely hits), and a resumed
+pipeline fed the same jobs must also store each of them once.
+
+    python benchmarks/bench_resume.py --jobs 1000 --latency 0.02 --kill-after 3 --rounds 2
+    python benchmarks/bench_resume.py --fan-out --storage parquet --latency 0.1 --kill-after 2 --rounds 3
+"""
+
+import argparse
+import logging
+import os
+import signal
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from scrapy.settings import Settings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from crawl_runner import crawl_in_subprocess, start_crawl_process  # noqa: E402
+from euraxess.pipelines import EuraxessPipeline  # noqa: E402
+from euraxess.storage import get_job_store  # noqa: E402
+from mock_server import MockEuraxessServer  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+class _Spider:
+    logger = logging.getLogger("bench_resume")
+
+    def __init__(self, settings: Settings, resume: bool):
+        self.settings = settings
+        self.resume = resume
+
+
+def kill_before_first_checkpoint(jobs, overrides) -> bool:
+    """Whether a crawl stopped after its first store flush but before its first checkpoint resumes without duplicates."""
+    settings = Settings()
+    settings.setmodule("euraxess.settings", priority="project")
+    settings.setdict(overrides, priority="cmdline")
+    pipeline, spider = EuraxessPipeline(), _Spider(settings, resume=False)
+    pipeline.open_spider(spider)
+    for job in jobs:
+        pipeline.process_item(dict(job), spider)
+    # The first half of a flush: rows on disk, ids and checkpoint never committed
+    pipeline.store.flush()
+    pipeline.store.close()
+    pipeline.index.conn.close()
+
+    resumed = EuraxessPipeline()
+    spider = _Spider(settings, resume=True)
+    resumed.open_spider(spider)
+    for job in jobs:
+        resumed.process_item(dict(job), spider)
+    resumed.close_spider(spider)
+    ids = get_job_store(settings).read(columns=["id"])["id"]
+    return len(ids) == len(jobs) and ids.is_unique
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=1000)
+    arg_parser.add_argument("--latency", type=float, default=0.02)
+    arg_parser.add_argument("--kill-after", type=float, default=3.0)
+    arg_parser.add_argument("--rounds", type=int, default=2, help="how many times the crawl is killed before it may finish")
+    arg_parser.add_argument("--fan-out", action="store_true")
+    arg_parser.add_argument("--storage", choices=["csv", "parquet"], default="csv")
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.jobs)
+    server = MockEuraxessServer(("127.0.0.1", 0), jobs, latency=args.latency)
+    server.start_in_thread()
+    with tempfile.TemporaryDirectory() as tmp:
+        overrides = {
+            "ITEM_PIPELINES": {"euraxess.pipelines.EuraxessPipeline": 300},
+            "EURAXESS_STORAGE": args.storage,
+            "EURAXESS_JOBS_CSV": f"{tmp}/jobs.csv",
+            "EURAXESS_PARQUET_DIR": f"{tmp}/jobs_parquet",
+            "EURAXESS_PROCESSED_DIR": f"{tmp}/processed",
+            "EURAXESS_SEARCH_INDEX_PATH": f"{tmp}/search_index.pkl",
+            "EURAXESS_SNAPSHOT_DIR": f"{tmp}/snapshots",
+            "EURAXESS_ID_INDEX_PATH": f"{tmp}/jobs_ids.sqlite",
+            "EURAXESS_WATERMARK_PATH": f"{tmp}/watermark.json",
+            "EURAXESS_CHECKPOINT_PAGES": 5,
+            "EURAXESS_FAN_OUT": args.fan_out,
+            "EURAXESS_FAN_OUT_CONCURRENCY": 4,
+        }
+        with tempfile.TemporaryDirectory() as first:
+            paths = {key: value.replace(tmp, first) for key, value in overrides.items() if isinstance(value, str)}
+            same = kill_before_first_checkpoint(jobs[:50], {**overrides, **paths})
+            print(f"stopped before the first checkpoint and resumed, every job stored once: {same}")
+
+        store = get_job_store(Settings(overrides))
+        for round_number in range(args.rounds):
+            process = start_crawl_process(server.base_url, overrides, spider_args={"resume": round_number > 0})
+            time.sleep(args.kill_after)
+            os.kill(process.pid, signal.SIGKILL)
+            process.wait()
+            rows = len(store.read(columns=["id"])) if store.exists() else 0
+            print(f"killed crawl {round_number + 1} after {args.kill_after:.1f}s with {rows} rows on disk")
+
+        server.request_counts.clear()
+        result = crawl_in_subprocess(server.base_url, overrides, spider_args={"resume": True})
+        ids = store.read(columns=["id"])["id"]
+        print(f"resumed crawl: {result['seconds']:.2f}s, {server.request_counts.get('/jobs/search', 0)} listing pages fetched")
+        print(f"stored rows: {len(ids)}, unique: {ids.nunique()}, expected: {len(jobs)}")
+        print(f"no duplicates: {ids.is_unique}, no gaps: {set(ids) == {str(job['id']) for job in jobs}}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
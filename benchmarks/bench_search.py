@@ -0,0 +1,60 @@
+"""Keyword search: naive str.contains vs the BM25 inverted index.
+
+    python benchmarks/bench_search.py --rows 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.search import SearchIndex, job_text  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+QUERIES = ["quantum", "machine learning", "geno", "marine ecology climate", "postdoctoral neural imaging"]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=20_000)
+    args = arg_parser.parse_args()
+
+    df = pd.DataFrame(generate_jobs(args.rows))
+    text = (df["title"] + " " + df["description"]).str.lower()
+
+    start = time.perf_counter()
+    index = SearchIndex()
+    index.add_many(df["id"], (job_text(t, d) for t, d in zip(df["title"], df["description"])))
+    build = time.perf_counter() - start
+    postings = sum(len(docs) for docs, _ in index.postings.values())
+    print(f"{len(df):,} jobs, {postings:,} postings, {len(index.postings):,} terms, built in {build:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = f"{tmp}/search_index.pkl"
+        index.save(path)
+        start = time.perf_counter()
+        SearchIndex.load(path)
+        print(f"saved {os.path.getsize(path) / 1e6:.1f} MB, loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        mask = pd.Series(True, index=df.index)
+        for word in query.split():
+            mask &= text.str.contains(word, regex=False)
+        naive = time.perf_counter() - start
+
+        start = time.perf_counter()
+        job_ids, _ = index.search(query)
+        indexed = time.perf_counter() - start
+        print(f"{query!r:32} str.contains {naive * 1000:7.1f} ms ({int(mask.sum()):6,}) | index {indexed * 1000:6.2f} ms ({len(job_ids):6,})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Start-up time and memory of app replicas: loading the parts vs mapping a snapshot.
+
+Writes --rows synthetic jobs (all with open deadlines) to a processed dataset
+and publishes a snapshot of it, then starts --replicas processes at once per
+mode, each doing what an app process does on a cold start (refresh the live
+dataset, answer a few queries, touch every column). Once all of them are up,
+reads their memory from /proc: the private memory each one holds beyond its
+imports (a mapped file counts as private while only one process maps it),
+and the proportional set size (shared pages split between the processes that
+map them) summed over all of them. Also checks that both modes answer the
+same.
+
+    python benchmarks/bench_snapshot.py --rows 200000 --replicas 4
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.processing import ProcessedDataset, process_frame  # noqa: E402
+from euraxess.snapshot import SNAPSHOT_COLUMNS, SnapshotStore  # noqa: E402
+from euraxess.storage import FIELDNAMES  # noqa: E402
+from synthetic import iter_jobs  # noqa: E402
+
+SELECTIONS = [{}, {"country": ["Germany"]}, {"field": ["Biological sciences"], "profile": ["R1"]}, {"sub_field": ["Optics"]}]
+
+
+def _memory_mb(pid="self"):
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0].endswith(":") and len(parts) == 3:
+                fields[parts[0][:-1]] = int(parts[1]) / 1e3
+    return {"rss": fields["Rss"], "pss": fields["Pss"], "private": fields["Private_Clean"] + fields["Private_Dirty"]}
+
+
+def _live(mode: str, processed: str, snapshots: str) -> LiveDataset:
+    return LiveDataset(ProcessedDataset(processed), SNAPSHOT_COLUMNS, snapshots=SnapshotStore(snapshots) if mode == "snapshot" else None)
+
+
+def _answers(engine):
+    return [engine.page(engine.sorted_positions(selection, None, "posted_on", True), 0, 50, ["id"])["id"].tolist() for selection in SELECTIONS]
+
+
+def _touch(df: pd.DataFrame):
+    """Read a byte of every page of every column, as sessions sorting and paging through it would, without copying."""
+    import pyarrow as pa
+
+    for column in df.columns:
+        for chunk in pa.chunked_array(pa.array(df[column])).chunks:
+            for buffer in chunk.buffers():
+                if buffer is not None and buffer.size:
+                    np.frombuffer(buffer, dtype=np.uint8)[::4096].sum()
+
+
+def worker(mode: str, processed: str, snapshots: str):
+    """Start like an app process, report, and stay up until stdin closes."""
+    before = _memory_mb()
+    start = time.perf_counter()
+    engine = _live(mode, processed, snapshots).refresh()
+    answers = _answers(engine)
+    seconds = time.perf_counter() - start
+    _touch(engine.df)
+    print(json.dumps({"seconds": seconds, "private_before": before["private"], "answers": answers}), flush=True)
+    sys.stdin.read()
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--replicas", type=int, default=4)
+    arg_parser.add_argument("--worker", nargs=3, metavar=("MODE", "PROCESSED", "SNAPSHOTS"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.worker:
+        worker(*args.worker)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset = ProcessedDataset(f"{tmp}/processed")
+        dataset.reset()
+        jobs = iter_jobs(args.rows)
+        while chunk := list(islice(jobs, 50_000)):
+            chunk = pd.DataFrame(chunk)[FIELDNAMES].assign(application_deadline="31 Dec 2099 - 23:59 (Europe/Brussels)")
+            dataset.append(process_frame(chunk))
+        start = time.perf_counter()
+        name = SnapshotStore(f"{tmp}/snapshots").publish(dataset)
+        size = sum(path.stat().st_size for path in Path(f"{tmp}/snapshots/{name}").iterdir())
+        print(f"{args.rows:,} jobs; {name} published in {time.perf_counter() - start:.2f}s, {size / 1e6:.0f} MB; {args.replicas} replicas per mode")
+
+        answers = {}
+        for mode in ("parts", "snapshot"):
+            command = [sys.executable, __file__, "--worker", mode, dataset.root, f"{tmp}/snapshots"]
+            replicas = [subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True) for _ in range(args.replicas)]
+            try:
+                reports = [json.loads(replica.stdout.readline()) for replica in replicas]
+                memory = [_memory_mb(replica.pid) for replica in replicas]
+            finally:
+                for replica in replicas:
+                    replica.stdin.close()
+                    replica.wait()
+            answers[mode] = [report["answers"] for report in reports]
+            seconds = np.array([report["seconds"] for report in reports]) * 1000
+            private = np.array([used["private"] - report["private_before"] for used, report in zip(memory, reports)])
+            print(
+                f"{mode:<9}: start-up {seconds.mean():7.0f} ms (max {seconds.max():6.0f}), "
+                f"{private.mean():6.0f} MB private per replica beyond imports, PSS of all replicas {sum(used['pss'] for used in memory):6.0f} MB"
+            )
+
+        same = all(answer == answers["parts"][0] for mode_answers in answers.values() for answer in mode_answers)
+        print(f"same answers from parts and snapshot: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""File size and load time of the CSV store vs the Parquet store.
+
+    python benchmarks/bench_storage.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.storage import FIELDNAMES, CsvJobStore, ParquetJobStore  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+LISTING_COLUMNS = [column for column in FIELDNAMES if column != "description"]
+
+
+def _size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file())
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=100_000)
+    args = arg_parser.parse_args()
+
+    jobs = generate_jobs(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = f"{tmp}/jobs.csv"
+        pd.DataFrame(jobs, columns=FIELDNAMES).to_csv(csv_path, index=False)
+        csv_store = CsvJobStore(csv_path)
+
+        parquet_store = ParquetJobStore(f"{tmp}/jobs_parquet", batch_size=50_000)
+        parquet_store.open()
+        for job in jobs:
+            parquet_store.write(job)
+        parquet_store.close()
+
+        print(f"{args.rows:,} rows")
+        print(f"csv     size: {_size(csv_path) / 1e6:8.1f} MB")
+        print(f"parquet size: {_size(parquet_store.root) / 1e6:8.1f} MB")
+        print(f"csv     load, all columns      : {_timed(lambda: csv_store.read()):.3f}s")
+        print(f"csv     load, no description   : {_timed(lambda: csv_store.read(LISTING_COLUMNS)):.3f}s")
+        print(f"parquet load, all columns      : {_timed(lambda: parquet_store.read()):.3f}s")
+        print(f"parquet load, no description   : {_timed(lambda: parquet_store.read(LISTING_COLUMNS)):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
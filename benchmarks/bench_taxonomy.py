@@ -0,0 +1,119 @@
+"""Per-row research-field parsing vs the batch taxonomy.
+
+The "per-row" variant is the previous ``extract_relevant_items`` applied to
+every row, with the filter bitsets built by splitting its comma-joined
+output. The taxonomy parses each distinct ``field`` string once, serially
+and in a process pool, and builds the bitsets from the term ids. Checks that
+both find the same fields and sub-fields per row, and shows what the comma
+join did to a name containing a comma.
+
+    python benchmarks/bench_taxonomy.py --rows 200000 --processes 4
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.filter_index import _bitsets_from_rows, _field_bitsets  # noqa: E402
+from euraxess.taxonomy import LABEL_SEPARATOR, Taxonomy  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+COMMA_FIELD = "Arts, humanities; » ;History, ancient;Physics"
+
+
+def extract_relevant_items(s):
+    """The previous parser, kept as the baseline."""
+    try:
+        items = [item.strip() for item in s.split(";")]
+    except Exception:
+        return None, None
+
+    class_1 = []
+    class_2 = []
+    for i in range(len(items)):
+        curr = items[i]
+        prev = items[i - 1] if i > 0 else ""
+        next_item = items[i + 1] if i < len(items) - 1 else ""
+
+        if next_item == "»":
+            class_1.append(curr)
+        elif prev == "»":
+            class_2.append(curr)
+        elif prev != "»" and next_item != "»" and curr != "»":
+            class_1.append(curr)
+
+    return ",".join(set(class_1)), ",".join(set(class_2))
+
+
+def per_row(fields: pd.Series):
+    results = fields.apply(extract_relevant_items)
+    field_1 = pd.Series([field_1 for field_1, _ in results])
+    field_2 = pd.Series([field_2 for _, field_2 in results])
+    bitsets = []
+    for column in (field_1, field_2):
+        exploded = column.fillna("").str.split(",").explode()
+        exploded = exploded[exploded != ""]
+        bitsets.append(_bitsets_from_rows(exploded.index.to_numpy(), exploded.to_numpy(), len(fields)))
+    return field_1, field_2, bitsets
+
+
+def batch(fields: pd.Series, processes: int):
+    taxonomy = Taxonomy()
+    field_terms = taxonomy.map_fields(fields, processes)
+    field_1, field_2 = field_terms.labels()
+    rows, terms = field_terms.pairs()
+    return field_1, field_2, _field_bitsets(rows, terms, taxonomy, len(fields)), taxonomy
+
+
+def _term_sets(column, separator: str):
+    return [frozenset(value.split(separator)) - {""} if isinstance(value, str) else frozenset() for value in column]
+
+
+def _timed(fn, repeat: int = 3):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=200_000)
+    arg_parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = arg_parser.parse_args()
+
+    fields = pd.Series([job["field"] for job in generate_jobs(args.rows)])
+    print(f"{len(fields):,} field texts, {fields.nunique():,} distinct, {os.cpu_count()} CPUs")
+
+    seconds, (old_1, old_2, old_bitsets) = _timed(lambda: per_row(fields), repeat=1)
+    print(f"per-row parse + comma split     : {seconds:.3f}s")
+    seconds, (new_1, new_2, new_bitsets, taxonomy) = _timed(lambda: batch(fields, 1))
+    print(f"taxonomy, serial                : {seconds:.3f}s ({len(taxonomy)} terms)")
+    seconds, _ = _timed(lambda: batch(fields, args.processes))
+    print(f"{f'taxonomy, {args.processes} processes':<32}: {seconds:.3f}s")
+
+    same_labels = _term_sets(old_1, ",") == _term_sets(new_1, LABEL_SEPARATOR) and _term_sets(old_2, ",") == _term_sets(new_2, LABEL_SEPARATOR)
+    same_bitsets = all(
+        old.keys() == new.keys() and all(np.array_equal(old[value], new[value]) for value in old) for old, new in zip(old_bitsets, new_bitsets)
+    )
+    print(f"same fields and sub-fields per row: {same_labels}, same filter bitsets: {same_bitsets}")
+
+    old_1, old_2 = extract_relevant_items(COMMA_FIELD)
+    new_1, new_2 = Taxonomy().map_fields(pd.Series([COMMA_FIELD])).labels()
+    before = sorted(old_1.split(",") + old_2.split(","))
+    now = sorted(new_1[0].split(LABEL_SEPARATOR) + new_2[0].split(LABEL_SEPARATOR))
+    print(f"filter values of {COMMA_FIELD!r}: {before} before, {now} now")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Write throughput, crash integrity and compaction of the job stores.
+
+Writes the same synthetic jobs to each backend at several batch sizes, then
+kills a writer process mid-stream and checks that the store still reads
+back as whole batches, and finally compacts a store holding every job twice.
+
+    python benchmarks/bench_writes.py --rows 50000 --batch-sizes 100 1000 10000
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from euraxess.storage import CsvJobStore, ParquetJobStore  # noqa: E402
+from synthetic import generate_jobs  # noqa: E402
+
+
+def make_store(backend: str, root: str, batch_size: int):
+    if backend == "csv":
+        return CsvJobStore(os.path.join(root, "jobs.csv"), batch_size=batch_size)
+    return ParquetJobStore(os.path.join(root, "jobs_parquet"), batch_size=batch_size)
+
+
+def write_all(store, jobs):
+    store.open()
+    for job in jobs:
+        store.write(job)
+    store.close()
+
+
+def throughput(backend: str, jobs, batch_size: int) -> float:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(backend, tmp, batch_size)
+        start = time.perf_counter()
+        write_all(store, jobs)
+        elapsed = time.perf_counter() - start
+        assert len(store.read(["id"])) == len(jobs)
+    return len(jobs) / elapsed
+
+
+def crash_integrity(backend: str, rows: int, batch_size: int, kill_after: float) -> dict:
+    """SIGKILL a writer after ``kill_after`` seconds and read back what it left."""
+    with tempfile.TemporaryDirectory() as tmp:
+        child = subprocess.Popen([sys.executable, __file__, "--child", json.dumps([backend, tmp, rows, batch_size])])
+        time.sleep(kill_after)
+        child.send_signal(signal.SIGKILL)
+        child.wait()
+
+        store = make_store(backend, tmp, batch_size)
+        rows_read = len(store.read(["id"])) if store.exists() else 0
+        ids = list(store.iter_ids())
+        return {
+            "rows": rows_read,
+            "whole_batches": rows_read % batch_size == 0,
+            "ids_match": len(ids) == rows_read and all(ids),
+        }
+
+
+def compaction(backend: str, jobs, batch_size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        store = make_store(backend, tmp, batch_size)
+        write_all(store, jobs)
+        write_all(store, jobs)
+        files = len(store.segments())
+        start = time.perf_counter()
+        dropped = store.compact()
+        elapsed = time.perf_counter() - start
+        ids = store.read(["id"])["id"]
+        return {
+            "files": files,
+            "files_after": len(store.segments()),
+            "dropped": dropped,
+            "seconds": elapsed,
+            "unique": ids.is_unique and len(ids) == len(jobs),
+        }
+
+
+def child(spec: str):
+    backend, root, rows, batch_size = json.loads(spec)
+    # Keeps writing until killed
+    jobs = generate_jobs(rows)
+    store = make_store(backend, root, batch_size)
+    while True:
+        write_all(store, jobs)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=int, default=50_000)
+    arg_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[100, 1000, 10_000])
+    arg_parser.add_argument("--kill-after", type=float, default=3.0, help="seconds before the writer is killed")
+    arg_parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.child:
+        child(args.child)
+        return
+
+    jobs = generate_jobs(args.rows)
+    print(f"{args.rows:,} rows")
+    for backend in ("csv", "parquet"):
+        for batch_size in args.batch_sizes:
+            print(f"{backend:7} write, batch {batch_size:>6}: {throughput(backend, jobs, batch_size):>10,.0f} items/s")
+    for backend in ("csv", "parquet"):
+        result = crash_integrity(backend, args.rows, args.batch_sizes[0], args.kill_after)
+        print(
+            f"{backend:7} killed writer: {result['rows']:,} rows read back, "
+            f"whole batches: {result['whole_batches']}, ids intact: {result['ids_match']}"
+        )
+    for backend in ("csv", "parquet"):
+        result = compaction(backend, jobs, args.batch_sizes[-1])
+        print(
+            f"{backend:7} compact {result['files']} segments -> {result['files_after']}: "
+            f"{result['dropped']:,} duplicates dropped in {result['seconds']:.2f}s, unique ids: {result['unique']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Run one spider crawl in a child process and report what it scraped.
+
+The Twisted reactor cannot be restarted, so every benchmark crawl gets its own
+interpreter. The child prints a JSON summary as its last line.
+"""
+
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+SPIDER = "euraxess.spiders.euraxess.EuraxessScraper"
+
+# Benchmarks measure scheduling rather than politeness sleeps, and keep the
+# output directory untouched unless a run asks for a pipeline.
+DEFAULT_OVERRIDES = {
+    "ITEM_PIPELINES": {},
+    "LOG_LEVEL": "WARNING",
+    "DOWNLOAD_DELAY": 0,
+    "EURAXESS_FAN_OUT_DELAY": 0,
+    "EURAXESS_TELEMETRY": False,
+    "EURAXESS_RATE_CONTROL": False,
+}
+
+# State the spiders and pipelines keep between crawls, relative to a throwaway
+# directory per crawl unless a run passes its own paths: a benchmark crawl
+# must never move the watermark or the index of the real output directory.
+STATE_PATHS = {
+    "EURAXESS_JOBS_CSV": "jobs.csv",
+    "EURAXESS_PARQUET_DIR": "jobs_parquet",
+    "EURAXESS_PROCESSED_DIR": "processed",
+    "EURAXESS_SEARCH_INDEX_PATH": "search_index.pkl",
+    "EURAXESS_SNAPSHOT_DIR": "snapshots",
+    "EURAXESS_ID_INDEX_PATH": "jobs_ids.sqlite",
+    "EURAXESS_WATERMARK_PATH": "watermark.json",
+    "EURAXESS_DETAILS_PATH": "job_details.sqlite",
+    "EURAXESS_TELEMETRY_DIR": "telemetry",
+}
+
+
+def run_crawl(base_url: str, overrides: Dict, spider: str = SPIDER, spider_args: Optional[Dict] = None) -> Dict:
+    """Run one crawl in this process and return timing and scraped ids."""
+    sys.path.insert(0, str(ROOT))
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.settings import Settings
+    from scrapy.utils.misc import load_object
+
+    ids = []
+    responses = []
+
+    def on_item(item, **kwargs):
+        ids.append(item["id"])
+
+    def on_response(response, **kwargs):
+        responses.append(response.status)
+
+    with tempfile.TemporaryDirectory(prefix="euraxess-bench-") as state:
+        settings = Settings()
+        settings.setmodule("euraxess.settings", priority="project")
+        state_paths = {key: f"{state}/{name}" for key, name in STATE_PATHS.items()}
+        settings.setdict({**DEFAULT_OVERRIDES, **state_paths, **overrides}, priority="cmdline")
+
+        process = CrawlerProcess(settings)
+        crawler = process.create_crawler(load_object(spider))
+        crawler.signals.connect(on_item, signal=signals.item_scraped)
+        crawler.signals.connect(on_response, signal=signals.response_received)
+
+        start = time.perf_counter()
+        process.crawl(crawler, base_url=base_url, **(spider_args or {}))
+        process.start()
+        elapsed = time.perf_counter() - start
+    return {
+        "seconds": elapsed,
+        "items": len(ids),
+        "responses": len(responses),
+        "finish_reason": crawler.stats.get_value("finish_reason"),
+        "ids": sorted(ids),
+    }
+
+
+def _command(base_url: str, overrides: Optional[Dict], spider: str, spider_args: Optional[Dict]) -> List[str]:
+    return [sys.executable, __file__, base_url, json.dumps(overrides or {}), spider, json.dumps(spider_args or {})]
+
+
+def crawl_in_subprocess(base_url: str, overrides: Optional[Dict] = None, spider: str = SPIDER, spider_args: Optional[Dict] = None) -> Dict:
+    output = subprocess.run(
+        _command(base_url, overrides, spider, spider_args),
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def start_crawl_process(base_url: str, overrides: Optional[Dict] = None, spider: str = SPIDER, spider_args: Optional[Dict] = None) -> subprocess.Popen:
+    """Start a crawl without waiting for it, e.g. to kill it halfway."""
+    return subprocess.Popen(
+        _command(base_url, overrides, spider, spider_args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT
+    )
+
+
+if __name__ == "__main__":
+    print(json.dumps(run_crawl(sys.argv[1], json.loads(sys.argv[2]), sys.argv[3], json.loads(sys.argv[4]))))
@@ -0,0 +1,296 @@
+"""Local mock of the Euraxess job search listing and job pages.
+
+Serves ``/jobs/search?page=N`` with the same markup the spider's XPaths expect,
+and ``/jobs/<id>`` detail pages with ETag and Last-Modified validators that
+answer conditional requests with 304, so crawls can be benchmarked without
+network access. With ``--max-inflight`` / ``--max-rate`` it throttles on
+purpose: requests beyond either limit get 429 with a Retry-After header, and
+latency grows with the number of requests in flight.
+
+    python benchmarks/mock_server.py --jobs 500 --latency 0.2 --port 8765
+"""
+
+import argparse
+import hashlib
+import html
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import generate_jobs  # noqa: E402
+
+PAGE_SIZE = 10
+
+
+def _render_card(job: Dict) -> str:
+    field_html = "".join(
+        f"<a>{html.escape(part)}</a>" if part.strip() != "»" else part for part in (job["field"] or "").split(";")
+    )
+    profile_html = "".join(f"<a>{html.escape(p)}</a>" for p in (job["profile"] or "").split(";") if p)
+    funding_html = f"<a>{html.escape(job['funding_program'])}</a>" if job["funding_program"] else ""
+    href = f"/jobs/{job['id']}"
+    return f"""
+<li class="ecl-content-item-block__item">
+  <article class="ecl-content-item">
+    <div class="ecl-content-block">
+      <div class="ecl-content-block__label-container">
+        <ul class="ecl-label-list"><li><span>{html.escape(job['type'])}</span></li><li><span>{html.escape(job['country'])}</span></li></ul>
+      </div>
+      <ul class="ecl-content-block__primary-meta-container">
+        <li class="ecl-content-block__primary-meta-item"><a href="/partnering/organisations">{html.escape(job['university'])}</a></li>
+        <li class="ecl-content-block__primary-meta-item">{html.escape(job['posted_on'])}</li>
+      </ul>
+      <div class="ecl-content-block__title"><h3><a href="{href}"><span>{html.escape(job['title'])}</span></a></h3></div>
+      <div class="ecl-content-block__description"><p>{html.escape(job['description'])}</p></div>
+      <div class="ecl-content-block__secondary-meta-container">
+        <div class="ecl-description-list__item id-Department"><div>Department</div><div>
+{html.escape(job['department'])}
+</div></div>
+        <div class="ecl-description-list__item id-Work-Locations"><div>Work Locations</div><div>
+{html.escape(job['location'])}
+</div></div>
+        <div class="ecl-description-list__item id-Research-Field"><div>Research Field</div><div>{field_html}</div></div>
+        <div class="ecl-description-list__item id-Researcher-Profile"><div>Researcher Profile</div><div>{profile_html}</div></div>
+        <div class="ecl-description-list__item id-Funding-Programme"><div>Funding Programme</div><div>{funding_html}</div></div>
+        <div class="ecl-description-list__item id-Application-Deadline"><div>Application Deadline</div><div><time>{html.escape(job['application_deadline'])}</time></div></div>
+      </div>
+    </div>
+  </article>
+</li>"""
+
+
+def render_listing_page(jobs: List[Dict], page: int, page_size: int = PAGE_SIZE) -> str:
+    """Render one listing page; the last pager label is the number of pages."""
+    total_pages = max(1, (len(jobs) + page_size - 1) // page_size)
+    cards = "".join(_render_card(job) for job in jobs[page * page_size : (page + 1) * page_size])
+    return f"""<!DOCTYPE html>
+<html><body>
+<div id="oe-list-container">
+  <div class="ecl-u-mb-l">Search results</div>
+  <div class="ecl-u-mb-m">{len(jobs)} offers</div>
+  <div>
+    <div>
+      <ul class="ecl-content-item-block">{cards}</ul>
+      <nav class="ecl-pagination"><ul>
+        <li><a href="?page=0">1</a></li>
+        <li><a href="?page=1">2</a></li>
+        <li><a href="?page=2">3</a></li>
+        <li><span>…</span></li>
+        <li><a href="?page={total_pages - 1}">{total_pages}</a></li>
+        <li><a href="?page={min(page + 1, total_pages - 1)}">Next</a></li>
+      </ul></nav>
+    </div>
+  </div>
+</div>
+</body></html>"""
+
+
+def render_detail_page(job: Dict, revision: int = 0) -> str:
+    """Render a job page; ``revision`` stands for edits made to the posting."""
+    slug = "".join(c for c in job["university"].lower() if c.isalnum())
+    edited = f"<p>Updated posting, revision {revision}.</p>" if revision else ""
+    return f"""<!DOCTYPE html>
+<html><body><main>
+<h1>{html.escape(job['title'])}</h1>
+<article>
+  <h2>Offer Description</h2>
+  <div><p>{html.escape(job['description'])}</p><p>{html.escape(job['description'])}</p>{edited}</div>
+  <h2>Requirements</h2>
+  <div><dl><dt>Research Field</dt><dd>{html.escape(job['field'] or '')}</dd>
+  <dt>Education Level</dt><dd>PhD or equivalent</dd><dt>Languages</dt><dd>ENGLISH - Excellent</dd></dl></div>
+  <h2>Additional Information</h2>
+  <div><p>{html.escape(job['funding_program'] or 'Institutional funding')}, {html.escape(job['type'])}.</p></div>
+  <h2>Where to apply</h2>
+  <div><dl><dt>E-mail</dt><dd><a href="mailto:jobs@{slug}.example">jobs@{slug}.example</a></dd></dl></div>
+  <h2>Contact</h2>
+  <div><dl><dt>City</dt><dd>{html.escape(job['location'])}</dd><dt>E-Mail</dt>
+  <dd><a href="mailto:hr@{slug}.example">hr@{slug}.example</a></dd></dl></div>
+</article>
+</main></body></html>"""
+
+
+class MockEuraxessHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "MockEuraxessServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.count_request(url.path)
+        if not self.server.admit():
+            self._send(429, "<html><body>Too many requests</body></html>", {"Retry-After": str(self.server.retry_after)})
+            return
+        try:
+            self._serve(url)
+        finally:
+            self.server.release()
+
+    def _serve(self, url):
+        latency = self.server.latency
+        if self.server.max_inflight:
+            # A loaded server answers more slowly
+            latency *= max(1.0, self.server.inflight / self.server.max_inflight * 2)
+        if latency:
+            time.sleep(latency)
+
+        if url.path == "/jobs/search":
+            page = int(parse_qs(url.query).get("page", ["0"])[0])
+            self._send(200, render_listing_page(self.server.jobs, page, self.server.page_size))
+        elif url.path.startswith("/jobs/") and url.path[len("/jobs/") :] in self.server.jobs_by_id:
+            self._send_detail(url.path[len("/jobs/") :])
+        else:
+            self._send(404, "<html><body>Not found</body></html>")
+
+    def _send_detail(self, job_id: str):
+        body = render_detail_page(self.server.jobs_by_id[job_id], self.server.revisions.get(job_id, 0))
+        if not self.server.validators:
+            self._send(200, body)
+            return
+
+        etag = f'"{hashlib.sha1(body.encode("utf-8")).hexdigest()[:16]}"'
+        modified = int(self.server.modified.get(job_id, self.server.published))
+        headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+        if_none_match = self.headers.get("If-None-Match")
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            not_modified = etag in [tag.strip() for tag in if_none_match.split(",")]
+        elif if_modified_since is not None:
+            not_modified = parsedate_to_datetime(if_modified_since).timestamp() >= modified
+        else:
+            not_modified = False
+        if not_modified:
+            self._send(304, "", headers)
+        else:
+            self._send(200, body, headers)
+
+    def _send(self, status: int, body: str, headers: Optional[Dict[str, str]] = None):
+        payload = body.encode("utf-8")
+        self.server.count_status(status)
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockEuraxessServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        jobs: List[Dict],
+        latency: float = 0.0,
+        page_size: int = PAGE_SIZE,
+        validators: bool = True,
+        max_inflight: int = 0,
+        max_rate: float = 0.0,
+        retry_after: int = 1,
+    ):
+        super().__init__(address, MockEuraxessHandler)
+        self.jobs = jobs
+        self.jobs_by_id = {str(job["id"]): job for job in jobs}
+        self.latency = latency
+        self.page_size = page_size
+        # Whether detail pages carry ETag/Last-Modified and honour conditional requests
+        self.validators = validators
+        self.published = time.time() - 86400
+        self.revisions: Dict[str, int] = {}
+        self.modified: Dict[str, float] = {}
+        self.request_counts: Dict[str, int] = {}
+        self.status_counts: Dict[int, int] = {}
+        # Throttling: at most max_inflight concurrent requests and max_rate
+        # requests per second (a token bucket holding one second of burst)
+        self.max_inflight = max_inflight
+        self.max_rate = max_rate
+        self.retry_after = retry_after
+        self.inflight = 0
+        self.tokens = max_rate
+        self.refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_request(self, path: str):
+        with self._lock:
+            self.request_counts[path] = self.request_counts.get(path, 0) + 1
+
+    def count_status(self, status: int):
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+
+    def handle_error(self, request, client_address):
+        # Clients that are killed mid-request (bench_resume.py) are expected
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def admit(self) -> bool:
+        with self._lock:
+            if self.max_rate:
+                now = time.monotonic()
+                self.tokens = min(self.max_rate, self.tokens + (now - self.refilled_at) * self.max_rate)
+                self.refilled_at = now
+                if self.tokens < 1:
+                    return False
+            if self.max_inflight and self.inflight >= self.max_inflight:
+                return False
+            if self.max_rate:
+                self.tokens -= 1
+            self.inflight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+
+    def update_job(self, job_id: str):
+        """Edit a posting, so its detail page changes."""
+        with self._lock:
+            self.revisions[job_id] = self.revisions.get(job_id, 0) + 1
+            self.modified[job_id] = time.time()
+
+    def start_in_thread(self) -> threading.Thread:
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--jobs", type=int, default=500)
+    arg_parser.add_argument("--latency", type=float, default=0.0, help="seconds of simulated server latency per request")
+    arg_parser.add_argument("--no-validators", action="store_true", help="serve detail pages without ETag/Last-Modified")
+    arg_parser.add_argument("--max-inflight", type=int, default=0, help="answer 429 beyond this many concurrent requests")
+    arg_parser.add_argument("--max-rate", type=float, default=0.0, help="answer 429 beyond this many requests per second")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    args = arg_parser.parse_args()
+
+    server = MockEuraxessServer(
+        (args.host, args.port),
+        generate_jobs(args.jobs),
+        latency=args.latency,
+        validators=not args.no_validators,
+        max_inflight=args.max_inflight,
+        max_rate=args.max_rate,
+    )
+    print(f"Serving {args.jobs} jobs on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""End-to-end offline benchmark suite.
+
+For every dataset size it generates (once, cached under benchmarks/data) a
+synthetic ``jobs.csv`` and times each stage between the spider and the
+dashboard:
+
+    parse_listing            listing parser on the fixture pages (once)
+    process_item             EuraxessPipeline, every job through process_item
+    processing_rebuild       derived columns for the whole job store
+    load_and_process_data    the app's first load (LiveDataset.refresh)
+    prepare_filter_options   filter index build and option lists
+    filter_dataframe         uncached selections against the query engine
+    search                   keyword queries against the search index
+
+Results are written as JSON; with --baseline, stages that got slower than the
+baseline by more than --tolerance are reported and the exit code is 1.
+
+    python benchmarks/suite.py --sizes 10k 100k
+    python benchmarks/suite.py --sizes 10k --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd  # noqa: E402
+from scrapy.settings import Settings  # noqa: E402
+
+from euraxess.filter_index import FilterIndex  # noqa: E402
+from euraxess.live import LiveDataset  # noqa: E402
+from euraxess.parsing import parse_cards, parse_html, total_pages  # noqa: E402
+from euraxess.pipelines import EuraxessPipeline  # noqa: E402
+from euraxess.processing import PROFILE_PATTERNS, ProcessedDataset, processed_schema  # noqa: E402
+from euraxess.query import QueryEngine  # noqa: E402
+from euraxess.storage import CsvJobStore  # noqa: E402
+from synthetic import parse_rows, write_jobs_csv  # noqa: E402
+
+ROOT = Path(__file__).resolve().parents[1]
+DATA = Path(__file__).resolve().parent / "data"
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+LISTING_COLUMNS = [column for column in processed_schema().names if column != "description"]
+
+SELECTIONS = [
+    {"country": ["Germany"]},
+    {"country": ["Germany", "France"], "profile": ["R1"]},
+    {"field": ["Biological sciences"], "sub_field": ["Biology"]},
+    {"country": ["Spain"], "profile": ["R2", "R3"], "field": ["Engineering", "Physics"]},
+]
+QUERIES = ["quantum", "machine learning", "geno", "marine ecology climate"]
+
+
+def _timed(fn: Callable, repeat: int = 1):
+    """Best wall time of ``repeat`` runs, and the last result."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _record(results: List[Dict], stage: str, rows: int, seconds: float, count: int, unit: str):
+    results.append({"stage": stage, "rows": rows, "seconds": seconds, "throughput": count / seconds if seconds else None, "unit": unit})
+    print(f"{stage:24} {rows:>9,} rows  {seconds:9.4f}s  {count / seconds if seconds else 0:14,.0f} {unit}/s")
+
+
+def bench_parse_listing(results: List[Dict], repeat: int = 50):
+    pages = [path.read_bytes() for path in sorted(FIXTURES.glob("*.html"))]
+
+    def parse_all():
+        items = 0
+        for _ in range(repeat):
+            for html in pages:
+                root = parse_html(html)
+                total_pages(root)
+                items += sum(1 for _ in parse_cards(root, "https://euraxess.ec.europa.eu/jobs/search"))
+        return items
+
+    seconds, items = _timed(parse_all)
+    _record(results, "parse_listing", items, seconds, repeat * len(pages), "pages")
+
+
+def bench_pipeline(results: List[Dict], csv_path: Path, rows: int, tmp: str) -> Settings:
+    settings = Settings()
+    settings.setmodule("euraxess.settings", priority="project")
+    settings.setdict(
+        {
+            "EURAXESS_STORAGE": "csv",
+            "EURAXESS_JOBS_CSV": f"{tmp}/jobs.csv",
+            "EURAXESS_PROCESSED_DIR": f"{tmp}/processed",
+            "EURAXESS_SEARCH_INDEX_PATH": f"{tmp}/search_index.pkl",
+            "EURAXESS_SNAPSHOT_DIR": f"{tmp}/snapshots",
+            "EURAXESS_ID_INDEX_PATH": f"{tmp}/jobs_ids.sqlite",
+        },
+        priority="cmdline",
+    )
+    spider = SimpleNamespace(settings=settings, logger=logging.getLogger("suite"))
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        items = [{key: value or None for key, value in row.items()} for row in csv.DictReader(f)]
+
+    def run():
+        pipeline = EuraxessPipeline()
+        pipeline.open_spider(spider)
+        for item in items:
+            pipeline.process_item(item, spider)
+        pipeline.close_spider(spider)
+
+    seconds, _ = _timed(run)
+    _record(results, "process_item", rows, seconds, rows, "items")
+    return settings
+
+
+def bench_dashboard(results: List[Dict], settings: Settings, rows: int, tmp: str):
+    dataset = ProcessedDataset(settings.get("EURAXESS_PROCESSED_DIR"))
+    seconds, _ = _timed(lambda: ProcessedDataset(f"{tmp}/rebuilt").rebuild(CsvJobStore(settings.get("EURAXESS_JOBS_CSV"))))
+    _record(results, "processing_rebuild", rows, seconds, rows, "rows")
+
+    seconds, engine = _timed(
+        lambda: LiveDataset(dataset, LISTING_COLUMNS, settings.get("EURAXESS_SEARCH_INDEX_PATH")).refresh(), repeat=3
+    )
+    _record(results, "load_and_process_data", rows, seconds, rows, "rows")
+    df = engine.df
+
+    def prepare_filter_options():
+        filter_index = FilterIndex.build(df, dataset.read_taxonomy())
+        return filter_index, filter_index.values("country"), list(PROFILE_PATTERNS), filter_index.values("field"), filter_index.values("sub_field")
+
+    seconds, (filter_index, *_) = _timed(prepare_filter_options, repeat=3)
+    _record(results, "prepare_filter_options", rows, seconds, rows, "rows")
+
+    # A fresh engine per round, so every selection misses the query cache
+    latencies = []
+    for _ in range(5):
+        fresh = QueryEngine(df, filter_index, engine.search_index, version=0)
+        for selection in SELECTIONS:
+            latencies.append(_timed(lambda: df.iloc[fresh.select(selection)])[0])
+    _record(results, "filter_dataframe", rows, statistics.median(latencies), 1, "queries")
+
+    latencies = [_timed(lambda: engine.search_index.search(query), repeat=3)[0] for query in QUERIES]
+    _record(results, "search", rows, statistics.median(latencies), 1, "queries")
+
+
+def environment() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results: List[Dict], baseline_path: Path, tolerance: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(entry["stage"], entry["rows"]): entry["seconds"] for entry in json.load(f)["results"]}
+    regressions = 0
+    for entry in results:
+        before = baseline.get((entry["stage"], entry["rows"]))
+        if before and entry["seconds"] > before * (1 + tolerance):
+            regressions += 1
+            print(f"REGRESSION {entry['stage']} at {entry['rows']:,} rows: {before:.4f}s -> {entry['seconds']:.4f}s")
+    print(f"Compared with {baseline_path}: {regressions} regressions beyond {tolerance:.0%}")
+    return regressions
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--sizes", type=parse_rows, nargs="+", default=[10_000, 100_000])
+    arg_parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parent / "results" / "latest.json")
+    arg_parser.add_argument("--baseline", type=Path)
+    arg_parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown against the baseline")
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    results: List[Dict] = []
+    bench_parse_listing(results)
+    for rows in args.sizes:
+        csv_path = DATA / f"jobs_{rows}.csv"
+        if not csv_path.exists():
+            write_jobs_csv(str(csv_path), rows)
+        with tempfile.TemporaryDirectory() as tmp:
+            settings = bench_pipeline(results, csv_path, rows, tmp)
+            bench_dashboard(results, settings, rows, tmp)
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        sys.exit(1 if compare(results, args.baseline, args.tolerance) else 0)
+
+
+if __name__ == "__main__":
+    main()
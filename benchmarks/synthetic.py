@@ -0,0 +1,188 @@
+"""Synthetic Euraxess job records for offline benchmarks.
+
+Can also write a ``jobs.csv`` in the job store's format, e.g. the 10k / 100k /
+1M row datasets the benchmark suite uses:
+
+    python benchmarks/synthetic.py --rows 1M --out benchmarks/data/jobs_1M.csv
+"""
+
+import argparse
+import csv
+import datetime
+import os
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+COUNTRIES = [
+    "Germany",
+    "France",
+    "Spain",
+    "Italy",
+    "Netherlands",
+    "Belgium",
+    "Sweden",
+    "Denmark",
+    "Finland",
+    "Austria",
+    "Portugal",
+    "Poland",
+    "Czechia",
+    "Ireland",
+    "Switzerland",
+    "Norway",
+    "Greece",
+    "Luxembourg",
+]
+
+UNIVERSITIES = [
+    "Technical University of Munich",
+    "Sorbonne Université",
+    "Universidad Politécnica de Madrid",
+    "Politecnico di Milano",
+    "Delft University of Technology",
+    "KU Leuven",
+    "Karolinska Institutet",
+    "University of Copenhagen",
+    "University of Helsinki",
+    "University of Vienna",
+    "University of Lisbon",
+    "Jagiellonian University",
+    "Charles University",
+    "Trinity College Dublin",
+    "ETH Zurich",
+    "University of Oslo",
+    "National Technical University of Athens",
+    "University of Luxembourg",
+    "Max Planck Institute for Informatics",
+    "CNRS",
+]
+
+# Research fields as they appear on Euraxess: a parent with optional children.
+FIELDS = {
+    "Engineering": ["Civil engineering", "Electrical engineering", "Mechanical engineering", "Biomedical engineering"],
+    "Computer science": ["Informatics", "Programming", "Database management", "Modelling tools"],
+    "Biological sciences": ["Biology", "Marine Biology", "Botany", "Microbiology"],
+    "Physics": ["Condensed matter properties", "Astrophysics", "Optics", "Quantum mechanics"],
+    "Chemistry": ["Organic chemistry", "Analytical chemistry", "Physical chemistry"],
+    "Medical sciences": ["Medicine", "Health sciences", "Immunology"],
+    "Mathematics": ["Applied mathematics", "Statistics", "Algebra"],
+    "Environmental science": ["Ecology", "Earth science"],
+    "Economics": [],
+    "Psychological sciences": [],
+}
+
+PROFILES = [
+    "First Stage Researcher (R1)",
+    "Recognised Researcher (R2)",
+    "Established Researcher (R3)",
+    "Leading Researcher (R4)",
+]
+
+FUNDING_PROGRAMS = [
+    "Not funded by a EU programme",
+    "Horizon Europe - MSCA",
+    "Horizon Europe - ERC",
+    "Horizon Europe",
+    None,
+]
+
+TYPES = ["Job offer", "Hosting offer"]
+
+WORDS = (
+    "research project doctoral position postdoctoral fellowship laboratory data analysis machine learning "
+    "materials climate energy health cancer protein quantum network robotics sensor imaging modelling "
+    "sustainable policy society language history ecology marine genome neural software hardware"
+).split()
+
+DEADLINE_TIMEZONES = ["Europe/Brussels", "Europe/Berlin", "Europe/Madrid", "Europe/Paris", "Europe/London"]
+
+
+def _field_string(rng: random.Random) -> str:
+    """Build a field value the way the spider joins the Research Field text nodes."""
+    parts = []
+    for parent in rng.sample(list(FIELDS), rng.randint(1, 3)):
+        children = FIELDS[parent]
+        if children and rng.random() < 0.8:
+            for child in rng.sample(children, rng.randint(1, min(2, len(children)))):
+                parts.extend([parent, " » ", child])
+        else:
+            parts.append(parent)
+    return ";".join(parts)
+
+
+def _sentence(rng: random.Random, n_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=n_words)).capitalize()
+
+
+def iter_jobs(n: int, seed: int = 0, start_id: int = 100000, oldest_first: bool = False) -> Iterator[Dict]:
+    """Generate ``n`` job records with the same columns the spider yields.
+
+    Records are ordered newest first, like the Euraxess listing, and newer
+    postings get higher ids.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    ages = sorted(rng.randint(0, 365) for _ in range(n))
+    for i in range(n - 1, -1, -1) if oldest_first else range(n):
+        age = ages[i]
+        job_id = str(start_id + n - i)
+        posted = today - datetime.timedelta(days=age)
+        deadline = posted + datetime.timedelta(days=rng.randint(-30, 180))
+        yield (
+            {
+                "id": job_id,
+                "type": rng.choice(TYPES),
+                "country": rng.choice(COUNTRIES),
+                "university": rng.choice(UNIVERSITIES),
+                "posted_on": f"Posted on: {posted.strftime('%d %B %Y')}",
+                "title": _sentence(rng, rng.randint(4, 10)),
+                "link": f"https://euraxess.ec.europa.eu/jobs/{job_id}",
+                "description": _sentence(rng, rng.randint(40, 120)),
+                "department": f"Department of {rng.choice(list(FIELDS))}",
+                "location": f"{rng.choice(UNIVERSITIES)}, {rng.choice(COUNTRIES)}",
+                "field": _field_string(rng),
+                "profile": ";".join(sorted(rng.sample(PROFILES, rng.randint(1, 3)))),
+                "funding_program": rng.choice(FUNDING_PROGRAMS),
+                "application_deadline": f"{deadline.strftime('%d %b %Y')} - 23:59 ({rng.choice(DEADLINE_TIMEZONES)})",
+            }
+        )
+
+
+def generate_jobs(n: int, seed: int = 0, start_id: int = 100000) -> List[Dict]:
+    return list(iter_jobs(n, seed, start_id))
+
+
+def parse_rows(value: str) -> int:
+    """Row counts such as 10000, 10k or 1M."""
+    multipliers = {"k": 1_000, "m": 1_000_000}
+    suffix = value[-1].lower()
+    return int(float(value[:-1]) * multipliers[suffix]) if suffix in multipliers else int(value)
+
+
+def write_jobs_csv(path: str, n: int, seed: int = 0):
+    """Write ``n`` jobs oldest first, the order the pipeline appends them in."""
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from euraxess.storage import FIELDNAMES
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        writer.writerows(iter_jobs(n, seed, oldest_first=True))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--rows", type=parse_rows, default=10_000)
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--out", default="benchmarks/data/jobs.csv")
+    args = arg_parser.parse_args()
+
+    write_jobs_csv(args.out, args.rows, args.seed)
+    print(f"Wrote {args.rows:,} jobs to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Headless JSON query API over the dashboard's in-memory indexes.
+
+A :class:`QueryServer` loads the processed dataset once through a
+:class:`~euraxess.live.LiveDataset` (mapping the published snapshot, if
+there is one), catches up with the pipeline's output at most every
+``refresh_interval`` seconds, and answers filter and search queries from
+the same :class:`~euraxess.query.QueryEngine` (filter index, search index,
+LRU cache, facet counts) the app uses. Serialized pages are cached per
+dataset version as well. Connections are kept alive (HTTP/1.1) and every
+connection gets its own thread.
+
+    GET /jobs?country=Germany&country=France&profile=R1&q=genome&sort=posted_on&order=desc&page=1&page_size=50
+    GET /facets?field=Biological+sciences
+    GET /metrics
+    GET /health
+
+Filters are repeated parameters named after the dimensions (``country``,
+``profile``, ``field``, ``sub_field``, ``funding_program``); ``q`` is a
+keyword query, ranked by relevance unless ``sort`` is given. ``/metrics``
+reports request counts and latency quantiles per endpoint, and every
+response carries its handling time in a ``Server-Timing`` header.
+
+    python -m euraxess.api --port 8502
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from euraxess.filter_index import DIMENSIONS
+from euraxess.live import LiveDataset
+from euraxess.query import LRUCache, QueryEngine, normalize_selection
+
+logger = logging.getLogger(__name__)
+
+SORT_COLUMNS = ["posted_on", "application_deadline", "country", "university", "title"]
+DEFAULT_COLUMNS = ["id", "country", "university", "title", "link", "application_deadline", "posted_on", "department", "location", "funding_program", "type", "profile", "field_1", "field_2"]
+MAX_PAGE_SIZE = 500
+
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _int_param(params: Dict, name: str, default: int, minimum: int, maximum: Optional[int] = None) -> int:
+    try:
+        value = int(params.get(name, [default])[-1])
+    except ValueError:
+        raise BadRequest(f"{name} must be an integer")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise BadRequest(f"{name} must be between {minimum} and {maximum}" if maximum is not None else f"{name} must be at least {minimum}")
+    return value
+
+
+def parse_selection(params: Dict) -> Tuple[Dict, Optional[str]]:
+    """The selection and search term of a parsed query string."""
+    return {dimension: params.get(dimension, []) for dimension in DIMENSIONS}, params.get("q", [None])[-1]
+
+
+class RequestMetrics:
+    """Request counts and the latencies of the most recent ``window`` requests, per endpoint."""
+
+    def __init__(self, window: int = 10_000):
+        self.window = window
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.latencies: Dict[str, deque] = {}
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, endpoint: str, status: int, seconds: float):
+        with self.lock:
+            if endpoint not in self.latencies:
+                self.latencies[endpoint] = deque(maxlen=self.window)
+            self.latencies[endpoint].append((time.time(), seconds))
+            self.counts[endpoint] = self.counts.get(endpoint, 0) + 1
+            if status >= 400:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self) -> Dict:
+        with self.lock:
+            recent = {endpoint: list(samples) for endpoint, samples in self.latencies.items()}
+            counts, errors = dict(self.counts), dict(self.errors)
+        endpoints = {}
+        for endpoint, samples in recent.items():
+            stamps, seconds = np.array(samples).T
+            span = max(stamps[-1] - stamps[0], 1e-9)
+            endpoints[endpoint] = {
+                "requests": counts[endpoint],
+                "errors": errors.get(endpoint, 0),
+                "window": len(samples),
+                "requests_per_second": round((len(samples) - 1) / span, 1) if len(samples) > 1 else 0.0,
+                "mean_ms": round(float(seconds.mean()) * 1000, 3),
+                **{f"p{round(q * 100)}_ms": round(float(np.quantile(seconds, q)) * 1000, 3) for q in LATENCY_QUANTILES},
+            }
+        return {"uptime_seconds": round(time.time() - self.started, 1), "requests": sum(counts.values()), "endpoints": endpoints}
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, a kept-alive connection waits for the delayed ACK
+    disable_nagle_algorithm = True
+    server: "QueryServer"
+
+    def do_GET(self):
+        started = time.perf_counter()
+        url = urlparse(self.path)
+        endpoint = url.path.rstrip("/") or "/"
+        handler = {"/jobs": self._jobs, "/facets": self._facets, "/metrics": self._metrics, "/health": self._health}.get(endpoint)
+        try:
+            if handler is None:
+                status, body = 404, json.dumps({"error": f"unknown endpoint {url.path}"})
+            else:
+                status, body = 200, handler(parse_qs(url.query))
+        except BadRequest as e:
+            status, body = 400, json.dumps({"error": str(e)})
+        except FileNotFoundError:
+            status, body = 503, json.dumps({"error": "no processed jobs found, run the scraper first"})
+        except Exception as e:
+            logger.exception(f"Error answering {self.path}")
+            status, body = 500, json.dumps({"error": str(e)})
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Server-Timing", f"app;dur={(time.perf_counter() - started) * 1000:.3f}")
+        self.end_headers()
+        self.wfile.write(payload)
+        self.server.metrics.record(endpoint if handler is not None else "other", status, time.perf_counter() - started)
+
+    def _jobs(self, params: Dict) -> str:
+        engine = self.server.engine()
+        selection, search_term = parse_selection(params)
+        sort_by = params.get("sort", [None])[-1]
+        if sort_by is not None and sort_by not in SORT_COLUMNS:
+            raise BadRequest(f"sort must be one of {SORT_COLUMNS}")
+        order = params.get("order", ["asc"])[-1]
+        if order not in ("asc", "desc"):
+            raise BadRequest("order must be asc or desc")
+        page = _int_param(params, "page", 1, 1)
+        page_size = _int_param(params, "page_size", 50, 1, MAX_PAGE_SIZE)
+        columns = params["columns"][-1].split(",") if "columns" in params else DEFAULT_COLUMNS
+        unknown = [column for column in columns if column not in engine.df.columns]
+        if unknown:
+            raise BadRequest(f"unknown columns: {unknown}")
+
+        key = (engine.version, normalize_selection(selection, search_term), sort_by, order, page, page_size, tuple(columns))
+        body = self.server.responses.get(key)
+        if body is None:
+            positions = engine.sorted_positions(selection, search_term, sort_by, order == "desc")
+            rows = engine.page(positions, page - 1, page_size, columns)
+            # The rows are serialized by pandas and spliced in, not round-tripped through Python objects
+            jobs = rows.to_json(orient="records", date_format="iso")
+            head = {"version": engine.version, "total": len(positions), "page": page, "page_size": page_size, "pages": -(-len(positions) // page_size)}
+            body = f'{json.dumps(head)[:-1]}, "jobs": {jobs}}}'
+            self.server.responses.put(key, body)
+        return body
+
+    def _facets(self, params: Dict) -> str:
+        engine = self.server.engine()
+        selection, search_term = parse_selection(params)
+        counts = engine.facet_counts(selection, search_term)
+        return json.dumps({"version": engine.version, "total": len(engine.select(selection, search_term)), "facets": counts})
+
+    def _metrics(self, params: Dict) -> str:
+        engine = self.server.engine()
+        return json.dumps(
+            {
+                **self.server.metrics.summary(),
+                "cache": engine.cache.stats(),
+                "response_cache": self.server.responses.stats(),
+                "dataset": {"version": engine.version, "jobs": engine.facets.n_live},
+            }
+        )
+
+    def _health(self, params: Dict) -> str:
+        return json.dumps({"status": "ok", "version": self.server.engine().version})
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, live: LiveDataset, refresh_interval: float = 5.0, response_cache_size: int = 1024):
+        super().__init__(address, QueryHandler)
+        self.live = live
+        self.refresh_interval = refresh_interval
+        self.metrics = RequestMetrics()
+        # Serialized pages of /jobs, keyed by dataset version like the engine's cache
+        self.responses = LRUCache(response_cache_size)
+        self.refreshed_at = 0.0
+        self._engine: Optional[QueryEngine] = None
+
+    def engine(self) -> QueryEngine:
+        """The current engine, checked against the dataset on disk at most every ``refresh_interval`` seconds."""
+        if self._engine is None or time.monotonic() - self.refreshed_at > self.refresh_interval:
+            self._engine = self.live.refresh()
+            self.refreshed_at = time.monotonic()
+        return self._engine
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    from euraxess.processing import ProcessedDataset, processed_schema
+    from euraxess.snapshot import SnapshotStore
+
+    settings = get_project_settings()
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--host", default=settings.get("EURAXESS_API_HOST"))
+    arg_parser.add_argument("--port", type=int, default=settings.getint("EURAXESS_API_PORT"))
+    arg_parser.add_argument("--processed-dir", default=settings.get("EURAXESS_PROCESSED_DIR"))
+    arg_parser.add_argument("--search-index", default=settings.get("EURAXESS_SEARCH_INDEX_PATH"))
+    arg_parser.add_argument("--snapshot-dir", default=settings.get("EURAXESS_SNAPSHOT_DIR"), help="published snapshots to map, empty to load the parts")
+    arg_parser.add_argument("--response-cache-size", type=int, default=1024, help="serialized pages kept, 0 to disable")
+    arg_parser.add_argument("--refresh-interval", type=float, default=settings.getfloat("EURAXESS_API_REFRESH_INTERVAL"))
+    args = arg_parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    live = LiveDataset(
+        ProcessedDataset(args.processed_dir),
+        columns=[column for column in processed_schema().names if column not in ("description", "field")],
+        search_index_path=args.search_index,
+        snapshots=SnapshotStore(args.snapshot_dir) if args.snapshot_dir else None,
+    )
+    server = QueryServer((args.host, args.port), live, args.refresh_interval, args.response_cache_size)
+    # Loaded before the first request, not by it
+    server.engine()
+    logger.info(f"Serving {server.engine().facets.n_live} jobs on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Checkpoints that let a listing crawl resume where it stopped.
+
+A checkpoint pairs the pagination progress of the spider with the position of
+everything the pipeline had flushed at that moment: the end of the job store
+and the parts of the processed dataset. The pipeline stages it in the id index
+and commits it in the same transaction as the ids, so the three always agree.
+A page only counts as done once all of its jobs went through the pipeline.
+Every crawl that does not resume starts with a checkpoint of where the store
+and the dataset stand, so rows flushed before its first checkpoint can be
+dropped as well.
+
+Resuming (``scrapy crawl euraxess_scraper -a resume=1``) first cuts the job
+store and the processed dataset back to the checkpoint, dropping rows whose
+ids were never committed, then crawls only the pages that are not done. Jobs
+of those pages that were stored before the crash are skipped as duplicates.
+"""
+
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+from euraxess.watermark import Watermark
+
+
+@dataclass
+class CrawlProgress:
+    final_number: int = 0
+    pages_done: Set[int] = field(default_factory=set)
+    next_watermark: Watermark = field(default_factory=Watermark)
+    complete: bool = False
+
+    def next_serial_page(self) -> int:
+        """First page of a serial crawl that is not done."""
+        page = 0
+        while page in self.pages_done:
+            page += 1
+        return page
+
+    def to_dict(self) -> Dict:
+        watermark = self.next_watermark
+        return {
+            "final_number": self.final_number,
+            "pages_done": sorted(self.pages_done),
+            "next_watermark": {
+                "newest_posted_on": watermark.newest_posted_on.isoformat() if watermark.newest_posted_on else None,
+                "boundary_ids": sorted(watermark.boundary_ids),
+            },
+            "complete": self.complete,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CrawlProgress":
+        watermark = data.get("next_watermark") or {}
+        newest = watermark.get("newest_posted_on")
+        return cls(
+            final_number=data["final_number"],
+            pages_done=set(data["pages_done"]),
+            next_watermark=Watermark(
+                datetime.date.fromisoformat(newest) if newest else None, set(watermark.get("boundary_ids", []))
+            ),
+            complete=data["complete"],
+        )
+
+
+def make_checkpoint(store, processed, progress: Optional[CrawlProgress]) -> Dict:
+    manifest = processed.read_manifest()
+    return {
+        "store_backend": type(store).__name__,
+        "store": store.position(),
+        "processed_parts": manifest["parts"] if manifest else [],
+        "progress": progress.to_dict() if progress is not None else None,
+        "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def resumable_progress(checkpoint: Optional[Dict]) -> Optional[CrawlProgress]:
+    """The progress of an unfinished crawl recorded in ``checkpoint``, if any."""
+    if not checkpoint or not checkpoint.get("progress"):
+        return None
+    progress = CrawlProgress.from_dict(checkpoint["progress"])
+    return None if progress.complete else progress
+
+
+def roll_back(checkpoint: Dict, store, processed):
+    """Cut the job store and the processed dataset back to ``checkpoint``."""
+    if checkpoint["store_backend"] == type(store).__name__:
+        store.truncate(checkpoint["store"])
+    processed.truncate(checkpoint["processed_parts"])
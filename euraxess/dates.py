@@ -0,0 +1,122 @@
+"""Bulk parsing of the date strings Euraxess emits.
+
+Deadlines look like "30 Nov 2025 - 23:59 (Europe/Brussels)" and posting dates
+like "15 October 2025". A :class:`DateParser` parses each distinct raw string
+once (many jobs share a deadline), tries a short list of explicit formats with
+vectorized ``pd.to_datetime`` and only falls back to dateutil for the strings
+none of them matched. Those outliers are reported so the format list can grow.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+from dateutil import parser
+
+logger = logging.getLogger(__name__)
+
+DEADLINE_FORMATS = [
+    "%d %b %Y - %H:%M",
+    "%d %B %Y - %H:%M",
+    "%d/%m/%Y - %H:%M",
+    "%d %b %Y",
+    "%d %B %Y",
+    "%Y-%m-%dT%H:%M:%S",
+]
+
+POSTED_ON_FORMATS = [
+    "%d %B %Y",
+    "%d %b %Y",
+    "%d/%m/%Y",
+]
+
+# "30 Nov 2025 - 23:59 (Europe/Brussels)" -> date part, timezone
+_TZ_SUFFIX = r"^(?P<date>[^(]*?)\s*(?:\((?P<tz>[^)]*)\))?\s*$"
+
+
+@dataclass
+class ParsedDates:
+    values: pd.Series
+    timezones: pd.Series
+    # Raw strings only dateutil could parse, and strings nothing could parse
+    outliers: List[str] = field(default_factory=list)
+    failures: List[str] = field(default_factory=list)
+
+
+class DateParser:
+    def __init__(self, formats: List[str], strip_prefixes: Tuple[str, ...] = (), max_memo: int = 100_000):
+        self.formats = formats
+        self.strip_prefixes = strip_prefixes
+        self.max_memo = max_memo
+        self.memo: Dict[str, Tuple[pd.Timestamp, Optional[str]]] = {}
+
+    def _split(self, uniques: pd.Series) -> pd.DataFrame:
+        cleaned = uniques
+        for prefix in self.strip_prefixes:
+            cleaned = cleaned.str.replace(prefix, "", regex=False)
+        return cleaned.str.extract(_TZ_SUFFIX)
+
+    def _parse_uniques(self, uniques: pd.Series) -> ParsedDates:
+        parts = self._split(uniques)
+        values = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+        remaining = parts["date"].notna() & (parts["date"] != "")
+        for fmt in self.formats:
+            if not remaining.any():
+                break
+            attempt = pd.to_datetime(parts.loc[remaining, "date"], format=fmt, errors="coerce")
+            matched = attempt.notna()
+            values[attempt.index[matched]] = attempt[matched]
+            remaining[attempt.index[matched]] = False
+
+        outliers, failures = [], []
+        for i in remaining[remaining].index:
+            try:
+                # Naive wall time like the formats above; an offset in the string is dropped as the bracketed timezone is
+                values[i] = parser.parse(parts.at[i, "date"]).replace(tzinfo=None)
+                outliers.append(uniques[i])
+            except (ValueError, OverflowError):
+                failures.append(uniques[i])
+        return ParsedDates(values, parts["tz"], outliers, failures)
+
+    def parse(self, raw: pd.Series) -> ParsedDates:
+        """Parse a column of raw date strings, keeping the bracketed timezone apart."""
+        codes, uniques = pd.factorize(raw)
+        if not len(uniques):
+            # Nothing but missing values
+            return ParsedDates(pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]"), pd.Series(None, index=raw.index, dtype=object))
+        uniques = pd.Series(uniques, dtype=object)
+        known = uniques.isin(self.memo.keys())
+
+        values = pd.Series(pd.NaT, index=uniques.index, dtype="datetime64[ns]")
+        timezones = pd.Series(None, index=uniques.index, dtype=object)
+        if known.any():
+            memoized = [self.memo[value] for value in uniques[known]]
+            values[known] = [value for value, _ in memoized]
+            timezones[known] = [tz for _, tz in memoized]
+
+        parsed = ParsedDates(values, timezones)
+        if (~known).any():
+            fresh = self._parse_uniques(uniques[~known])
+            values[~known] = fresh.values
+            timezones[~known] = fresh.timezones
+            parsed.outliers, parsed.failures = fresh.outliers, fresh.failures
+            if len(self.memo) + len(fresh.values) > self.max_memo:
+                self.memo.clear()
+            self.memo.update(zip(uniques[~known], zip(fresh.values, fresh.timezones.where(fresh.timezones.notna(), None))))
+            if parsed.outliers or parsed.failures:
+                logger.warning(
+                    f"{len(parsed.outliers)} date strings needed the dateutil fallback and {len(parsed.failures)} "
+                    f"could not be parsed, e.g. {(parsed.outliers + parsed.failures)[:3]}"
+                )
+
+        # factorize marks missing values with -1
+        missing = codes == -1
+        safe_codes = codes.clip(min=0)
+        parsed.values = pd.Series(values.to_numpy()[safe_codes], index=raw.index).mask(missing)
+        parsed.timezones = pd.Series(timezones.to_numpy()[safe_codes], index=raw.index, dtype=object).mask(missing)
+        return parsed
+
+
+deadline_parser = DateParser(DEADLINE_FORMATS)
+posted_on_parser = DateParser(POSTED_ON_FORMATS, strip_prefixes=("Posted on: ", "Posted on "))
@@ -0,0 +1,75 @@
+"""Store of job detail pages, with the HTTP validators they were served with.
+
+The detail spider keeps one row per job: the sections of the posting plus the
+ETag, Last-Modified and content hash of the page. On the next run those
+validators turn into conditional requests, so pages the server reports as
+unchanged (304) are neither downloaded nor parsed again, and pages served
+without validators are still skipped when their content hash did not change.
+"""
+
+import os
+import sqlite3
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+DETAIL_FIELDS = [
+    "offer_description",
+    "requirements",
+    "additional_information",
+    "where_to_apply",
+    "contact",
+    "emails",
+]
+VALIDATOR_FIELDS = ["etag", "last_modified", "content_hash", "fetched_at"]
+COLUMNS = ["id", "link"] + DETAIL_FIELDS + VALIDATOR_FIELDS
+
+
+class DetailStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def open(self) -> "DetailStore":
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{column} TEXT" for column in COLUMNS[1:])
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS details (id TEXT PRIMARY KEY, {columns}) WITHOUT ROWID")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS details_link ON details (link)")
+        return self
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM details").fetchone()[0]
+
+    def validators(self) -> Dict[str, Tuple[Optional[str], Optional[str], Optional[str]]]:
+        """ETag, Last-Modified and content hash of every stored page, keyed by link."""
+        rows = self.conn.execute("SELECT link, etag, last_modified, content_hash FROM details")
+        return {link: (etag, last_modified, content_hash) for link, etag, last_modified, content_hash in rows}
+
+    def upsert(self, item: Dict):
+        placeholders = ", ".join("?" for _ in COLUMNS)
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO details ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+            [None if item.get(column) is None else str(item[column]) for column in COLUMNS],
+        )
+
+    def update_validators(self, item: Dict):
+        """Store the ETag and Last-Modified a page was served with again, keeping its content."""
+        self.conn.execute(
+            "UPDATE details SET etag = ?, last_modified = ?, fetched_at = ? WHERE id = ?",
+            (item.get("etag"), item.get("last_modified"), item.get("fetched_at"), str(item["id"])),
+        )
+
+    def read(self) -> pd.DataFrame:
+        return pd.read_sql_query(f"SELECT {', '.join(COLUMNS)} FROM details", self.conn)
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
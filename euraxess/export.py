@@ -0,0 +1,223 @@
+"""Streaming export of a selection of the processed dataset.
+
+The dashboard's frame only holds the listing columns, so an export reads the
+rows it writes from the Parquet parts of the processed dataset instead: one
+pass over the ``id`` column finds, for every selected job, the row holding
+its current version, then every part is streamed in batches of
+``chunksize`` rows, filtered down to those rows and appended to the output.
+Memory is bounded by the batch size plus a lookup of the selected ids,
+whatever the length of the descriptions; nothing the size of the output is
+ever held.
+
+Rows are written in the order the app and the API show them: by the sort
+column when one is chosen, by relevance when searching, and in dataset
+(crawl) order otherwise. An ordered export first streams the rows to an
+uncompressed Arrow file next to the output, then memory-maps it and writes
+them out chunk by chunk in order, so memory stays bounded the same way.
+
+CSV, JSON Lines and Parquet are supported; the format follows the file
+suffix unless given. From the command line, with the sidebar filters as
+options:
+
+    python -m euraxess.export output/exports/germany.parquet --country Germany --profile R1
+    python -m euraxess.export output/exports/all.csv --columns id title link application_deadline
+    python -m euraxess.export output/exports/latest.jsonl --sort posted_on --descending
+"""
+
+import argparse
+import os
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from euraxess.processing import ProcessedDataset, processed_schema
+from euraxess.storage import FIELDNAMES
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+MIME_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+# The job fields as crawled, with the dates parsed; any processed column can be asked for
+EXPORT_COLUMNS = FIELDNAMES
+
+
+def export_format(path: str, fmt: Optional[str] = None) -> str:
+    """The export format given, or the one of the file suffix of ``path``."""
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in MIME_TYPES:
+        raise ValueError(f"Unknown export format for {path!r}, use one of {sorted(FORMATS)} or pass the format")
+    return fmt
+
+
+def _current_rows(dataset: ProcessedDataset, parts: List[str], ids: pd.Index) -> Tuple[np.ndarray, np.ndarray]:
+    """Row numbers across ``parts`` that hold the current version of one of ``ids``, and the first row of every part.
+
+    Only the ``id`` column of one part is read at a time; what is kept is one
+    row number per job of ``ids``.
+    """
+    import pyarrow.parquet as pq
+
+    last = np.full(len(ids), -1, dtype=np.int64)
+    starts = [0]
+    for name in parts:
+        part_ids = pq.read_table(os.path.join(dataset.root, name), columns=["id"]).column("id").to_pandas()
+        found = ids.get_indexer(part_ids)
+        hits = np.flatnonzero(found >= 0)[::-1]
+        # Later rows win on duplicate ids, as in ProcessedDataset.load_parts
+        keys, latest = np.unique(found[hits], return_index=True)
+        last[keys] = starts[-1] + hits[latest]
+        starts.append(starts[-1] + len(part_ids))
+    return np.sort(last[last >= 0]), np.array(starts)
+
+
+def iter_rows(
+    dataset: ProcessedDataset, parts: List[str], ids: Iterable[str], columns: Optional[List[str]] = None, chunksize: int = 10_000
+) -> Iterator[pd.DataFrame]:
+    """The current rows of ``ids`` in ``parts``, in dataset order, as frames of at most ``chunksize`` rows."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = list(columns or EXPORT_COLUMNS)
+    unknown = set(columns) - set(processed_schema().names)
+    if unknown:
+        raise ValueError(f"Unknown export columns: {sorted(unknown)}")
+    rows, starts = _current_rows(dataset, parts, pd.Index(ids).unique())
+    for name, start, end in zip(parts, starts[:-1], starts[1:]):
+        first, last = np.searchsorted(rows, [start, end])
+        if first == last:
+            continue
+        mask = np.zeros(end - start, dtype=bool)
+        mask[rows[first:last] - start] = True
+        offset = 0
+        for batch in pq.ParquetFile(os.path.join(dataset.root, name)).iter_batches(batch_size=chunksize, columns=columns):
+            batch_mask = mask[offset : offset + batch.num_rows]
+            offset += batch.num_rows
+            if batch_mask.any():
+                yield batch.filter(pa.array(batch_mask)).to_pandas()
+
+
+def iter_ordered_rows(
+    dataset: ProcessedDataset, parts: List[str], ids: Iterable[str], spill_path: str, columns: Optional[List[str]] = None, chunksize: int = 10_000
+) -> Iterator[pd.DataFrame]:
+    """Like :func:`iter_rows`, in the order of ``ids``; the rows are spilled to ``spill_path`` to be reordered."""
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    columns = list(columns or EXPORT_COLUMNS)
+    ids = pd.Index(ids).unique()
+    read_columns = columns if "id" in columns else ["id"] + columns
+    schema = pa.schema([processed_schema().field(column) for column in read_columns])
+    try:
+        # Uncompressed, so the reordering below maps the file instead of reading it into memory
+        with ipc.new_file(spill_path, schema) as writer:
+            for chunk in iter_rows(dataset, parts, ids, read_columns, chunksize):
+                writer.write_table(pa.Table.from_pandas(chunk[read_columns], schema=schema, preserve_index=False))
+        with pa.memory_map(spill_path) as source:
+            table = ipc.open_file(source).read_all()
+            # Row of the spilled table to write at every output position
+            order = np.argsort(ids.get_indexer(table.column("id").to_pandas()), kind="stable")
+            for start in range(0, len(order), chunksize):
+                yield table.take(order[start : start + chunksize]).select(columns).to_pandas()
+            del table
+    finally:
+        if os.path.exists(spill_path):
+            os.remove(spill_path)
+
+
+def write_rows(chunks: Iterable[pd.DataFrame], path: str, fmt: Optional[str] = None, columns: Optional[List[str]] = None) -> int:
+    """Write ``chunks`` to ``path`` one at a time; returns the number of rows written."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fmt = export_format(path, fmt)
+    columns = list(columns or EXPORT_COLUMNS)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Written next to the target and moved into place, so a failed export leaves no partial file
+    tmp_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.tmp")
+    rows = 0
+    try:
+        if fmt == "parquet":
+            schema = pa.schema([processed_schema().field(column) for column in columns])
+            with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+                for chunk in chunks:
+                    writer.write_table(pa.Table.from_pandas(chunk[columns], schema=schema, preserve_index=False))
+                    rows += len(chunk)
+        else:
+            with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+                if fmt == "csv":
+                    f.write(pd.DataFrame(columns=columns).to_csv(index=False))
+                for chunk in chunks:
+                    if fmt == "csv":
+                        chunk[columns].to_csv(f, index=False, header=False)
+                    else:
+                        chunk[columns].to_json(f, orient="records", lines=True, date_format="iso", force_ascii=False)
+                    rows += len(chunk)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return rows
+
+
+def export_selection(
+    live,
+    selection: dict,
+    search_term: Optional[str],
+    path: str,
+    fmt: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+    chunksize: int = 10_000,
+    sort_by: Optional[str] = None,
+    descending: bool = False,
+) -> int:
+    """Export the jobs a :class:`~euraxess.live.LiveDataset` matches for a selection, in the order it shows them; returns the number of rows."""
+    engine = live.refresh()
+    parts = live.row_parts()
+    ids = engine.df["id"].take(engine.sorted_positions(selection, search_term, sort_by, descending))
+    if sort_by is None and not search_term:
+        # Frame order is dataset order, the order parts are streamed in
+        return write_rows(iter_rows(live.dataset, parts, ids, columns, chunksize), path, fmt, columns)
+    spill_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.order.arrow")
+    return write_rows(iter_ordered_rows(live.dataset, parts, ids, spill_path, columns, chunksize), path, fmt, columns)
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    from euraxess.api import SORT_COLUMNS
+    from euraxess.live import LiveDataset
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("path", help="output file; .csv, .jsonl or .parquet")
+    arg_parser.add_argument("--format", choices=sorted(MIME_TYPES), help="output format, instead of the file suffix")
+    arg_parser.add_argument("--country", nargs="+", default=[])
+    arg_parser.add_argument("--profile", nargs="+", default=[])
+    arg_parser.add_argument("--field", nargs="+", default=[])
+    arg_parser.add_argument("--sub-field", nargs="+", default=[])
+    arg_parser.add_argument("--funding-program", nargs="+", default=[])
+    arg_parser.add_argument("--search", help="keyword query over titles and descriptions")
+    arg_parser.add_argument("--sort", choices=SORT_COLUMNS, help="column to order the jobs by (default: relevance when searching, crawl order otherwise)")
+    arg_parser.add_argument("--descending", action="store_true")
+    arg_parser.add_argument("--columns", nargs="+", help=f"columns to export (default: {' '.join(EXPORT_COLUMNS)})")
+    arg_parser.add_argument("--chunksize", type=int, default=10_000)
+    args = arg_parser.parse_args()
+
+    settings = get_project_settings()
+    live = LiveDataset(
+        ProcessedDataset(settings.get("EURAXESS_PROCESSED_DIR")),
+        columns=[column for column in processed_schema().names if column not in ("description", "field")],
+        search_index_path=settings.get("EURAXESS_SEARCH_INDEX_PATH"),
+    )
+    selection = {
+        "country": args.country,
+        "profile": args.profile,
+        "field": args.field,
+        "sub_field": args.sub_field,
+        "funding_program": args.funding_program,
+    }
+    rows = export_selection(live, selection, args.search, args.path, args.format, args.columns, args.chunksize, args.sort, args.descending)
+    print(f"Exported {rows} jobs to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
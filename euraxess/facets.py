@@ -0,0 +1,83 @@
+"""Facet counts behind the sidebar labels and the headline metrics.
+
+:class:`FacetCounts` holds, for the live rows of the dashboard's frame, the
+number of rows of every filter value (country, profile, field, sub-field,
+funding programme), plus the universities and posting days the metrics are
+computed from. It is built once per full load and then maintained as the
+live dataset appends and retires rows, so a rerun reads counts instead of
+scanning the frame. Counts under a selection are computed from the filter
+index bitsets by the query layer.
+"""
+
+from collections import Counter
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from euraxess.filter_index import DIMENSIONS, FilterIndex
+
+
+def _subtract(counts: Dict, removed: Dict) -> Dict:
+    result = Counter(counts)
+    result.subtract(removed)
+    return {key: count for key, count in result.items() if count > 0}
+
+
+def _add(counts: Dict, added: Dict) -> Dict:
+    result = Counter(counts)
+    result.update(added)
+    return dict(result)
+
+
+class FacetCounts:
+    def __init__(self, values: Dict[str, Dict[str, int]], universities: Dict[str, int], posted_days: Dict, n_live: int):
+        self.values = values
+        self.universities = universities
+        # Live rows per posting day, for "New This Week" at any time of the day
+        self.posted_days = posted_days
+        self.n_live = n_live
+
+    @staticmethod
+    def _row_counts(df: pd.DataFrame, positions: np.ndarray):
+        universities = df["university"].take(positions).value_counts()
+        posted_days = df["posted_on"].take(positions).dt.floor("D").value_counts()
+        return (
+            {str(university): int(count) for university, count in universities.items() if count},
+            {day: int(count) for day, count in posted_days.items()},
+        )
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, filter_index: FilterIndex) -> "FacetCounts":
+        positions = np.flatnonzero(np.unpackbits(filter_index.live, count=filter_index.n_rows))
+        universities, posted_days = cls._row_counts(df, positions)
+        values = {dimension: filter_index.counts(dimension) for dimension in DIMENSIONS}
+        return cls(values, universities, posted_days, len(positions))
+
+    def extend(self, added: pd.DataFrame, added_index: FilterIndex) -> "FacetCounts":
+        """The counts with the rows of ``added``, indexed by ``added_index``, appended."""
+        added_counts = FacetCounts.build(added, added_index)
+        return FacetCounts(
+            {dimension: _add(self.values[dimension], added_counts.values[dimension]) for dimension in DIMENSIONS},
+            _add(self.universities, added_counts.universities),
+            _add(self.posted_days, added_counts.posted_days),
+            self.n_live + added_counts.n_live,
+        )
+
+    def retire(self, df: pd.DataFrame, filter_index: FilterIndex, positions: np.ndarray) -> "FacetCounts":
+        """The counts without the rows at ``positions``; ``filter_index`` is the index before they were retired."""
+        positions = np.unique(positions)
+        positions = positions[filter_index.is_live(positions)]
+        if not len(positions):
+            return self
+        universities, posted_days = self._row_counts(df, positions)
+        return FacetCounts(
+            {dimension: _subtract(self.values[dimension], filter_index.counts_at(dimension, positions)) for dimension in DIMENSIONS},
+            _subtract(self.universities, universities),
+            _subtract(self.posted_days, posted_days),
+            self.n_live - len(positions),
+        )
+
+    def posted_since(self, since: pd.Timestamp) -> int:
+        """Live rows posted at ``since`` or later (postings carry a date, not a time)."""
+        return sum(count for posted, count in self.posted_days.items() if posted >= since)
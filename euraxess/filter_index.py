@@ -0,0 +1,189 @@
+"""Membership index for the sidebar filters.
+
+Every value of a filter dimension (a country, a profile, an exact research
+field or sub-field term of the taxonomy in ``euraxess/taxonomy.py``) maps to
+a packed bitset over the rows of the processed frame. A selection is the OR
+of the selected values' bitsets within a dimension, ANDed across dimensions,
+so filtering never scans the strings and "Biology" no longer matches "Marine
+Biology". Counting the rows of every
+value under a mask (the sidebar's facet counts) is one AND and popcount over
+the stacked bitsets of a dimension.
+
+Rows can be appended and retired (superseded or expired) without rebuilding;
+a retired row keeps its position but no longer matches any selection.
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from euraxess.processing import PROFILE_PATTERNS, profile_flags
+from euraxess.taxonomy import Taxonomy, list_pairs
+
+DIMENSIONS = ("country", "profile", "field", "sub_field", "funding_program")
+
+# Set bits of every byte value
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def _bitsets_from_codes(codes: np.ndarray, labels: Iterable[str]) -> Dict[str, np.ndarray]:
+    return {label: np.packbits(codes == code) for code, label in enumerate(labels)}
+
+
+def _bitsets_from_rows(rows: np.ndarray, labels: np.ndarray, n_rows: int) -> Dict[str, np.ndarray]:
+    """Bitsets of ``n_rows`` rows, one per distinct label; row ``rows[i]`` has label ``labels[i]``."""
+    codes, labels = pd.factorize(labels)
+    bitsets = {}
+    order = np.argsort(codes, kind="stable")
+    boundaries = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+    for code, label in enumerate(labels):
+        bits = np.zeros(n_rows, dtype=bool)
+        bits[rows[order[boundaries[code] : boundaries[code + 1]]]] = True
+        bitsets[label] = np.packbits(bits)
+    return bitsets
+
+
+def _field_bitsets(rows: np.ndarray, terms: np.ndarray, taxonomy: Taxonomy, n_rows: int) -> Tuple[Dict, Dict]:
+    """Field and sub-field bitsets of rows with the given terms; sub-fields of the same name under different fields share one."""
+    names = np.array(taxonomy.names, dtype=object)
+    parents = np.array(taxonomy.parents, dtype=np.int64)
+    roots = np.array(taxonomy.roots(), dtype=np.int64)
+    is_sub_field = parents[terms] >= 0
+    return (
+        _bitsets_from_rows(rows, names[roots[terms]], n_rows),
+        _bitsets_from_rows(rows[is_sub_field], names[terms[is_sub_field]], n_rows),
+    )
+
+
+def _concat_bits(first: Optional[np.ndarray], n_first: int, second: Optional[np.ndarray], n_second: int) -> np.ndarray:
+    """Packed bitset of ``n_first`` bits followed by ``n_second`` bits; None stands for all zeros."""
+    first_bits = np.zeros(n_first, dtype=np.uint8) if first is None else np.unpackbits(first, count=n_first)
+    second_bits = np.zeros(n_second, dtype=np.uint8) if second is None else np.unpackbits(second, count=n_second)
+    return np.packbits(np.concatenate([first_bits, second_bits]))
+
+
+class FilterIndex:
+    def __init__(
+        self,
+        n_rows: int,
+        bitsets: Dict[str, Dict[str, np.ndarray]],
+        live: Optional[np.ndarray] = None,
+        matrices: Optional[Dict[str, Tuple[List[str], np.ndarray]]] = None,
+    ):
+        self.n_rows = n_rows
+        self.bitsets = bitsets
+        self.live = np.packbits(np.ones(n_rows, dtype=bool)) if live is None else live
+        # Bitsets of each dimension stacked into one matrix, built on first count
+        self._matrices = {} if matrices is None else matrices
+
+    @classmethod
+    def build(cls, df: pd.DataFrame, taxonomy: Optional[Taxonomy] = None) -> "FilterIndex":
+        """Index a processed frame; bit ``i`` stands for the row at position ``i``.
+
+        The field terms are read from ``field_terms`` with the ``taxonomy``
+        they refer to, or else parsed from the raw ``field`` column.
+        """
+        n_rows = len(df)
+        df = df.reset_index(drop=True)
+        if taxonomy is not None and "field_terms" in df:
+            rows, terms = list_pairs(df["field_terms"])
+        else:
+            taxonomy = Taxonomy()
+            rows, terms = taxonomy.map_fields(df["field"]).pairs()
+        field_bitsets, sub_field_bitsets = _field_bitsets(rows, terms, taxonomy, n_rows)
+        country_codes, countries = pd.factorize(df["country"])
+        funding_codes, funding_programs = pd.factorize(df["funding_program"])
+        flags = profile_flags(df)
+        bitsets = {
+            "country": _bitsets_from_codes(country_codes, countries),
+            "funding_program": _bitsets_from_codes(funding_codes, funding_programs),
+            "profile": {pattern: np.packbits((flags & (1 << bit)) != 0) for bit, pattern in enumerate(PROFILE_PATTERNS)},
+            "field": field_bitsets,
+            "sub_field": sub_field_bitsets,
+        }
+        return cls(n_rows, bitsets)
+
+    def extend(self, df: pd.DataFrame, added: Optional["FilterIndex"] = None) -> "FilterIndex":
+        """A new index with the rows of ``df`` (already indexed as ``added``, if given) appended after the current ones."""
+        if added is None:
+            added = FilterIndex.build(df)
+        bitsets = {}
+        for dimension in DIMENSIONS:
+            current, new = self.bitsets[dimension], added.bitsets[dimension]
+            bitsets[dimension] = {
+                value: _concat_bits(current.get(value), self.n_rows, new.get(value), added.n_rows)
+                for value in {**current, **new}
+            }
+        live = _concat_bits(self.live, self.n_rows, added.live, added.n_rows)
+        return FilterIndex(self.n_rows + added.n_rows, bitsets, live)
+
+    def retire(self, positions: np.ndarray) -> "FilterIndex":
+        """A new index in which the rows at ``positions`` no longer match."""
+        live = np.unpackbits(self.live, count=self.n_rows)
+        live[positions] = 0
+        return FilterIndex(self.n_rows, self.bitsets, np.packbits(live), self._matrices)
+
+    @property
+    def n_live(self) -> int:
+        return self.count(self.live)
+
+    def is_live(self, positions: np.ndarray) -> np.ndarray:
+        return self._bits_at(self.live, positions)
+
+    @staticmethod
+    def _bits_at(bitset: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        return ((bitset[positions >> 3] >> (7 - (positions & 7)).astype(np.uint8)) & 1).astype(bool)
+
+    def _matrix(self, dimension: str) -> Tuple[List[str], np.ndarray]:
+        if dimension not in self._matrices:
+            values = list(self.bitsets[dimension])
+            matrix = np.stack([self.bitsets[dimension][value] for value in values]) if values else np.zeros((0, (self.n_rows + 7) // 8), dtype=np.uint8)
+            self._matrices[dimension] = (values, matrix)
+        return self._matrices[dimension]
+
+    def counts(self, dimension: str, mask: Optional[np.ndarray] = None) -> Dict[str, int]:
+        """Rows of every value of ``dimension`` within ``mask``, by default the live rows."""
+        values, matrix = self._matrix(dimension)
+        totals = _POPCOUNT[matrix & (self.live if mask is None else mask)].sum(axis=1, dtype=np.int64)
+        return {value: int(total) for value, total in zip(values, totals) if total}
+
+    def counts_at(self, dimension: str, positions: np.ndarray) -> Dict[str, int]:
+        """Rows of every value of ``dimension`` among the rows at ``positions``."""
+        counts = {}
+        for value, bitset in self.bitsets[dimension].items():
+            total = int(self._bits_at(bitset, positions).sum())
+            if total:
+                counts[value] = total
+        return counts
+
+    def values(self, dimension: str) -> List[str]:
+        return sorted(self.bitsets[dimension], key=lambda x: x.lower())
+
+    def all_rows(self) -> np.ndarray:
+        return self.live.copy()
+
+    def dimension_mask(self, dimension: str, selected: Iterable[str]) -> Optional[np.ndarray]:
+        """OR of the selected values' bitsets, or None when nothing is selected."""
+        selected = list(selected or [])
+        if not selected:
+            return None
+        empty = np.zeros((self.n_rows + 7) // 8, dtype=np.uint8)
+        return np.bitwise_or.reduce([self.bitsets[dimension].get(value, empty) for value in selected])
+
+    def mask(self, selection: Dict[str, Iterable[str]]) -> np.ndarray:
+        """Packed bitset of the rows matching every dimension of ``selection``."""
+        result = self.all_rows()
+        for dimension in DIMENSIONS:
+            dimension_mask = self.dimension_mask(dimension, selection.get(dimension))
+            if dimension_mask is not None:
+                result &= dimension_mask
+        return result
+
+    def positions(self, selection: Dict[str, Iterable[str]]) -> np.ndarray:
+        """Row positions matching ``selection``, in frame order."""
+        return np.flatnonzero(np.unpackbits(self.mask(selection), count=self.n_rows))
+
+    @staticmethod
+    def count(mask: np.ndarray) -> int:
+        return int(np.unpackbits(mask).sum())
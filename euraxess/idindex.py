@@ -0,0 +1,174 @@
+"""Persistent index of the jobs already stored, backed by SQLite.
+
+Every stored id is kept with the content hash of its latest version, so
+membership checks and change detection are a primary-key lookup whether the
+history holds a thousand or millions of rows. A missing index is bootstrapped
+once from the job store.
+
+Each new job and each re-seen job whose content changed is recorded in the
+``job_versions`` history table, keyed by the crawl that saw it, so what
+changed in a crawl can be queried without diffing the job store:
+
+    python -m euraxess.idindex changes
+    python -m euraxess.idindex changes --crawl 2024-05-01T08:00:00+00:00
+    python -m euraxess.idindex history 123456
+
+The index also holds the crawl checkpoint (see ``euraxess/checkpoint.py``),
+committed in the same transaction as the ids it accounts for.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from euraxess.storage import FIELDNAMES, get_job_store, iter_content_hashes
+
+# Kinds of change recorded in job_versions
+NEW = "new"
+CHANGED = "changed"
+
+
+class JobIdIndex:
+    def __init__(self, path: str):
+        self.path = path
+        self.conn: Optional[sqlite3.Connection] = None
+
+    def open(self, bootstrap: Optional[Callable[[], Iterable[Tuple[str, str]]]] = None) -> "JobIdIndex":
+        """Open the index, filling it from ``bootstrap``'s ``(id, content hash)`` pairs on first use."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS job_ids (id TEXT PRIMARY KEY, content_hash TEXT) WITHOUT ROWID")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_versions "
+            "(crawl TEXT, id TEXT, change TEXT, content_hash TEXT, record TEXT, PRIMARY KEY (crawl, id)) WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS job_versions_id ON job_versions (id)")
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(job_ids)")]
+        if "content_hash" not in columns:
+            # Indexes from before change tracking hold bare ids, bootstrap again to fill in the hashes
+            self.conn.execute("ALTER TABLE job_ids ADD COLUMN content_hash TEXT")
+            self.conn.execute("DELETE FROM meta WHERE key = 'bootstrapped'")
+        bootstrapped = self.conn.execute("SELECT 1 FROM meta WHERE key = 'bootstrapped'").fetchone()
+        if not bootstrapped:
+            if bootstrap is not None:
+                self.upsert_many(bootstrap())
+            self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('bootstrapped', '1')")
+            self.conn.commit()
+        return self
+
+    def __contains__(self, job_id) -> bool:
+        if job_id is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM job_ids WHERE id = ?", (str(job_id),)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM job_ids").fetchone()[0]
+
+    def get(self, job_id) -> Optional[str]:
+        """Content hash of the stored version of ``job_id``; None if it is unknown, "" if its hash is."""
+        if job_id is None:
+            return None
+        row = self.conn.execute("SELECT content_hash FROM job_ids WHERE id = ?", (str(job_id),)).fetchone()
+        return None if row is None else row[0] or ""
+
+    def add(self, job_id):
+        self.conn.execute("INSERT OR IGNORE INTO job_ids (id) VALUES (?)", (str(job_id),))
+
+    def add_many(self, job_ids: Iterable):
+        self.conn.executemany("INSERT OR IGNORE INTO job_ids (id) VALUES (?)", ((str(job_id),) for job_id in job_ids))
+
+    def upsert(self, job_id, content_hash: str):
+        self.conn.execute("INSERT OR REPLACE INTO job_ids VALUES (?, ?)", (str(job_id), content_hash))
+
+    def upsert_many(self, hashes: Iterable[Tuple[str, str]]):
+        """Store ``(id, content hash)`` pairs; a later pair for the same id wins."""
+        self.conn.executemany("INSERT OR REPLACE INTO job_ids VALUES (?, ?)", ((str(job_id), h) for job_id, h in hashes))
+
+    def record_version(self, crawl: str, item, change: str, content_hash: str):
+        """Add ``item`` to the history as the version ``crawl`` saw, ``change`` being NEW or CHANGED."""
+        record = json.dumps({name: item.get(name) for name in FIELDNAMES}, ensure_ascii=False)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO job_versions VALUES (?, ?, ?, ?, ?)",
+            (crawl, str(item.get("id")), change, content_hash, record),
+        )
+
+    def crawl_changes(self) -> pd.DataFrame:
+        """Number of new and changed jobs per crawl, latest crawl first."""
+        return pd.read_sql_query(
+            "SELECT crawl, SUM(change = 'new') AS new, SUM(change = 'changed') AS changed "
+            "FROM job_versions GROUP BY crawl ORDER BY crawl DESC",
+            self.conn,
+        )
+
+    def changes(self, crawl: str) -> pd.DataFrame:
+        """The jobs ``crawl`` added or changed, with the version it stored."""
+        df = pd.read_sql_query(
+            "SELECT id, change, content_hash, record FROM job_versions WHERE crawl = ? ORDER BY id",
+            self.conn,
+            params=(crawl,),
+        )
+        return _expand_records(df)
+
+    def history(self, job_id) -> pd.DataFrame:
+        """Every recorded version of one job, oldest first."""
+        df = pd.read_sql_query(
+            "SELECT crawl, change, content_hash, record FROM job_versions WHERE id = ? ORDER BY crawl",
+            self.conn,
+            params=(str(job_id),),
+        )
+        return _expand_records(df)
+
+    def load_checkpoint(self) -> Optional[Dict]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'checkpoint'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_checkpoint(self, checkpoint: Dict):
+        """Stage the checkpoint; it becomes durable with the next :meth:`commit`, together with the ids."""
+        self.conn.execute("INSERT OR REPLACE INTO meta VALUES ('checkpoint', ?)", (json.dumps(checkpoint),))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+
+def _expand_records(df: pd.DataFrame) -> pd.DataFrame:
+    records = pd.DataFrame([json.loads(record) for record in df.pop("record")], columns=FIELDNAMES)
+    return pd.concat([df, records.drop(columns=[column for column in df.columns if column in records])], axis=1)
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    changes = commands.add_parser("changes", help="new and changed jobs per crawl, or of one crawl")
+    changes.add_argument("--crawl", help="list the jobs of this crawl")
+    commands.add_parser("history", help="every recorded version of a job").add_argument("id")
+    args = arg_parser.parse_args()
+
+    settings = get_project_settings()
+    store = get_job_store(settings)
+    index = JobIdIndex(settings.get("EURAXESS_ID_INDEX_PATH")).open(bootstrap=lambda: iter_content_hashes(store))
+    if args.command == "changes" and args.crawl is None:
+        print(index.crawl_changes().to_string(index=False))
+    elif args.command == "changes":
+        print(index.changes(args.crawl)[["id", "change", "title", "application_deadline"]].to_string(index=False))
+    else:
+        print(index.history(args.id)[["crawl", "change", "title", "application_deadline"]].to_string(index=False))
+    index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""The processed dataset as the dashboard holds it in memory.
+
+A :class:`LiveDataset` follows the manifest the pipeline writes. Every rerun
+of the app calls :meth:`LiveDataset.refresh`, which only reads the manifest
+when nothing changed. When the pipeline appended parts, just those parts are
+loaded, appended to the frame, the filter index and the facet counts, and the
+rows they supersede are retired. The frame is only reloaded in full when the
+dataset was rebuilt (new schema version, or parts that are not an extension
+of the loaded ones) or when too many rows have been retired.
+
+The frame is held in the compact form of ``processing.compact_frame``
+(categoricals, Arrow-backed strings, packed profile flags), and the long
+descriptions are only read from the parts for the rows of a page the app
+shows, never for the whole dataset.
+
+Given a :class:`~euraxess.snapshot.SnapshotStore`, the frame and the filter
+index are memory-mapped from the current published snapshot instead, shared
+with every other process on the host, and swapped when the pipeline publishes
+the next one at the end of a crawl; parts appended in between are picked up
+with that swap. Without a current snapshot, the parts are loaded as above.
+
+Each change publishes a new :class:`QueryEngine`, so sessions keep answering
+from a consistent snapshot while the next one is prepared.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from euraxess.export import iter_rows
+from euraxess.facets import FacetCounts
+from euraxess.filter_index import FilterIndex
+from euraxess.processing import ProcessedDataset, compact_frame, concat_compact
+from euraxess.query import LRUCache, QueryEngine
+from euraxess.search import SearchIndex
+from euraxess.snapshot import SnapshotStore
+
+logger = logging.getLogger(__name__)
+
+
+class LiveDataset:
+    def __init__(
+        self,
+        dataset: ProcessedDataset,
+        columns: Optional[List[str]] = None,
+        search_index_path: Optional[str] = None,
+        expiry_interval: float = 3600,
+        compact_ratio: float = 0.25,
+        snapshots: Optional[SnapshotStore] = None,
+    ):
+        self.dataset = dataset
+        self.columns = columns
+        self.search_index_path = search_index_path
+        self.snapshots = snapshots
+        # How often rows whose deadline has passed are retired, and the retired share that triggers a full reload
+        self.expiry_interval = expiry_interval
+        self.compact_ratio = compact_ratio
+
+        self.lock = threading.Lock()
+        self.cache = LRUCache()
+        self.engine: Optional[QueryEngine] = None
+        self.generation = 0
+        self.manifest = None
+        self.search_mtime = None
+        # Name of the mapped snapshot, None while loaded from the parts
+        self.snapshot: Optional[str] = None
+        self.expired_at = 0.0
+        # Descriptions of the last pages shown, by the parts they were read from and the ids of the page
+        self.description_cache = LRUCache(maxsize=32)
+
+    def refresh(self) -> QueryEngine:
+        """Catch up with the dataset on disk and return the engine for its current state."""
+        with self.lock:
+            search_mtime = self._search_mtime()
+            snapshot = self.snapshots.current() if self.snapshots is not None else None
+            if snapshot is not None:
+                if snapshot != self.snapshot:
+                    self._map(snapshot, search_mtime)
+                elif search_mtime != self.search_mtime:
+                    engine = self.engine
+                    self._publish(engine.df, engine.filter_index, engine.id_positions, engine.facets, self._search_index(search_mtime))
+                    self.search_mtime = search_mtime
+                else:
+                    self._retire_expired()
+                return self.engine
+
+            manifest = self.dataset.current_manifest()
+            if self.engine is None or self.snapshot is not None or not self._extends(manifest):
+                self._reload(manifest, search_mtime)
+            elif manifest["version"] != self.manifest["version"] or search_mtime != self.search_mtime:
+                self._append(manifest, search_mtime)
+            else:
+                self._retire_expired()
+            return self.engine
+
+    def _retire_expired(self):
+        if time.time() - self.expired_at > self.expiry_interval:
+            engine = self.engine
+            expired = self._expired(engine.df)
+            filter_index = engine.filter_index.retire(expired)
+            if filter_index.n_live != engine.filter_index.n_live:
+                facets = engine.facets.retire(engine.df, engine.filter_index, expired)
+                self._publish(engine.df, filter_index, engine.id_positions, facets)
+
+    def _search_mtime(self) -> Optional[float]:
+        if self.search_index_path and os.path.exists(self.search_index_path):
+            return os.path.getmtime(self.search_index_path)
+        return None
+
+    def _search_index(self, search_mtime: Optional[float]) -> SearchIndex:
+        if self.engine is not None and search_mtime == self.search_mtime:
+            return self.engine.search_index
+        return SearchIndex.load(self.search_index_path) if search_mtime else SearchIndex()
+
+    def _extends(self, manifest) -> bool:
+        """Whether ``manifest`` only adds parts to the loaded one."""
+        if self.manifest is None or manifest["schema_version"] != self.manifest["schema_version"]:
+            return False
+        loaded = self.manifest["parts"]
+        return manifest["parts"][: len(loaded)] == loaded
+
+    def _expired(self, df: pd.DataFrame) -> np.ndarray:
+        """Positions of the rows whose application deadline has passed."""
+        self.expired_at = time.time()
+        return np.flatnonzero((df["application_deadline"] < pd.Timestamp.now()).to_numpy())
+
+    def _publish(self, df: pd.DataFrame, filter_index: FilterIndex, id_positions: pd.Series, facets: FacetCounts, search_index=None):
+        self.generation += 1
+        self.engine = QueryEngine(
+            df,
+            filter_index,
+            search_index if search_index is not None else self.engine.search_index,
+            version=self.generation,
+            cache=self.cache,
+            id_positions=id_positions,
+            facets=facets,
+        )
+
+    def _map(self, name: str, search_mtime):
+        snapshot = self.snapshots.open(name)
+        df = snapshot.frame(self.columns)
+        # The mapped frame is read-only; rows that expired since it was published are retired instead
+        filter_index = snapshot.filter_index().retire(self._expired(df))
+        id_positions = pd.Series(np.arange(len(df)), index=df["id"])
+        self._publish(df, filter_index, id_positions, FacetCounts.build(df, filter_index), self._search_index(search_mtime))
+        self.manifest, self.search_mtime, self.snapshot = snapshot.manifest, search_mtime, name
+        logger.info(f"Mapped {len(df)} jobs from {name}, dataset version {snapshot.manifest['version']}")
+
+    def _reload(self, manifest, search_mtime):
+        df = compact_frame(self.dataset.load_parts(manifest["parts"], self.columns))
+        # Expired rows are left out of a fresh frame rather than retired
+        df = df.drop(index=self._expired(df)).reset_index(drop=True)
+        # Read after the manifest, so it has every term the loaded parts use
+        filter_index = FilterIndex.build(df, self.dataset.read_taxonomy())
+        id_positions = pd.Series(np.arange(len(df)), index=df["id"])
+        self._publish(df, filter_index, id_positions, FacetCounts.build(df, filter_index), self._search_index(search_mtime))
+        self.manifest, self.search_mtime, self.snapshot = manifest, search_mtime, None
+        logger.info(f"Loaded {len(df)} jobs at dataset version {manifest['version']}")
+
+    def _append(self, manifest, search_mtime):
+        engine = self.engine
+        new_parts = manifest["parts"][len(self.manifest["parts"]) :]
+        added = compact_frame(self.dataset.load_parts(new_parts, self.columns))
+        superseded = engine.id_positions.reindex(added["id"]).dropna().to_numpy(dtype=np.int64)
+        added = added.drop(index=self._expired(added)).reset_index(drop=True)
+
+        retired = np.concatenate([superseded, self._expired(engine.df)])
+        filter_index = engine.filter_index.retire(retired)
+        if filter_index.n_rows - filter_index.n_live > self.compact_ratio * (filter_index.n_rows + len(added)):
+            self._reload(manifest, search_mtime)
+            return
+
+        facets = engine.facets.retire(engine.df, engine.filter_index, retired)
+        offset = len(engine.df)
+        df = engine.df
+        if len(added):
+            df = concat_compact(df, added)
+            added_index = FilterIndex.build(added, self.dataset.read_taxonomy())
+            filter_index = filter_index.extend(added, added_index)
+            facets = facets.extend(added, added_index)
+        id_positions = engine.id_positions.drop(added["id"], errors="ignore")
+        id_positions = pd.concat([id_positions, pd.Series(np.arange(offset, offset + len(added)), index=added["id"])])
+        self._publish(df, filter_index, id_positions, facets, self._search_index(search_mtime))
+        self.manifest, self.search_mtime = manifest, search_mtime
+        logger.info(f"Appended {len(added)} jobs from {len(new_parts)} parts, dataset version {manifest['version']}")
+
+    def descriptions(self, ids: List[str]) -> pd.Series:
+        """Description of each of ``ids`` (e.g. the jobs of one page), keyed by id."""
+        with self.lock:
+            parts = self.row_parts()
+        key = (tuple(parts), tuple(ids))
+        descriptions = self.description_cache.get(key)
+        if descriptions is None:
+            chunks = list(iter_rows(self.dataset, parts, ids, ["id", "description"]))
+            descriptions = pd.concat(chunks).set_index("id")["description"] if chunks else pd.Series(dtype=object)
+            self.description_cache.put(key, descriptions)
+        return descriptions
+
+    def row_parts(self) -> List[str]:
+        """Parts to read the columns the frame leaves out from, such as descriptions."""
+        if self.snapshot is not None:
+            # A mapped snapshot's parts are gone once the pipeline rebuilds or rolls back the dataset; the current ones hold the same jobs or newer
+            return list(self.dataset.current_manifest()["parts"])
+        return list(self.manifest["parts"])
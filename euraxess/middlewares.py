@@ -3,98 +3,188 @@
 # See documentation in:
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
-from scrapy import signals
+import time
 
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
+from scrapy import Request, signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.task import deferLater
+
+from euraxess.ratecontrol import AimdController, RateLimits, parse_retry_after
+from euraxess.telemetry import get_telemetry
+
+_DONE = object()
 
 
 class EuraxessSpiderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the spider middleware does not modify the
-    # passed objects.
+    """Records items, follow-up requests and callback time for every parsed page."""
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
+        if not crawler.settings.getbool("EURAXESS_TELEMETRY"):
+            raise NotConfigured
+        s = cls(get_telemetry(crawler))
         crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
         return s
 
-    def process_spider_input(self, response, spider):
-        # Called for each response that goes through the spider
-        # middleware and into the spider.
-
-        # Should return None or raise an exception.
-        return None
-
     def process_spider_output(self, response, result, spider):
-        # Called with the results returned from the Spider, after
-        # it has processed the response.
-
-        # Must return an iterable of Request, or item objects.
-        for i in result:
-            yield i
+        page = self.telemetry.page_parsed(response)
+        # Only the time spent inside the callback counts as parse time, not the
+        # time the consumer of this generator spends on each yielded object
+        result = iter(result)
+        while True:
+            start = time.perf_counter()
+            item_or_request = next(result, _DONE)
+            page.parse_seconds += time.perf_counter() - start
+            if item_or_request is _DONE:
+                return
+            self.record(page, item_or_request)
+            yield item_or_request
 
-    def process_spider_exception(self, response, exception, spider):
-        # Called when a spider or process_spider_input() method
-        # (from other spider middleware) raises an exception.
+    async def process_spider_output_async(self, response, result, spider):
+        page = self.telemetry.page_parsed(response)
+        result = result.__aiter__()
+        while True:
+            start = time.perf_counter()
+            try:
+                item_or_request = await result.__anext__()
+            except StopAsyncIteration:
+                page.parse_seconds += time.perf_counter() - start
+                return
+            page.parse_seconds += time.perf_counter() - start
+            self.record(page, item_or_request)
+            yield item_or_request
 
-        # Should return either None or an iterable of Request or item objects.
-        pass
+    def record(self, page, item_or_request):
+        if isinstance(item_or_request, Request):
+            page.requests += 1
+        else:
+            self.telemetry.item_yielded(page, item_or_request)
 
     async def process_start(self, start):
-        # Called with an async iterator over the spider start() method or the
-        # maching method of an earlier spider middleware.
         async for item_or_request in start:
             yield item_or_request
 
     def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+        spider.logger.info("Crawl telemetry enabled for spider %s" % spider.name)
 
 
 class EuraxessDownloaderMiddleware:
-    # Not all methods need to be defined. If a method is not defined,
-    # scrapy acts as if the downloader middleware does not modify the
-    # passed objects.
+    """Records latency, body size, status and retries of every download.
+
+    Enabled close to the downloader (see ``DOWNLOADER_MIDDLEWARES``) so the
+    latency excludes the other middlewares, the body size is what came over
+    the wire and every retry issued by ``RetryMiddleware`` passes through.
+    """
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
 
     @classmethod
     def from_crawler(cls, crawler):
-        # This method is used by Scrapy to create your spiders.
-        s = cls()
-        crawler.signals.connect(s.spider_opened, signal=signals.spider_opened)
-        return s
+        if not crawler.settings.getbool("EURAXESS_TELEMETRY"):
+            raise NotConfigured
+        return cls(get_telemetry(crawler))
 
     def process_request(self, request, spider):
-        # Called for each request that goes through the downloader
-        # middleware.
-
-        # Must either:
-        # - return None: continue processing this request
-        # - or return a Response object
-        # - or return a Request object
-        # - or raise IgnoreRequest: process_exception() methods of
-        #   installed downloader middleware will be called
+        request.meta["telemetry_sent_at"] = time.perf_counter()
+        self.telemetry.request_sent(request)
         return None
 
     def process_response(self, request, response, spider):
-        # Called with the response returned from the downloader.
-
-        # Must either;
-        # - return a Response object
-        # - return a Request object
-        # - or raise IgnoreRequest
+        sent_at = request.meta.pop("telemetry_sent_at", None)
+        if sent_at is not None:
+            self.telemetry.response_received(response, time.perf_counter() - sent_at)
         return response
 
     def process_exception(self, request, exception, spider):
-        # Called when a download handler or a process_request()
-        # (from other downloader middleware) raises an exception.
+        request.meta.pop("telemetry_sent_at", None)
+        self.telemetry.download_failed(exception)
+        return None
 
-        # Must either:
-        # - return None: continue processing this exception
-        # - return a Response object: stops process_exception() chain
-        # - return a Request object: stops process_exception() chain
-        pass
 
-    def spider_opened(self, spider):
-        spider.logger.info("Spider opened: %s" % spider.name)
+class EuraxessRateControlMiddleware:
+    """Paces the downloads of each slot with an AIMD controller.
+
+    See ``euraxess/ratecontrol.py``. Requests wait here until the controller
+    lets them through, so the slot's own delay and concurrency are lifted out
+    of the way. Enabled after the HTTP cache, so cached responses do not count
+    as healthy, and before ``RetryMiddleware`` sees a response, so every 429
+    and its ``Retry-After`` reach the controller.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        settings = crawler.settings
+        self.limits = RateLimits.from_settings(settings)
+        self.start_delay = settings.getfloat("DOWNLOAD_DELAY")
+        self.start_concurrency = settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN")
+        self.jitter = 0.5 if settings.getbool("RANDOMIZE_DOWNLOAD_DELAY") else 0.0
+        self.controllers = {}
+        self.waiters = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool("EURAXESS_RATE_CONTROL"):
+            raise NotConfigured
+        return cls(crawler)
+
+    def controller(self, key) -> AimdController:
+        if key not in self.controllers:
+            self.controllers[key] = AimdController(self.limits, self.start_delay, self.start_concurrency, self.jitter)
+            self.waiters[key] = []
+        return self.controllers[key]
+
+    async def process_request(self, request, spider):
+        downloader = self.crawler.engine.downloader
+        key = downloader.get_slot_key(request)
+        controller = self.controller(key)
+        while True:
+            wait = controller.wait_time()
+            if wait is None:
+                # Woken up when a request of this slot finishes
+                waiter = Deferred()
+                self.waiters[key].append(waiter)
+                await maybe_deferred_to_future(waiter)
+            elif wait > 0:
+                await maybe_deferred_to_future(deferLater(reactor, wait, lambda: None))
+            else:
+                break
+        request.meta["rate_slot"] = key
+        request.meta["rate_sent_at"] = controller.acquire()
+
+        slot = downloader.slots.get(key)
+        if slot is not None:
+            slot.delay = 0
+            slot.concurrency = self.limits.max_concurrency
+        return None
+
+    def process_response(self, request, response, spider):
+        self.observe(request, spider, response.status, response.headers.get("Retry-After"))
+        return response
+
+    def process_exception(self, request, exception, spider):
+        self.observe(request, spider, None, None)
+        return None
+
+    def observe(self, request, spider, status, retry_after):
+        key = request.meta.pop("rate_slot", None)
+        sent_at = request.meta.pop("rate_sent_at", None)
+        if key is None:
+            return
+        controller = self.controllers[key]
+        controller.release()
+        retry_after = parse_retry_after(retry_after)
+        if controller.observe(sent_at, status, request.meta.get("download_latency"), retry_after):
+            spider.logger.debug(f"Rate for {key}: delay {controller.delay:.2f}s, concurrency {controller.concurrency}")
+        if retry_after:
+            spider.logger.info(f"{key} answered {status} with Retry-After, pausing requests for {retry_after:.1f}s")
+
+        waiters, self.waiters[key] = self.waiters[key], []
+        for waiter in waiters:
+            waiter.callback(None)
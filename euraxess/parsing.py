@@ -0,0 +1,137 @@
+"""Parser for the job cards of a Euraxess search results page.
+
+Each card is read in one walk over its subtree: elements are recognised by
+their Europa Component Library classes (``ecl-content-block__*``,
+``ecl-description-list__item id-*``) rather than by absolute positions, and
+any node the card lacks leaves its field as None instead of raising. It works
+on a plain lxml tree, so saved pages can be re-parsed without Scrapy:
+
+    with open("page.html", "rb") as f:
+        jobs = parse_cards(parse_html(f.read()), "https://euraxess.ec.europa.eu/jobs/search")
+"""
+
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from euraxess.storage import FIELDNAMES
+
+# Description list entries holding a single value
+_SINGLE_VALUES = {"id-Department": "department", "id-Work-Locations": "location"}
+
+
+@lru_cache(maxsize=None)
+def _html_parser(encoding: str) -> etree.HTMLParser:
+    return etree.HTMLParser(encoding=encoding)
+
+
+def parse_html(html: bytes, encoding: str = "utf-8"):
+    """Parse a page into a plain lxml tree.
+
+    Plain elements are much cheaper to walk than ``lxml.html`` ones (which
+    Scrapy selectors use), so the spider parses the body itself.
+    """
+    return etree.fromstring(html, _html_parser(encoding))
+
+
+@lru_cache(maxsize=64)
+def _origin(base_url: str) -> str:
+    return urljoin(base_url, "/")[:-1]
+
+
+def _join(base_url: str, href: str) -> str:
+    # Card links are site-absolute paths, which only need the origin
+    if href.startswith("/") and not href.startswith("//"):
+        return _origin(base_url) + href
+    return urljoin(base_url, href)
+
+
+def _clean_line_breaks(text: Optional[str]) -> Optional[str]:
+    """Utility function to clean line breaks from text."""
+    return text.replace("\n", "").strip() if text else None
+
+
+def _direct_texts(element) -> List[str]:
+    """Text nodes directly under ``element``, like XPath ``text()``."""
+    texts = [element.text] if element.text is not None else []
+    texts += [child.tail for child in element if child.tail is not None]
+    return texts
+
+
+def _first_text(element) -> Optional[str]:
+    if element is None:
+        return None
+    texts = _direct_texts(element)
+    return texts[0] if texts else None
+
+
+def _first(element, tag: str):
+    return next(element.iter(tag), None)
+
+
+def _description_list_value(item, key: str, job: Dict):
+    divs = [child for child in item if child.tag == "div"]
+    value = divs[1] if len(divs) > 1 else None
+    if key in _SINGLE_VALUES:
+        job[_SINGLE_VALUES[key]] = _clean_line_breaks(_first_text(value))
+    elif key == "id-Research-Field":
+        job["field"] = _clean_line_breaks(";".join(value.itertext())) if value is not None else None
+    elif key == "id-Researcher-Profile":
+        job["profile"] = _clean_line_breaks(";".join(text for a in item.iter("a") for text in _direct_texts(a)))
+    elif key == "id-Funding-Programme":
+        job["funding_program"] = next((text for a in item.iter("a") for text in _direct_texts(a)), None)
+    elif key == "id-Application-Deadline":
+        job["application_deadline"] = _first_text(_first(item, "time"))
+
+
+def parse_card(card, base_url: str) -> Dict[str, Optional[str]]:
+    """Extract one job card; fields whose node is missing are None."""
+    job: Dict[str, Optional[str]] = dict.fromkeys(FIELDNAMES)
+    meta_items = []
+    # Every node of interest is one of these tags, filtering them in lxml keeps the walk cheap
+    for element in card.iter("h3", "div", "li"):
+        classes = element.get("class") or ""
+        if element.tag == "h3" and job["link"] is None:
+            anchor = _first(element, "a")
+            href = anchor.get("href") if anchor is not None else None
+            if href:
+                job["link"] = _join(base_url, href)
+                job["id"] = job["link"].split("/")[-1]
+            job["title"] = _first_text(_first(anchor, "span")) if anchor is not None else None
+        elif "ecl-content-block__label-container" in classes:
+            labels = [_first_text(span) for span in element.iter("span")]
+            job["type"] = labels[0] if labels else None
+            job["country"] = labels[1] if len(labels) > 1 else None
+        elif "ecl-content-block__primary-meta-item" in classes:
+            meta_items.append(element)
+        elif "ecl-content-block__description" in classes:
+            job["description"] = _first_text(_first(element, "p"))
+        elif "ecl-description-list__item" in classes:
+            for key in classes.split():
+                if key.startswith("id-"):
+                    _description_list_value(element, key, job)
+
+    if meta_items:
+        job["university"] = _first_text(_first(meta_items[0], "a"))
+    if len(meta_items) > 1:
+        posted_on = _first_text(meta_items[1])
+        job["posted_on"] = posted_on.replace("Posted on ", "") if posted_on is not None else None
+    return job
+
+
+def cards(root) -> list:
+    return root.xpath("//li[article]")
+
+
+def parse_cards(root, base_url: str) -> Iterator[Dict[str, Optional[str]]]:
+    for card in cards(root):
+        yield parse_card(card, base_url)
+
+
+def total_pages(root) -> int:
+    """Number of result pages, the highest page number in the pager."""
+    labels = root.xpath('//*[@id="oe-list-container"]//nav//li/a/text()')
+    numbers = [int(label.strip()) for label in labels if label.strip().isdigit()]
+    return max(numbers, default=0)
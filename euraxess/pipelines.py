@@ -4,48 +4,147 @@
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
 
-import csv
+import datetime
 
 import pandas as pd
 
-# useful for handling different item types with a single interface
+from euraxess.checkpoint import make_checkpoint, roll_back
+from euraxess.details import DetailStore
+from euraxess.idindex import CHANGED, NEW, JobIdIndex
+from euraxess.processing import ProcessedDataset, process_frame
+from euraxess.search import job_text, open_search_index
+from euraxess.snapshot import SnapshotStore
+from euraxess.storage import FIELDNAMES, content_hash, get_job_store, iter_content_hashes
+from euraxess.telemetry import duplicate_skipped
 
-df = pd.read_csv("output/jobs.csv")
-jobs_id = set(df["id"].tolist())
+# useful for handling different item types with a single interface
 
 
 class EuraxessPipeline:
     def open_spider(self, spider):
-        self.file = open("output/jobs.csv", "a", encoding="utf-8")
-        fieldnames = [
-            "id",
-            "type",
-            "country",
-            "university",
-            "posted_on",
-            "title",
-            "link",
-            "description",
-            "department",
-            "location",
-            "field",
-            "profile",
-            "funding_program",
-            "application_deadline",
-        ]
-        self.writer = csv.DictWriter(self.file, fieldnames=fieldnames)
-        spider.logger.info("EuraxessPipeline initialized and file opened for writing.")
+        settings = spider.settings
+        self.store = get_job_store(settings)
+        # The index is bootstrapped from the store on first use, so open it
+        # before the store is created or appended to
+        self.index = JobIdIndex(settings.get("EURAXESS_ID_INDEX_PATH")).open(bootstrap=lambda: iter_content_hashes(self.store))
+        # Versions this crawl records in the index history are filed under its start time
+        self.crawl = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        self.changes = {NEW: 0, CHANGED: 0}
+        self.batch_size = settings.getint("EURAXESS_WRITE_BATCH_SIZE")
+        self.compact_segments = settings.getint("EURAXESS_COMPACT_SEGMENTS")
+        self.checkpoint_pages = settings.getint("EURAXESS_CHECKPOINT_PAGES")
+        self.checkpointed_pages = 0
+
+        self.processed = ProcessedDataset(settings.get("EURAXESS_PROCESSED_DIR"))
+        checkpoint = self.index.load_checkpoint()
+        if getattr(spider, "resume", False) and checkpoint:
+            # Rows past the checkpoint belong to pages the resumed crawl fetches again
+            roll_back(checkpoint, self.store, self.processed)
+            spider.logger.info(f"Job store rolled back to the checkpoint of {checkpoint['updated_at']}.")
+        if not self.processed.is_current():
+            spider.logger.info("Processed dataset missing or outdated, rebuilding it from the job store.")
+            self.processed.rebuild(self.store)
+        self.pending = []
+
+        self.search_index_path = settings.get("EURAXESS_SEARCH_INDEX_PATH")
+        self.search_index = open_search_index(self.search_index_path, self.processed)
+        self.snapshot_dir = settings.get("EURAXESS_SNAPSHOT_DIR")
+
+        self.store.open()
+        if checkpoint is None or not getattr(spider, "resume", False):
+            # Rows flushed before the first checkpoint of this crawl are rolled back to here on resume, like any
+            # later ones; a resumed crawl keeps its checkpoint, the spider reads its progress from it
+            self.index.save_checkpoint(make_checkpoint(self.store, self.processed, None))
+            self.index.commit()
+        spider.logger.info(
+            f"EuraxessPipeline initialized with {len(self.index)} known jobs, "
+            f"writing to the {settings.get('EURAXESS_STORAGE')} store."
+        )
 
     def close_spider(self, spider):
-        self.file.close()
-        spider.logger.info("EuraxessPipeline closed and file saved.")
+        self.flush(spider)
+        self.store.close()
+        if self.compact_segments and len(self.store.segments()) > self.compact_segments:
+            dropped = self.store.compact()
+            spider.logger.info(f"Job store compacted, {dropped} duplicate rows dropped.")
+        self.index.close()
+        self.search_index.save(self.search_index_path)
+        if self.snapshot_dir:
+            # The app and the API swap to the new snapshot with the search index saved just before
+            name = SnapshotStore(self.snapshot_dir).publish(self.processed)
+            if name:
+                spider.logger.info(f"Snapshot {name} published.")
+        spider.logger.info(
+            f"EuraxessPipeline closed and file saved: {self.changes[NEW]} new and {self.changes[CHANGED]} changed jobs "
+            f"in crawl {self.crawl}."
+        )
+
+    def flush(self, spider=None):
+        # Rows reach the store before their ids are committed, so a crash can
+        # only ever forget an id, never claim a row that was not written. The
+        # checkpoint commits with the ids, so a resumed crawl can drop such rows.
+        self.store.flush()
+        if self.pending:
+            self.processed.append(process_frame(pd.DataFrame(self.pending, columns=FIELDNAMES), self.processed.taxonomy))
+            for item in self.pending:
+                self.search_index.add(item["id"], job_text(item.get("title"), item.get("description")))
+            self.search_index.dataset_parts = self.processed.read_manifest()["parts"]
+            self.pending = []
+        progress = spider.checkpoint_progress() if hasattr(spider, "checkpoint_progress") else None
+        self.index.save_checkpoint(make_checkpoint(self.store, self.processed, progress))
+        self.index.commit()
+        if progress is not None:
+            self.checkpointed_pages = len(progress.pages_done)
 
     def process_item(self, item, spider):
+        if self.checkpoint_pages and len(getattr(spider, "pages_done", ())) - self.checkpointed_pages >= self.checkpoint_pages:
+            self.flush(spider)
+
         job_id = item.get("id")
-        if job_id in jobs_id:
+        digest = content_hash(item)
+        stored = self.index.get(job_id)
+        if stored == digest:
             spider.logger.info(f"Job {job_id} already exists, skipping.")
+            if hasattr(spider, "crawler"):
+                spider.crawler.signals.send_catch_log(duplicate_skipped, item=item, spider=spider)
             # Close the spider if the job already exists
             # spider.crawler.engine.close_spider(spider, "Job already exists")
             return item
-        self.writer.writerow(item)
+        # A changed job is stored as a new version; readers keep the latest row of every id
+        change = NEW if stored is None else CHANGED
+        if change == CHANGED:
+            spider.logger.info(f"Job {job_id} changed since it was stored, storing the new version.")
+        self.store.write(item)
+        self.index.upsert(job_id, digest)
+        self.index.record_version(self.crawl, item, change, digest)
+        self.changes[change] += 1
+
+        self.pending.append(dict(item))
+        if len(self.pending) >= self.batch_size:
+            self.flush(spider)
+        return item
+
+
+class EuraxessDetailsPipeline:
+    """Upserts the detail pages and their validators fetched by the euraxess_details spider."""
+
+    def open_spider(self, spider):
+        self.details = DetailStore(spider.settings.get("EURAXESS_DETAILS_PATH")).open()
+        self.batch_size = spider.settings.getint("EURAXESS_WRITE_BATCH_SIZE")
+        self.pending = 0
+
+    def close_spider(self, spider):
+        self.details.commit()
+        spider.logger.info(f"EuraxessDetailsPipeline closed with {len(self.details)} detail pages stored.")
+        self.details.close()
+
+    def process_item(self, item, spider):
+        if item.get("validators_only"):
+            self.details.update_validators(item)
+        else:
+            self.details.upsert(item)
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.details.commit()
+            self.pending = 0
         return item
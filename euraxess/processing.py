@@ -0,0 +1,285 @@
+"""Derived columns computed once at ingest, and the processed dataset they go to.
+
+The pipeline runs :func:`process_frame` on every batch it flushes and appends
+the result to the processed dataset, a directory of Parquet parts listed in a
+``manifest.json`` that carries the schema version. The dashboard loads that
+dataset as-is. The research-field taxonomy the ``field_terms`` of every row
+refer to is kept next to the manifest, see ``euraxess/taxonomy.py``. When
+the derivation changes, bump ``SCHEMA_VERSION`` and
+rebuild from the job store:
+
+    python -m euraxess.processing rebuild
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from euraxess.dates import deadline_parser, posted_on_parser
+from euraxess.storage import FIELDNAMES
+from euraxess.taxonomy import FieldTerms, Taxonomy
+
+# Bump whenever process_frame changes what it produces
+SCHEMA_VERSION = 3
+
+PROFILE_PATTERNS = ["R1", "R2", "R3", "R4"]
+
+# Columns with few distinct values, held as categoricals by compact_frame
+CATEGORY_COLUMNS = ["type", "country", "university", "funding_program", "profile", "application_deadline_tz"]
+
+
+def processed_schema():
+    """Arrow schema of the processed dataset, fixed so every part has the same types."""
+    import pyarrow as pa
+
+    types = {"posted_on": pa.timestamp("us"), "application_deadline": pa.timestamp("us")}
+    fields = [pa.field(name, types.get(name, pa.string())) for name in FIELDNAMES]
+    fields += [pa.field(pattern, pa.bool_()) for pattern in PROFILE_PATTERNS]
+    fields += [pa.field("field_1", pa.string()), pa.field("field_2", pa.string()), pa.field("field_terms", pa.list_(pa.int32()))]
+    fields += [pa.field("application_deadline_tz", pa.string())]
+    return pa.schema(fields)
+
+
+def process_frame(df: pd.DataFrame, taxonomy: Optional[Taxonomy] = None, field_terms: Optional[FieldTerms] = None) -> pd.DataFrame:
+    """Add the derived columns the dashboard filters on to a frame of raw jobs.
+
+    With the processed dataset's ``taxonomy``, or the rows' ``field_terms``
+    already mapped into it, the term ids are added as ``field_terms`` too;
+    otherwise ``ProcessedDataset.append`` adds them.
+    """
+    df = df.copy()
+
+    df["posted_on"] = posted_on_parser.parse(df["posted_on"]).values
+
+    # Create boolean columns for each profile
+    for pattern in PROFILE_PATTERNS:
+        df[pattern] = df["profile"].str.contains(pattern, case=False, na=False)
+
+    # Each distinct field text is parsed once, into the terms of the taxonomy
+    keep_terms = taxonomy is not None or field_terms is not None
+    if field_terms is None:
+        field_terms = (taxonomy if taxonomy is not None else Taxonomy()).map_fields(df["field"])
+    df["field_1"], df["field_2"] = field_terms.labels()
+    if keep_terms:
+        df["field_terms"] = field_terms.lists(df.index)
+
+    # The timezone in brackets is kept next to the (naive) deadline
+    deadlines = deadline_parser.parse(df["application_deadline"])
+    df["application_deadline"] = deadlines.values
+    df["application_deadline_tz"] = deadlines.timezones
+    return df
+
+
+def profile_flags(df: pd.DataFrame) -> np.ndarray:
+    """The profile columns of every row as one byte, bit ``i`` standing for ``PROFILE_PATTERNS[i]``."""
+    if "profile_flags" in df:
+        return df["profile_flags"].to_numpy(dtype=np.uint8)
+    flags = np.zeros(len(df), dtype=np.uint8)
+    for bit, pattern in enumerate(PROFILE_PATTERNS):
+        flags |= df[pattern].to_numpy(dtype=bool).astype(np.uint8) << bit
+    return flags
+
+
+def compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """The in-memory form of processed rows the dashboard holds.
+
+    Repetitive columns become categoricals, the remaining text Arrow-backed
+    strings, and the profile booleans are packed into ``profile_flags``.
+    """
+    columns = {}
+    if all(pattern in df for pattern in PROFILE_PATTERNS):
+        columns["profile_flags"] = profile_flags(df)
+    for column in df.columns:
+        if column in PROFILE_PATTERNS and "profile_flags" in columns:
+            continue
+        if column in CATEGORY_COLUMNS:
+            columns[column] = df[column].astype("category")
+        elif df[column].dtype == object:
+            columns[column] = df[column].astype(pd.StringDtype("pyarrow"))
+        else:
+            columns[column] = df[column]
+    return pd.DataFrame(columns, index=df.index)
+
+
+def concat_compact(first: pd.DataFrame, second: pd.DataFrame) -> pd.DataFrame:
+    """Append compact frames; categories are extended, not recoded, so categoricals stay categoricals."""
+    first_columns, second_columns = {}, {}
+    for column in CATEGORY_COLUMNS:
+        if column not in first or column not in second:
+            continue
+        categories = first[column].cat.categories
+        new = second[column].cat.categories.difference(categories)
+        if len(new):
+            first_columns[column] = first[column].cat.add_categories(new)
+            categories = first_columns[column].cat.categories
+        second_columns[column] = second[column].cat.set_categories(categories)
+    return pd.concat([first.assign(**first_columns), second.assign(**second_columns)], ignore_index=True)
+
+
+class ProcessedDataset:
+    """Append-only directory of processed Parquet parts plus a manifest."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.taxonomy_path = os.path.join(root, "taxonomy.json")
+        self._taxonomy: Optional[Taxonomy] = None
+        self._saved_terms = 0
+
+    def read_manifest(self) -> Optional[Dict]:
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def is_current(self) -> bool:
+        manifest = self.read_manifest()
+        return manifest is not None and manifest["schema_version"] == SCHEMA_VERSION
+
+    def _write_manifest(self, manifest: Dict):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def read_taxonomy(self) -> Taxonomy:
+        """The taxonomy as last saved; it covers the terms of every part in the manifest read before it."""
+        return Taxonomy.load(self.taxonomy_path)
+
+    @property
+    def taxonomy(self) -> Taxonomy:
+        """The taxonomy appended batches are mapped into; terms are only ever added, so ids stay valid."""
+        if self._taxonomy is None:
+            self._taxonomy = self.read_taxonomy()
+            self._saved_terms = len(self._taxonomy)
+        return self._taxonomy
+
+    def reset(self):
+        """Start an empty dataset at the current schema version."""
+        os.makedirs(self.root, exist_ok=True)
+        previous = self.read_manifest() or {"version": 0}
+        self._write_manifest({"schema_version": SCHEMA_VERSION, "version": previous["version"] + 1, "rows": 0, "parts": []})
+        for name in os.listdir(self.root):
+            if name.startswith("part-"):
+                os.remove(os.path.join(self.root, name))
+        if os.path.exists(self.taxonomy_path):
+            os.remove(self.taxonomy_path)
+        self._taxonomy, self._saved_terms = Taxonomy(), 0
+
+    def append(self, processed: pd.DataFrame):
+        """Write one processed batch as a new part and publish it in the manifest.
+
+        The batch's ``field_terms`` must come from :attr:`taxonomy`; without
+        them they are mapped from the ``field`` column here.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if processed.empty:
+            return
+        if "field_terms" not in processed:
+            processed = processed.assign(field_terms=self.taxonomy.map_fields(processed["field"]).lists(processed.index))
+        # Saved before the manifest, so readers of a manifest find every term its parts use
+        if len(self.taxonomy) != self._saved_terms:
+            self.taxonomy.save(self.taxonomy_path)
+            self._saved_terms = len(self.taxonomy)
+        schema = processed_schema()
+        # The schema is fixed; pandas' metadata is left out, it cannot name the list dtype of field_terms on read
+        table = pa.Table.from_pandas(processed[schema.names], schema=schema, preserve_index=False).replace_schema_metadata()
+        manifest = self.read_manifest()
+        version = manifest["version"] + 1
+        name = f"part-{version:08d}.parquet"
+        tmp_path = os.path.join(self.root, f".{name}.tmp")
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, os.path.join(self.root, name))
+
+        manifest.update(version=version, rows=manifest["rows"] + len(processed), parts=manifest["parts"] + [name])
+        self._write_manifest(manifest)
+
+    def truncate(self, parts: List[str]):
+        """Drop the parts appended after ``parts``, e.g. by a crawl that died before its checkpoint."""
+        import pyarrow.parquet as pq
+
+        manifest = self.read_manifest()
+        if manifest is None or manifest["parts"][: len(parts)] != parts or len(manifest["parts"]) == len(parts):
+            return
+        dropped = manifest["parts"][len(parts) :]
+        rows = sum(pq.ParquetFile(os.path.join(self.root, name)).metadata.num_rows for name in dropped)
+        manifest.update(version=manifest["version"] + 1, rows=manifest["rows"] - rows, parts=parts)
+        self._write_manifest(manifest)
+        for name in dropped:
+            os.remove(os.path.join(self.root, name))
+
+    def current_manifest(self) -> Dict:
+        """The manifest, checked against the schema version this code produces."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            raise FileNotFoundError(self.manifest_path)
+        if manifest["schema_version"] != SCHEMA_VERSION:
+            raise ValueError(
+                f"Processed dataset has schema version {manifest['schema_version']}, expected {SCHEMA_VERSION}. "
+                "Run `python -m euraxess.processing rebuild`."
+            )
+        return manifest
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load the parts listed in the manifest; later parts win on duplicate ids."""
+        return self.load_parts(self.current_manifest()["parts"], columns)
+
+    def load_parts(self, parts: List[str], columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Load the given parts, in order; later parts win on duplicate ids."""
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not parts:
+            return pd.DataFrame(columns=columns)
+        paths = [os.path.join(self.root, name) for name in parts]
+        # List columns (field_terms) stay Arrow arrays instead of a NumPy array per row
+        table = ds.dataset(paths, format="parquet").to_table(columns=columns)
+        df = table.to_pandas(types_mapper=lambda t: pd.ArrowDtype(t) if pa.types.is_list(t) else None)
+        return df.drop_duplicates("id", keep="last", ignore_index=True)
+
+    def rebuild(self, store, chunksize: int = 50_000, processes: Optional[int] = None):
+        """Reprocess the whole job store into a fresh dataset.
+
+        The taxonomy is built first from all field texts in one batch, in a
+        process pool if there are many, so the chunks only look their terms up.
+        """
+        self.reset()
+        if not store.exists():
+            return
+        df = store.read(columns=FIELDNAMES)
+        field_terms = self.taxonomy.map_fields(df["field"], processes)
+        for start in range(0, len(df), chunksize):
+            rows = slice(start, start + chunksize)
+            self.append(process_frame(df.iloc[rows], field_terms=field_terms[rows]))
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    from euraxess.storage import get_job_store
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    rebuild = commands.add_parser("rebuild", help="reprocess the whole job store")
+    rebuild.add_argument("--processes", type=int, help="processes parsing the research fields (default: one per CPU for large stores)")
+    args = arg_parser.parse_args()
+
+    settings = get_project_settings()
+    dataset = ProcessedDataset(settings.get("EURAXESS_PROCESSED_DIR"))
+    dataset.rebuild(get_job_store(settings), processes=args.processes)
+    print(f"Processed dataset rebuilt: {dataset.read_manifest()['rows']} rows")
+    if settings.get("EURAXESS_SNAPSHOT_DIR"):
+        from euraxess.snapshot import SnapshotStore
+
+        print(f"Snapshot {SnapshotStore(settings.get('EURAXESS_SNAPSHOT_DIR')).publish(dataset)} published")
+
+
+if __name__ == "__main__":
+    main()
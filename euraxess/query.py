@@ -0,0 +1,171 @@
+"""Query layer between the dashboard and its indexes.
+
+A :class:`QueryEngine` answers a selection (sidebar filters plus an optional
+search term) with the positions of the matching rows, never a copied frame.
+Answers are kept in a bounded LRU cache keyed by the dataset version and the
+normalized selection, so identical selections from any session are served
+without touching the indexes again. Sorted answers are cached the same way,
+and only the rows of the page being shown are ever materialized.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from euraxess.facets import FacetCounts
+from euraxess.filter_index import DIMENSIONS, FilterIndex
+from euraxess.search import SearchIndex, tokenize
+
+
+class LRUCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Hashable, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self.entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def normalize_selection(selection: Dict[str, Iterable[str]], search_term: Optional[str] = None) -> Tuple:
+    """Order-insensitive, hashable form of a selection."""
+    key = tuple((dimension, tuple(sorted(set(selection.get(dimension) or [])))) for dimension in DIMENSIONS)
+    return key + (("search", " ".join(tokenize(search_term))),)
+
+
+class QueryEngine:
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        filter_index: FilterIndex,
+        search_index: Optional[SearchIndex] = None,
+        version: Hashable = None,
+        cache_size: int = 256,
+        cache: Optional[LRUCache] = None,
+        id_positions: Optional[pd.Series] = None,
+        facets: Optional[FacetCounts] = None,
+    ):
+        self.df = df
+        self.filter_index = filter_index
+        self.search_index = search_index
+        self.version = version
+        # Engines for successive versions of a dataset can share one cache, keys carry the version
+        self.cache = cache if cache is not None else LRUCache(cache_size)
+        # Position of the live row of every job id
+        self.id_positions = id_positions if id_positions is not None else pd.Series(np.arange(len(df)), index=df["id"])
+        self._facets = facets
+
+    @property
+    def facets(self) -> FacetCounts:
+        """Counts over all live rows, maintained by the live dataset or built on first use."""
+        if self._facets is None:
+            self._facets = FacetCounts.build(self.df, self.filter_index)
+        return self._facets
+
+    def select(self, selection: Dict[str, Iterable[str]], search_term: Optional[str] = None) -> np.ndarray:
+        """Positions of the matching rows; ranked by relevance when searching, frame order otherwise."""
+        key = (self.version, normalize_selection(selection, search_term))
+        positions = self.cache.get(key)
+        if positions is None:
+            positions = self._select(selection, key[1][-1][1])
+            # Shared between sessions, so callers must not modify it
+            positions.flags.writeable = False
+            self.cache.put(key, positions)
+        return positions
+
+    def _select(self, selection: Dict[str, Iterable[str]], query: str) -> np.ndarray:
+        if not query or self.search_index is None:
+            return self.filter_index.positions(selection)
+
+        job_ids, _ = self.search_index.search(query)
+        positions = self.id_positions.reindex(job_ids).dropna().to_numpy(dtype=np.int64)
+        in_selection = np.unpackbits(self.filter_index.mask(selection), count=self.filter_index.n_rows).astype(bool)
+        return positions[in_selection[positions]]
+
+    def facet_counts(self, selection: Dict[str, Iterable[str]], search_term: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """Matching rows per value of every dimension.
+
+        Each dimension is counted under the selection of the other dimensions
+        only, so its counts show what picking another value would add.
+        """
+        normalized = normalize_selection(selection, search_term)
+        query = normalized[-1][1]
+        if not query and not any(selection.get(dimension) for dimension in DIMENSIONS):
+            return self.facets.values
+        key = (self.version, normalized, "facets")
+        counts = self.cache.get(key)
+        if counts is None:
+            base = self.filter_index.all_rows()
+            if query:
+                matched = np.zeros(self.filter_index.n_rows, dtype=bool)
+                matched[self.select({}, search_term)] = True
+                base &= np.packbits(matched)
+            masks = {dimension: self.filter_index.dimension_mask(dimension, selection.get(dimension)) for dimension in DIMENSIONS}
+            counts = {}
+            for dimension in DIMENSIONS:
+                mask = base.copy()
+                for other, other_mask in masks.items():
+                    if other != dimension and other_mask is not None:
+                        mask &= other_mask
+                counts[dimension] = self.filter_index.counts(dimension, mask)
+            self.cache.put(key, counts)
+        return counts
+
+    def sorted_positions(
+        self, selection: Dict[str, Iterable[str]], search_term: Optional[str] = None, sort_by: Optional[str] = None, descending: bool = False
+    ) -> np.ndarray:
+        """Like :meth:`select`, ordered by the ``sort_by`` column when given (missing values last)."""
+        positions = self.select(selection, search_term)
+        if sort_by is None:
+            return positions
+        key = (self.version, normalize_selection(selection, search_term), ("sort", sort_by, descending))
+        ordered = self.cache.get(key)
+        if ordered is None:
+            values = self.df[sort_by].take(positions).reset_index(drop=True)
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                # Categories appended by incremental reloads are not in order
+                values = values.cat.reorder_categories(values.cat.categories.sort_values())
+            order = values.sort_values(ascending=not descending, kind="stable", na_position="last").index.to_numpy()
+            ordered = positions[order]
+            ordered.flags.writeable = False
+            self.cache.put(key, ordered)
+        return ordered
+
+    def page(self, positions: np.ndarray, page: int, page_size: int, columns=None) -> pd.DataFrame:
+        """Materialize the rows of one page (counted from 0) of ``positions``."""
+        start = page * page_size
+        return self.rows(positions[start : start + page_size], columns)
+
+    def rows(self, positions: np.ndarray, columns=None) -> pd.DataFrame:
+        """Materialize the given rows, optionally only some columns."""
+        # Rows first, so only they are copied
+        df = self.df.iloc[positions]
+        return df if columns is None else df[columns]
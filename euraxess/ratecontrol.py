@@ -0,0 +1,147 @@
+"""Adaptive download rate: additive increase, multiplicative decrease (AIMD).
+
+The controller owns a download delay and a concurrency, both kept between a
+configured floor and ceiling. Every window of healthy responses (as many as
+the current concurrency, roughly one round trip) first shortens the delay by
+a fixed step and, once the delay is at its floor, allows one more request in
+flight. A congestion signal (429, 5xx, a download error or a latency above
+the target) divides the concurrency and multiplies the delay by the decrease
+factor, at most once per round trip: responses to requests sent before the
+last decrease say nothing about the new rate. ``Retry-After`` pauses all
+requests for as long as the server asked.
+
+The controller gates requests itself (``wait_time`` / ``acquire`` /
+``release``) rather than only tuning Scrapy's download slot, whose queue would
+keep sending requests it already accepted during a Retry-After pause.
+"""
+
+import datetime
+import email.utils
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+CONGESTION_STATUSES = {408, 429, 500, 502, 503, 504, 520, 522, 524}
+
+
+@dataclass
+class RateLimits:
+    min_delay: float = 0.0
+    max_delay: float = 60.0
+    min_concurrency: int = 1
+    max_concurrency: int = 8
+    delay_step: float = 0.25
+    decrease_factor: float = 0.5
+    target_latency: float = 2.0
+
+    @classmethod
+    def from_settings(cls, settings) -> "RateLimits":
+        """Limits from the ``EURAXESS_RATE_*`` settings; unset, the spider's own delay and concurrency are the floor and ceiling."""
+        min_delay = settings.get("EURAXESS_RATE_MIN_DELAY")
+        max_concurrency = settings.get("EURAXESS_RATE_MAX_CONCURRENCY")
+        return cls(
+            min_delay=settings.getfloat("DOWNLOAD_DELAY") if min_delay is None else float(min_delay),
+            max_delay=settings.getfloat("EURAXESS_RATE_MAX_DELAY"),
+            min_concurrency=settings.getint("EURAXESS_RATE_MIN_CONCURRENCY"),
+            max_concurrency=settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN") if max_concurrency is None else int(max_concurrency),
+            delay_step=settings.getfloat("EURAXESS_RATE_DELAY_STEP"),
+            decrease_factor=settings.getfloat("EURAXESS_RATE_DECREASE_FACTOR"),
+            target_latency=settings.getfloat("EURAXESS_RATE_TARGET_LATENCY"),
+        )
+
+
+def apply_rate_control_settings(settings):
+    """Let the controller grow past a spider's configured concurrency.
+
+    Called from the spiders' ``update_settings``. The configured
+    ``DOWNLOAD_DELAY`` and ``CONCURRENT_REQUESTS_PER_DOMAIN`` stay the
+    controller's starting point; only the global limit, which also counts the
+    requests waiting at the controller, is raised to the ceiling.
+    """
+    if not settings.getbool("EURAXESS_RATE_CONTROL"):
+        return
+    limits = RateLimits.from_settings(settings)
+    settings.set("CONCURRENT_REQUESTS", max(settings.getint("CONCURRENT_REQUESTS"), limits.max_concurrency), priority="spider")
+
+
+def parse_retry_after(value: Optional[bytes], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a ``Retry-After`` header, given as seconds or an HTTP date."""
+    if not value:
+        return None
+    text = value.decode("latin-1").strip()
+    if text.isdigit():
+        return float(text)
+    try:
+        when = email.utils.parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, when.timestamp() - (time.time() if now is None else now))
+
+
+class AimdController:
+    def __init__(self, limits: RateLimits, delay: float, concurrency: int, jitter: float = 0.0):
+        self.limits = limits
+        self.delay = min(max(delay, limits.min_delay), limits.max_delay)
+        self.concurrency = min(max(concurrency, limits.min_concurrency), limits.max_concurrency)
+        # Random variation of each delay, 0.5 meaning 50% to 150% of it
+        self.jitter = jitter
+        self.healthy = 0
+        self.last_decrease = float("-inf")
+        self.paused_until = 0.0
+        self.inflight = 0
+        self.next_send_at = 0.0
+
+    def wait_time(self, now: Optional[float] = None) -> Optional[float]:
+        """Seconds until a request may be sent, or None while the concurrency is used up."""
+        now = time.monotonic() if now is None else now
+        if self.inflight >= self.concurrency:
+            return None
+        return max(0.0, self.paused_until - now, self.next_send_at - now)
+
+    def acquire(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        self.inflight += 1
+        delay = self.delay * (1 + random.uniform(-self.jitter, self.jitter)) if self.jitter else self.delay
+        self.next_send_at = now + delay
+        return now
+
+    def release(self):
+        self.inflight -= 1
+
+    def is_congestion(self, status: Optional[int], latency: Optional[float]) -> bool:
+        if status is None or status in CONGESTION_STATUSES:
+            return True
+        return latency is not None and latency > self.limits.target_latency
+
+    def observe(self, sent_at: float, status: Optional[int], latency: Optional[float], retry_after: Optional[float] = None, now: Optional[float] = None) -> bool:
+        """Feed one download outcome (``status`` None for an error); returns whether the rate changed."""
+        now = time.monotonic() if now is None else now
+        if retry_after:
+            self.paused_until = max(self.paused_until, now + retry_after)
+        if self.is_congestion(status, latency):
+            if sent_at < self.last_decrease:
+                return False
+            self.decrease(now)
+            return True
+        self.healthy += 1
+        if self.healthy < self.concurrency:
+            return False
+        self.increase()
+        return True
+
+    def increase(self):
+        self.healthy = 0
+        if self.delay > self.limits.min_delay:
+            self.delay = max(self.limits.min_delay, self.delay - self.limits.delay_step)
+        elif self.concurrency < self.limits.max_concurrency:
+            self.concurrency += 1
+
+    def decrease(self, now: float):
+        self.healthy = 0
+        self.last_decrease = now
+        factor = self.limits.decrease_factor
+        self.concurrency = max(self.limits.min_concurrency, int(self.concurrency * factor))
+        self.delay = min(self.limits.max_delay, max(self.delay / factor, self.limits.delay_step))
@@ -0,0 +1,185 @@
+"""Keyword search over job titles and descriptions.
+
+An inverted index maps every token to the jobs containing it and how often.
+Queries are ranked with BM25, every query word also matches as a prefix
+("bio" finds "biology"), and all query words must match. The pipeline adds new
+jobs as it flushes them and saves the index to ``EURAXESS_SEARCH_INDEX_PATH``;
+the dashboard loads it read-only. The index records the parts of the
+processed dataset it covers, so catching up at the start of a crawl only
+reads the parts appended since, if any.
+"""
+
+import logging
+import os
+import pickle
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Vocabulary terms a query word matches as a prefix; beyond that, the alphabetically later ones are ignored
+MAX_PREFIX_EXPANSIONS = 100
+
+logger = logging.getLogger(__name__)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase, accent-folded word tokens of at least two characters."""
+    if not text:
+        return []
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return [token for token in _TOKEN_RE.findall(folded) if len(token) > 1]
+
+
+class SearchIndex:
+    def __init__(self):
+        self.job_ids: List[str] = []
+        self.doc_numbers: Dict[str, int] = {}
+        self.doc_lengths = array("I")
+        self.live = array("B")
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        # Parts of the processed dataset whose jobs are all indexed
+        self.dataset_parts: Optional[List[str]] = None
+        self._sorted_terms: Optional[List[str]] = None
+        self._job_id_array: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_numbers)
+
+    def __contains__(self, job_id) -> bool:
+        return job_id in self.doc_numbers
+
+    def add(self, job_id: str, text: Optional[str]):
+        """Index a job; indexing an id again replaces its previous text."""
+        previous = self.doc_numbers.get(job_id)
+        if previous is not None:
+            self.live[previous] = 0
+
+        doc = len(self.job_ids)
+        self.job_ids.append(job_id)
+        self._job_id_array = None
+        self.doc_numbers[job_id] = doc
+        tokens = tokenize(text)
+        self.doc_lengths.append(len(tokens))
+        self.live.append(1)
+
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = (array("I"), array("H"))
+                self._sorted_terms = None
+            posting[0].append(doc)
+            posting[1].append(min(count, 65535))
+
+    def add_many(self, job_ids: Iterable[str], texts: Iterable[Optional[str]]):
+        for job_id, text in zip(job_ids, texts):
+            self.add(job_id, text)
+
+    def _expand(self, token: str) -> List[str]:
+        """The token itself plus vocabulary terms it is a prefix of."""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = self._sorted_terms
+        start = bisect_left(terms, token)
+        expanded = []
+        for term in terms[start : start + MAX_PREFIX_EXPANSIONS + 1]:
+            if not term.startswith(token):
+                break
+            expanded.append(term)
+        if len(expanded) > MAX_PREFIX_EXPANSIONS:
+            logger.warning(f"Query word {token!r} is a prefix of more than {MAX_PREFIX_EXPANSIONS} terms, matching the first ones only")
+            expanded = expanded[:MAX_PREFIX_EXPANSIONS]
+        return expanded
+
+    def search(self, query: str, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Job ids matching every query word, best BM25 score first, with their scores."""
+        tokens = tokenize(query)
+        n_docs = len(self.job_ids)
+        if not tokens or n_docs == 0:
+            return np.array([], dtype=object), np.array([], dtype=float)
+
+        live = np.frombuffer(self.live, dtype=np.uint8).astype(bool)
+        lengths = np.frombuffer(self.doc_lengths, dtype=np.uint32)
+        n_live = int(live.sum())
+        avg_length = lengths[live].mean() if n_live else 0.0
+        norm = K1 * (1 - B + B * lengths / max(avg_length, 1e-9))
+
+        scores = np.zeros(n_docs)
+        matched_all = live.copy()
+        for token in tokens:
+            matched = np.zeros(n_docs, dtype=bool)
+            for term in self._expand(token):
+                docs = np.frombuffer(self.postings[term][0], dtype=np.uint32)
+                tfs = np.frombuffer(self.postings[term][1], dtype=np.uint16).astype(float)
+                df = int(live[docs].sum())
+                idf = np.log(1 + (n_live - df + 0.5) / (df + 0.5))
+                # A posting lists each document once, so fancy-index += is safe
+                scores[docs] += idf * tfs * (K1 + 1) / (tfs + norm[docs])
+                matched[docs] = True
+            matched_all &= matched
+
+        docs = np.flatnonzero(matched_all)
+        order = np.argsort(-scores[docs], kind="stable")
+        if limit is not None:
+            order = order[:limit]
+        docs = docs[order]
+        if self._job_id_array is None:
+            self._job_id_array = np.array(self.job_ids, dtype=object)
+        return self._job_id_array[docs], scores[docs]
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        state = {key: value for key, value in self.__dict__.items() if not key.startswith("_")}
+        with open(tmp_path, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SearchIndex":
+        index = cls()
+        with open(path, "rb") as f:
+            index.__dict__.update(pickle.load(f))
+        return index
+
+
+def job_text(title: Optional[str], description: Optional[str]) -> str:
+    return f"{title or ''} {description or ''}"
+
+
+def open_search_index(path: str, processed=None) -> "SearchIndex":
+    """Load the saved index and catch it up with jobs of the processed dataset it lacks.
+
+    When the dataset only had parts appended since the index was saved, just
+    those are read; when it has the parts the index covers, nothing is.
+    """
+    try:
+        index = SearchIndex.load(path)
+    except FileNotFoundError:
+        index = SearchIndex()
+    manifest = processed.read_manifest() if processed is not None else None
+    if manifest is not None:
+        parts, covered = manifest["parts"], index.dataset_parts
+        if covered is not None and parts[: len(covered)] == covered:
+            # Every job of the new parts is indexed again, a changed one replaces its previous text
+            df = processed.load_parts(parts[len(covered) :], columns=["id", "title", "description"])
+        else:
+            df = processed.load(columns=["id", "title", "description"])
+            df = df[~df["id"].isin(index.doc_numbers.keys())]
+        if len(df):
+            index.add_many(df["id"], (job_text(t, d) for t, d in zip(df["title"], df["description"])))
+        index.dataset_parts = list(parts)
+    return index
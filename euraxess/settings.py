@@ -37,6 +37,113 @@ ROBOTSTXT_OBEY = False
 # CONCURRENT_REQUESTS_PER_DOMAIN = 16
 # CONCURRENT_REQUESTS_PER_IP = 16
 
+# Fan-out mode: once page 0 reveals the page count, schedule every remaining
+# page at once instead of following them one by one. The spider then runs with
+# this concurrency budget and delay instead of its serial custom_settings.
+#     scrapy crawl euraxess_scraper -s EURAXESS_FAN_OUT=1 -s EURAXESS_FAN_OUT_CONCURRENCY=8
+EURAXESS_FAN_OUT = False
+EURAXESS_FAN_OUT_CONCURRENCY = 8
+EURAXESS_FAN_OUT_DELAY = 0.5
+
+# Job store written by the pipeline and read by the app: "csv" appends segments
+# next to EURAXESS_JOBS_CSV, "parquet" writes compressed columnar parts
+# partitioned by crawl date under EURAXESS_PARQUET_DIR. Rows are flushed, each
+# batch as one atomically renamed file, and their ids committed to the index,
+# every EURAXESS_WRITE_BATCH_SIZE items. A crawl that leaves more than
+# EURAXESS_COMPACT_SEGMENTS files behind compacts the store (0 disables it):
+#     python -m euraxess.storage compact
+EURAXESS_STORAGE = "csv"
+EURAXESS_JOBS_CSV = "output/jobs.csv"
+EURAXESS_PARQUET_DIR = "output/jobs_parquet"
+EURAXESS_WRITE_BATCH_SIZE = 1000
+EURAXESS_COMPACT_SEGMENTS = 64
+
+# Processed dataset with the derived columns the app filters on, appended to
+# by the pipeline on every flush (see euraxess/processing.py)
+EURAXESS_PROCESSED_DIR = "output/processed"
+
+# Memory-mapped snapshots of the processed dataset and its filter index,
+# published by the pipeline at the end of every crawl (see euraxess/snapshot.py).
+# App and API processes map the current one read-only, so they share its pages
+# and start without loading parts or building indexes; empty to disable.
+#     python -m euraxess.snapshot publish
+EURAXESS_SNAPSHOT_DIR = "output/snapshots"
+
+# Inverted index over job titles and descriptions for the app's keyword search,
+# updated by the pipeline and saved when the crawl closes
+EURAXESS_SEARCH_INDEX_PATH = "output/search_index.pkl"
+
+# Exports of the app's filtered results, streamed from the processed dataset
+# in chunks (see euraxess/export.py). The app offers files up to
+# EURAXESS_EXPORT_DOWNLOAD_MAX_MB as a download, since Streamlit holds a
+# download in memory; larger ones are left in EURAXESS_EXPORT_DIR.
+#     python -m euraxess.export output/exports/jobs.parquet --country Germany
+EURAXESS_EXPORT_DIR = "output/exports"
+EURAXESS_EXPORT_DOWNLOAD_MAX_MB = 200
+
+# Headless JSON query API over the same indexes as the app (see euraxess/api.py);
+# it checks the processed dataset for new parts at most every
+# EURAXESS_API_REFRESH_INTERVAL seconds.
+#     python -m euraxess.api
+EURAXESS_API_HOST = "127.0.0.1"
+EURAXESS_API_PORT = 8502
+EURAXESS_API_REFRESH_INTERVAL = 5.0
+
+# Index of the stored job ids and content hashes, used to skip unchanged jobs
+# and to store a new version of changed ones, with the history of what each
+# crawl added or changed; bootstrapped from the job store the first time it is
+# opened (see euraxess/idindex.py)
+EURAXESS_ID_INDEX_PATH = "output/jobs_ids.sqlite"
+
+# Checkpoints: every EURAXESS_CHECKPOINT_PAGES completed listing pages the
+# pipeline flushes and records the pagination progress with the flushed store
+# position in the id index, so a killed crawl can continue where it stopped:
+#     scrapy crawl euraxess_scraper -a resume=1
+EURAXESS_CHECKPOINT_PAGES = 10
+
+# Delta crawl: stop paginating once this many pages in a row only hold jobs
+# that are already stored or older than the watermark of the last full crawl.
+#     scrapy crawl euraxess_scraper -s EURAXESS_DELTA=1
+EURAXESS_DELTA = False
+EURAXESS_DELTA_STOP_PAGES = 2
+EURAXESS_WATERMARK_PATH = "output/watermark.json"
+
+# Detail crawl: fetches the page behind every stored job link with conditional
+# requests, skipping pages whose ETag, Last-Modified or content hash did not
+# change since the last run (see euraxess/details.py).
+#     scrapy crawl euraxess_details
+EURAXESS_DETAILS_PATH = "output/job_details.sqlite"
+EURAXESS_DETAILS_CONCURRENCY = 8
+EURAXESS_DETAILS_DELAY = 0.5
+
+# Crawl telemetry recorded by the middlewares (see euraxess/telemetry.py): a JSON
+# summary per run under EURAXESS_TELEMETRY_DIR, and optionally the same metrics
+# in the Prometheus text format, written to a file (e.g. for node_exporter's
+# textfile collector) or served on a port while the crawl runs. The port is only
+# reachable from this host unless EURAXESS_TELEMETRY_PROMETHEUS_HOST is widened
+# (e.g. "0.0.0.0" for a scraper on another machine).
+EURAXESS_TELEMETRY = True
+EURAXESS_TELEMETRY_DIR = "output/telemetry"
+EURAXESS_TELEMETRY_PROMETHEUS_FILE = None
+EURAXESS_TELEMETRY_PROMETHEUS_HOST = "127.0.0.1"
+EURAXESS_TELEMETRY_PROMETHEUS_PORT = 0
+
+# Adaptive rate control (see euraxess/ratecontrol.py): the download delay and
+# concurrency the spiders configure are the starting point; they are then
+# adjusted between these floors and ceilings from the observed latency and
+# error codes, and Retry-After is honoured. Left at None, the minimum delay and
+# the maximum concurrency are the spider's own DOWNLOAD_DELAY and
+# CONCURRENT_REQUESTS_PER_DOMAIN, so the controller only ever slows a crawl
+# down; set them to let it go faster than that against a server that copes.
+EURAXESS_RATE_CONTROL = True
+EURAXESS_RATE_MIN_DELAY = None
+EURAXESS_RATE_MAX_DELAY = 60.0
+EURAXESS_RATE_MIN_CONCURRENCY = 1
+EURAXESS_RATE_MAX_CONCURRENCY = None
+EURAXESS_RATE_DELAY_STEP = 0.5
+EURAXESS_RATE_DECREASE_FACTOR = 0.5
+EURAXESS_RATE_TARGET_LATENCY = 5.0
+
 # Disable cookies (enabled by default)
 # COOKIES_ENABLED = False
 
@@ -51,12 +158,16 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-# SPIDER_MIDDLEWARES = {
-#    "euraxess.middlewares.EuraxessSpiderMiddleware": 543,
-# }
+SPIDER_MIDDLEWARES = {
+    "euraxess.middlewares.EuraxessSpiderMiddleware": 543,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
+DOWNLOADER_MIDDLEWARES = {
+    "euraxess.middlewares.EuraxessRateControlMiddleware": 910,
+    "euraxess.middlewares.EuraxessDownloaderMiddleware": 950,
+}
 # DOWNLOADER_MIDDLEWARES = {
 #     "scrapy.contrib.downloadermiddleware.useragent.UserAgentMiddleware": None,
 #     "scrapy.contrib.downloadermiddleware.retry.RetryMiddleware": None,
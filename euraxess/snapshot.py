@@ -0,0 +1,195 @@
+"""Memory-mapped snapshots of the dashboard's frame and filter index.
+
+Loading the processed dataset means decompressing every Parquet part,
+compacting the frame and building the filter index, in every app and API
+process. A :class:`SnapshotStore` does that once, at the end of a crawl, and
+publishes the result as uncompressed Arrow IPC files:
+
+    output/snapshots/
+        CURRENT                       name and schema version of the current snapshot
+        snapshot-00000042/
+            frame.arrow               the compact frame (categoricals as dictionaries)
+            index.arrow               one fixed-size bitset per filter value
+            snapshot.json             the manifest the snapshot was taken from
+
+Readers memory-map the current snapshot read-only, so its columns and
+bitsets are views of the page cache: processes on the same host share one
+copy, and a restart maps it again in milliseconds instead of rebuilding it.
+A snapshot is written under a temporary name and renamed into place before
+``CURRENT`` is swapped, so readers only ever see complete snapshots; the
+previous one is kept for readers that still map it.
+
+    python -m euraxess.snapshot publish
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from euraxess.filter_index import DIMENSIONS, FilterIndex
+from euraxess.processing import PROFILE_PATTERNS, SCHEMA_VERSION, ProcessedDataset, compact_frame, processed_schema
+
+# The columns the app and the API hold: no long descriptions, no raw field text
+SNAPSHOT_COLUMNS = [column for column in processed_schema().names if column not in ("description", "field")]
+
+
+def _types_mapper(arrow_type):
+    import pyarrow as pa
+
+    return pd.ArrowDtype(arrow_type) if pa.types.is_list(arrow_type) else None
+
+
+class Snapshot:
+    """A published snapshot, memory-mapped read-only."""
+
+    def __init__(self, path: str):
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        self.path = path
+        self.name = os.path.basename(path)
+        with open(os.path.join(path, "snapshot.json"), encoding="utf-8") as f:
+            self.manifest: Dict = json.load(f)
+        self.frame_table = ipc.open_file(pa.memory_map(os.path.join(path, "frame.arrow"))).read_all()
+        self.index_table = ipc.open_file(pa.memory_map(os.path.join(path, "index.arrow"))).read_all()
+
+    def frame(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """The frame of the given processed columns; text and list columns stay views of the mapped file."""
+        table = self.frame_table
+        if columns is not None:
+            missing = [column for column in columns if column not in table.column_names and column not in PROFILE_PATTERNS]
+            if missing:
+                raise ValueError(f"Snapshot {self.name} has no columns {missing}")
+            # The profile columns are packed into profile_flags in the compact frame
+            wanted = set(columns) | ({"profile_flags"} if set(PROFILE_PATTERNS) & set(columns) else set())
+            table = table.select([column for column in table.column_names if column in wanted])
+        # split_blocks keeps every column its own array instead of copying them into 2D blocks
+        return table.to_pandas(split_blocks=True, types_mapper=_types_mapper)
+
+    def filter_index(self) -> FilterIndex:
+        """The filter index, its bitsets views of the mapped file."""
+        n_rows = self.frame_table.num_rows
+        width = (n_rows + 7) // 8
+        dimensions = self.index_table["dimension"].to_pylist()
+        values = self.index_table["value"].to_pylist()
+        bits = self.index_table["bits"].combine_chunks()
+        data = np.frombuffer(bits.buffers()[1], dtype=np.uint8) if len(bits) and width else np.zeros(0, dtype=np.uint8)
+        matrix = data[bits.offset * width : (bits.offset + len(bits)) * width].reshape(len(bits), width)
+
+        bitsets, matrices = {dimension: {} for dimension in DIMENSIONS}, {}
+        for dimension in DIMENSIONS:
+            rows = [row for row, row_dimension in enumerate(dimensions) if row_dimension == dimension]
+            # Rows of a dimension are written together, so its matrix is a slice too
+            block = matrix[rows[0] : rows[-1] + 1] if rows else np.zeros((0, width), dtype=np.uint8)
+            for value, bitset in zip((values[row] for row in rows), block):
+                bitsets[dimension][value] = bitset
+            matrices[dimension] = ([values[row] for row in rows], block)
+        return FilterIndex(n_rows, bitsets, matrices=matrices)
+
+
+class SnapshotStore:
+    """Directory of published snapshots with a ``CURRENT`` pointer."""
+
+    def __init__(self, root: str, keep: int = 2):
+        self.root = root
+        self.current_path = os.path.join(root, "CURRENT")
+        # Snapshots kept on disk, the current one included
+        self.keep = keep
+
+    def current(self) -> Optional[str]:
+        """Name of the current snapshot, or None if there is none for this schema version."""
+        try:
+            with open(self.current_path, encoding="utf-8") as f:
+                pointer = json.load(f)
+        except FileNotFoundError:
+            return None
+        return pointer["name"] if pointer["schema_version"] == SCHEMA_VERSION else None
+
+    def open(self, name: str) -> Snapshot:
+        return Snapshot(os.path.join(self.root, name))
+
+    def publish(self, dataset: ProcessedDataset, columns: Optional[List[str]] = None) -> Optional[str]:
+        """Snapshot the dataset's current rows and make it current; returns its name, None if it was current already."""
+        import pyarrow as pa
+        import pyarrow.ipc as ipc
+
+        manifest = dataset.current_manifest()
+        name = f"snapshot-{manifest['version']:08d}"
+        if self.current() == name:
+            return None
+        columns = SNAPSHOT_COLUMNS if columns is None else columns
+        df = compact_frame(dataset.load_parts(manifest["parts"], columns))
+        # Rows past their deadline are left out; readers retire the ones that expire later
+        df = df[~(df["application_deadline"] < pd.Timestamp.now()).to_numpy()].reset_index(drop=True)
+        filter_index = FilterIndex.build(df, dataset.read_taxonomy())
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{name}.tmp")
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        # Uncompressed, so readers can map the buffers as they are
+        frame_table = pa.Table.from_pandas(df, preserve_index=False).replace_schema_metadata()
+        with ipc.new_file(os.path.join(tmp_path, "frame.arrow"), frame_table.schema) as writer:
+            writer.write_table(frame_table)
+        entries = [(dimension, value, bitset.tobytes()) for dimension in DIMENSIONS for value, bitset in filter_index.bitsets[dimension].items()]
+        index_table = pa.table(
+            {
+                "dimension": pa.array([dimension for dimension, _, _ in entries], pa.string()),
+                "value": pa.array([value for _, value, _ in entries], pa.string()),
+                "bits": pa.array([bits for _, _, bits in entries], pa.binary((len(df) + 7) // 8)),
+            }
+        )
+        with ipc.new_file(os.path.join(tmp_path, "index.arrow"), index_table.schema) as writer:
+            writer.write_table(index_table)
+        with open(os.path.join(tmp_path, "snapshot.json"), "w", encoding="utf-8") as f:
+            json.dump({**manifest, "rows": len(df), "published_at": time.time()}, f, indent=2)
+
+        path = os.path.join(self.root, name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+        pointer_tmp = f"{self.current_path}.tmp"
+        with open(pointer_tmp, "w", encoding="utf-8") as f:
+            json.dump({"name": name, "schema_version": manifest["schema_version"]}, f)
+        os.replace(pointer_tmp, self.current_path)
+        self._prune(name)
+        return name
+
+    def _prune(self, current: str):
+        names = sorted(name for name in os.listdir(self.root) if name.startswith("snapshot-") and name != current)
+        for name in names[: max(len(names) - (self.keep - 1), 0)]:
+            # Mapped files cannot be removed on Windows; they go on a later publish
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("publish", help="snapshot the processed dataset and make it current")
+    commands.add_parser("show", help="print the current snapshot")
+    arg_parser.add_argument("--snapshot-dir", default=settings.get("EURAXESS_SNAPSHOT_DIR"))
+    arg_parser.add_argument("--processed-dir", default=settings.get("EURAXESS_PROCESSED_DIR"))
+    args = arg_parser.parse_args()
+    if not args.snapshot_dir:
+        raise ValueError("No snapshot directory configured (EURAXESS_SNAPSHOT_DIR or --snapshot-dir)")
+
+    store = SnapshotStore(args.snapshot_dir)
+    if args.command == "publish":
+        start = time.perf_counter()
+        name = store.publish(ProcessedDataset(args.processed_dir))
+        print(f"Published {name} in {time.perf_counter() - start:.1f}s" if name else f"{store.current()} is current already")
+    else:
+        name = store.current()
+        print(json.dumps(store.open(name).manifest, indent=2) if name else "No current snapshot")
+
+
+if __name__ == "__main__":
+    main()
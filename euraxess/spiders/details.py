@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+import datetime
+import hashlib
+from typing import Any, Generator, Optional
+
+import scrapy
+
+from euraxess.details import DetailStore
+from euraxess.ratecontrol import apply_rate_control_settings
+from euraxess.storage import get_job_store
+
+# Sections of a job page, by the text of their heading
+SECTIONS = {
+    "offer_description": "Offer Description",
+    "requirements": "Requirements",
+    "additional_information": "Additional Information",
+    "where_to_apply": "Where to apply",
+    "contact": "Contact",
+}
+
+
+class EuraxessDetailsSpider(scrapy.Spider):
+    """Fetches the detail page of every stored job, conditionally.
+
+    Driven by the ``link`` column of the job store, so run it after the
+    listing crawl:
+
+        scrapy crawl euraxess_details
+        scrapy crawl euraxess_details -a limit=100
+    """
+
+    name = "euraxess_details"
+    limit = None
+
+    custom_settings = {
+        "ITEM_PIPELINES": {"euraxess.pipelines.EuraxessDetailsPipeline": 300},
+        "RANDOMIZE_DOWNLOAD_DELAY": True,
+    }
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        concurrency = settings.getint("EURAXESS_DETAILS_CONCURRENCY")
+        settings.set("CONCURRENT_REQUESTS", concurrency, priority="spider")
+        settings.set("CONCURRENT_REQUESTS_PER_DOMAIN", concurrency, priority="spider")
+        settings.set("DOWNLOAD_DELAY", settings.getfloat("EURAXESS_DETAILS_DELAY"), priority="spider")
+        apply_rate_control_settings(settings)
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        store = get_job_store(self.settings)
+        if not store.exists():
+            self.logger.warning("No stored jobs yet, run the euraxess_scraper spider first.")
+            return
+        jobs = store.read(columns=["id", "link"]).dropna(subset=["link"]).drop_duplicates("id", keep="last")
+        if self.limit is not None:
+            jobs = jobs.head(int(self.limit))
+
+        details = DetailStore(self.settings.get("EURAXESS_DETAILS_PATH")).open()
+        self.validators = details.validators()
+        details.close()
+        self.logger.info(f"Fetching {len(jobs)} detail pages, {len(self.validators)} of them seen before")
+
+        for job_id, link in zip(jobs["id"], jobs["link"]):
+            yield scrapy.Request(
+                url=link,
+                callback=self.parse_detail,
+                headers=self.conditional_headers(link),
+                cb_kwargs={"job_id": str(job_id), "link": link},
+                meta={"handle_httpstatus_list": [304]},
+            )
+
+    def conditional_headers(self, link: str) -> dict:
+        etag, last_modified, _ = self.validators.get(link, (None, None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def parse_detail(self, response, job_id: str, link: str) -> Generator[dict, Any, Any]:
+        stats = self.crawler.stats
+        if response.status == 304:
+            stats.inc_value("details/not_modified")
+            return
+
+        content_hash = hashlib.sha256(response.body).hexdigest()
+        previous_etag, previous_last_modified, previous_hash = self.validators.get(link, (None, None, None))
+        etag, last_modified = self.header(response, "ETag"), self.header(response, "Last-Modified")
+        fetched_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+        if content_hash == previous_hash:
+            # Served without usable validators, but nothing changed
+            stats.inc_value("details/unchanged")
+            if (etag, last_modified) != (previous_etag, previous_last_modified):
+                # New validators for the same page are kept, or every later run would download it again
+                yield {
+                    "id": job_id,
+                    "link": link,
+                    "etag": etag,
+                    "last_modified": last_modified,
+                    "fetched_at": fetched_at,
+                    "validators_only": True,
+                }
+            return
+
+        stats.inc_value("details/changed" if previous_hash else "details/new")
+        emails = response.xpath('//a[starts-with(@href, "mailto:")]/@href').re(r"^mailto:([^?]+)")
+        yield {
+            "id": job_id,
+            "link": link,
+            **{field: self.section_text(response, heading) for field, heading in SECTIONS.items()},
+            "emails": ",".join(dict.fromkeys(emails)) or None,
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "fetched_at": fetched_at,
+        }
+
+    @staticmethod
+    def header(response, name: str) -> Optional[str]:
+        value = response.headers.get(name)
+        return value.decode("latin-1") if value else None
+
+    @staticmethod
+    def section_text(response, heading: str) -> Optional[str]:
+        """Text between the heading titled ``heading`` and the next one of the same level."""
+        nodes = response.xpath(
+            "//h2[normalize-space()=$heading]/following-sibling::*[not(self::h2)][preceding-sibling::h2[1][normalize-space()=$heading]]",
+            heading=heading,
+        )
+        text = " ".join(part.strip() for part in nodes.xpath(".//text()").getall() if part.strip())
+        return text or None
@@ -1,20 +1,30 @@
 # -*- coding: utf-8 -*-
 
 import datetime
-from typing import Any, Generator
+from collections import Counter, defaultdict, deque
+from typing import Any, Generator, Optional
 
-import pandas as pd
 import scrapy
-from dateutil import parser
+from scrapy import signals
 from scrapy.exceptions import CloseSpider
 
+from euraxess.checkpoint import CrawlProgress, resumable_progress
+from euraxess.idindex import JobIdIndex
+from euraxess.parsing import parse_cards, parse_html, total_pages
+from euraxess.ratecontrol import apply_rate_control_settings
+from euraxess.storage import get_job_store, iter_content_hashes
+from euraxess.watermark import load_watermark, parse_posted_on, save_watermark
+
 
 class EuraxessScraper(scrapy.Spider):
     name = "euraxess_scraper"
 
     base_url = "https://euraxess.ec.europa.eu"
-    start_urls = [f"{base_url}/jobs/search?page=0"]
     current_page = 0
+    final_number = 0
+    # Set once the crawl has covered the listing down to what is already stored,
+    # only then it is safe to move the watermark forward
+    crawl_complete = False
     today = datetime.datetime.now().strftime("%Y%m%d")
 
     # This is custom FEEDS only for this spider
@@ -25,6 +35,127 @@ class EuraxessScraper(scrapy.Spider):
         "CONCURRENT_REQUESTS_PER_DOMAIN": 1,
     }
 
+    def __init__(self, *args, resume=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        # scrapy crawl euraxess_scraper -a resume=1 continues from the last checkpoint
+        self.resume = str(resume).lower() in ("1", "true", "yes")
+        # Pages whose callback finished, and pages whose jobs all went through
+        # the pipeline too, which is what a checkpoint may count as done (see
+        # euraxess/checkpoint.py). Scrapy pulls items from a callback ahead of
+        # the pipeline, so the second set follows the item signals.
+        self.pages_parsed = set()
+        self.pages_done = set()
+        self.pages_outstanding = Counter()
+        self.job_pages = defaultdict(deque)
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        for signal in (signals.item_scraped, signals.item_dropped, signals.item_error):
+            crawler.signals.connect(spider.item_processed, signal=signal)
+        return spider
+
+    @classmethod
+    def update_settings(cls, settings):
+        super().update_settings(settings)
+        # In fan-out mode every page after page 0 is scheduled at once, so the
+        # serial throttle above is replaced by the configured concurrency budget.
+        if settings.getbool("EURAXESS_FAN_OUT"):
+            concurrency = settings.getint("EURAXESS_FAN_OUT_CONCURRENCY")
+            settings.set("CONCURRENT_REQUESTS", concurrency, priority="spider")
+            settings.set("CONCURRENT_REQUESTS_PER_DOMAIN", concurrency, priority="spider")
+            settings.set("DOWNLOAD_DELAY", settings.getfloat("EURAXESS_FAN_OUT_DELAY"), priority="spider")
+        apply_rate_control_settings(settings)
+
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}/jobs/search?page={page}"
+
+    async def start(self):
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        self.delta = self.settings.getbool("EURAXESS_DELTA")
+        self.watermark = load_watermark(self.settings.get("EURAXESS_WATERMARK_PATH"))
+        self.next_watermark = self.watermark.copy()
+        self.known_pages_in_a_row = 0
+        if self.delta:
+            self.known_ids = JobIdIndex(self.settings.get("EURAXESS_ID_INDEX_PATH")).open(
+                bootstrap=self.bootstrap_hashes
+            )
+            self.logger.info(
+                f"Delta crawl: watermark {self.watermark.newest_posted_on}, {len(self.known_ids)} known ids, "
+                f"stopping after {self.settings.getint('EURAXESS_DELTA_STOP_PAGES')} known pages in a row"
+            )
+            if self.settings.getbool("EURAXESS_FAN_OUT"):
+                self.logger.warning("Delta crawl paginates serially, EURAXESS_FAN_OUT is ignored")
+
+        progress = self.load_progress() if self.resume else None
+        if progress is None:
+            yield scrapy.Request(url=self.page_url(0), callback=self.parse)
+            return
+
+        self.final_number = progress.final_number
+        self.pages_parsed = set(progress.pages_done)
+        self.pages_done = progress.pages_done
+        self.next_watermark = progress.next_watermark
+        if self.settings.getbool("EURAXESS_FAN_OUT") and not self.delta:
+            remaining = [page for page in range(self.final_number + 1) if page not in self.pages_done]
+            self.logger.info(f"Resuming fan-out crawl: {len(remaining)} of {self.final_number + 1} pages left")
+            for page in remaining:
+                yield scrapy.Request(
+                    url=self.page_url(page), callback=self.parse_page, cb_kwargs={"page": page}, priority=-page
+                )
+            self.crawl_complete = not remaining
+            return
+
+        self.current_page = progress.next_serial_page()
+        if self.current_page > self.final_number:
+            self.crawl_complete = True
+            return
+        self.logger.info(f"Resuming serial crawl at page {self.current_page} of {self.final_number}")
+        yield scrapy.Request(url=self.page_url(self.current_page), callback=self.parse)
+
+    def bootstrap_hashes(self):
+        return iter_content_hashes(get_job_store(self.settings))
+
+    def load_progress(self) -> Optional[CrawlProgress]:
+        index = JobIdIndex(self.settings.get("EURAXESS_ID_INDEX_PATH")).open(bootstrap=self.bootstrap_hashes)
+        progress = resumable_progress(index.load_checkpoint())
+        index.close()
+        if progress is None:
+            self.logger.warning("No unfinished crawl to resume, starting from the first page")
+        return progress
+
+    def page_parsed(self, page: int):
+        self.pages_parsed.add(page)
+        if not self.pages_outstanding[page]:
+            del self.pages_outstanding[page]
+            self.pages_done.add(page)
+
+    def item_processed(self, item, **kwargs):
+        pages = self.job_pages.get(item.get("id"))
+        if not pages:
+            return
+        page = pages.popleft()
+        if not pages:
+            del self.job_pages[item.get("id")]
+        self.pages_outstanding[page] -= 1
+        if not self.pages_outstanding[page] and page in self.pages_parsed:
+            del self.pages_outstanding[page]
+            self.pages_done.add(page)
+
+    def checkpoint_progress(self) -> CrawlProgress:
+        """Pagination progress for the pipeline to checkpoint with what it has flushed."""
+        return CrawlProgress(self.final_number, set(self.pages_done), self.next_watermark.copy(), self.crawl_complete)
+
+    def closed(self, reason):
+        if self.delta:
+            self.known_ids.close()
+        if self.crawl_complete:
+            save_watermark(self.settings.get("EURAXESS_WATERMARK_PATH"), self.next_watermark)
+            self.logger.info(f"Watermark moved to {self.next_watermark.newest_posted_on}")
+
     # let this parse be a metadata extactor, for now the only metadata is the final number of web pages to scrape
     def parse(self, response) -> Generator[scrapy.Request, Any, Any]:
         if response.status != 200:
@@ -32,48 +163,69 @@ class EuraxessScraper(scrapy.Spider):
         else:
             self.logger.info(f"Successfully fetched the page: {response.url}")
 
-        # This is the xpath for final number
+        root = parse_html(response.body, response.encoding)
+
+        # The final number is the last page label of the pager
         if self.current_page == 0:
-            self.final_number = response.xpath('//*[@id="oe-list-container"]/div[3]/div/nav/ul/li[5]/a/text()').get()
-            self.final_number = int(self.final_number.strip()) if self.final_number else 0
+            self.final_number = total_pages(root)
 
             self.logger.info(f"Final number of pages to scrape: {self.final_number}")
 
-        def _clean_line_breaks(text: str) -> str:
-            """Utility function to clean line breaks from text."""
-            return text.replace("\n", "").strip() if text else None
-
-        # Extracting the job listings from the current page
-        job_list = response.xpath('//*[@id="oe-list-container"]/div[3]/div/ul/li')
-        self.logger.info(f"Number of jobs found on this page: {len(job_list)}")
-        for job in job_list:
-            job_data = {
-                "id": response.urljoin(job.xpath(".//h3/a/@href").get()).split("/")[-1],
-                "type": job.xpath(".//div/div[1]/ul/li[1]/span/text()").get(),
-                "country": job.xpath(".//div/div[1]/ul/li[2]/span/text()").get(),
-                "university": job.xpath(".//article/div/ul[1]/li[1]/a/text()").get(),
-                "posted_on": job.xpath(".//article/div/ul[1]/li[2]/text()").get().replace("Posted on ", ""),
-                "title": job.xpath(".//h3/a/span/text()").get(),
-                "link": response.urljoin(job.xpath(".//h3/a/@href").get()),
-                "description": job.xpath('.//div[@class="ecl-content-block__description"]/p/text()').get(),
-                "department": _clean_line_breaks(job.xpath('.//div[contains(@class,"id-Department")]//div[2]/text()').get()),
-                "location": _clean_line_breaks(job.xpath('.//div[contains(@class,"id-Work-Locations")]//div[2]/text()').get()),
-                "field": _clean_line_breaks(";".join(job.xpath('.//div[contains(@class,"id-Research-Field")]/div[2]//text()').getall())),
-                "profile": _clean_line_breaks(";".join(job.xpath('.//div[contains(@class,"id-Researcher-Profile")]//a/text()').getall())),
-                "funding_program": job.xpath('.//div[contains(@class,"id-Funding-Programme")]//a/text()').get(),
-                "application_deadline": job.xpath('.//div[contains(@class,"id-Application-Deadline")]//time/text()').get(),
-            }
+        jobs = list(self.parse_jobs(response, root, self.current_page))
+        # Checked before the jobs go through the pipeline, whose flushes commit their ids to the index known_ids reads
+        page_known = self.delta and bool(jobs) and all(self.is_known_job(job) for job in jobs)
+        yield from jobs
+        self.page_parsed(self.current_page)
 
-            yield job_data
+        if page_known:
+            self.known_pages_in_a_row += 1
+            if self.known_pages_in_a_row >= self.settings.getint("EURAXESS_DELTA_STOP_PAGES"):
+                self.crawl_complete = True
+                raise CloseSpider(f"Delta crawl caught up at page {self.current_page}")
+        else:
+            self.known_pages_in_a_row = 0
+
+        if self.current_page == 0 and self.settings.getbool("EURAXESS_FAN_OUT") and not self.delta:
+            self.logger.info(f"Fan-out mode: scheduling pages 1..{self.final_number} at once")
+            for page in range(1, self.final_number + 1):
+                # Lower pages first, the default scheduler queue is LIFO
+                yield scrapy.Request(url=self.page_url(page), callback=self.parse_page, cb_kwargs={"page": page}, priority=-page)
+            self.crawl_complete = self.final_number == 0
+            return
 
         self.current_page += 1
 
-        next_url = f"{self.base_url}/jobs/search?page={self.current_page}"
+        next_url = self.page_url(self.current_page)
         if self.current_page > self.final_number:
             self.logger.info(f"Reached the final page: {self.current_page}")
+            self.crawl_complete = True
             raise CloseSpider(f"Reached the final page: {self.current_page}")
 
         yield scrapy.Request(
             url=next_url,
             callback=self.parse,
         )
+
+    def parse_page(self, response, page: int) -> Generator[dict, Any, Any]:
+        """Callback for pages scheduled by the fan-out mode."""
+        if response.status != 200:
+            raise CloseSpider(f"Failed to fetch the page: {response.url}")
+        yield from self.parse_jobs(response, parse_html(response.body, response.encoding), page)
+
+        self.page_parsed(page)
+        if len(self.pages_parsed) > self.final_number:
+            self.crawl_complete = True
+
+    def is_known_job(self, job: dict) -> bool:
+        """Whether a scraped job was already stored by an earlier crawl."""
+        return job["id"] in self.known_ids or self.watermark.is_known(job["id"], parse_posted_on(job["posted_on"]))
+
+    def parse_jobs(self, response, root, page: int) -> Generator[dict, Any, Any]:
+        """Extract the job listings from search results ``page``, parsed into ``root``."""
+        jobs = list(parse_cards(root, response.url))
+        self.logger.info(f"Number of jobs found on this page: {len(jobs)}")
+        for job_data in jobs:
+            self.next_watermark.advance(job_data["id"], parse_posted_on(job_data["posted_on"]))
+            self.job_pages[job_data["id"]].append(page)
+            self.pages_outstanding[page] += 1
+            yield job_data
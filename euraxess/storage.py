@@ -0,0 +1,359 @@
+"""Job stores the pipeline writes to and the dashboard reads from.
+
+``EURAXESS_STORAGE`` selects the backend:
+
+- ``csv``: the historical ``jobs.csv``, appended to in atomic segment files
+  that ``compact`` folds back into it.
+- ``parquet``: typed, zstd-compressed Parquet files partitioned by crawl date
+  (``crawl_date=YYYY-MM-DD/part-*.parquet``), so readers can load a subset of
+  the columns without touching the long ``description`` text.
+
+CSV stays available as an export format of the Parquet store:
+
+    python -m euraxess.storage export-csv output/jobs_export.csv
+    python -m euraxess.storage import-csv output/jobs.csv
+
+Compaction merges the files a store accumulated and keeps only the latest row
+of every job id; the pipeline also runs it when a crawl leaves more than
+``EURAXESS_COMPACT_SEGMENTS`` files behind:
+
+    python -m euraxess.storage compact
+"""
+
+import argparse
+import csv
+import datetime
+import hashlib
+import os
+import time
+import uuid
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+FIELDNAMES = [
+    "id",
+    "type",
+    "country",
+    "university",
+    "posted_on",
+    "title",
+    "link",
+    "description",
+    "department",
+    "location",
+    "field",
+    "profile",
+    "funding_program",
+    "application_deadline",
+]
+
+
+def content_hash(item) -> str:
+    """Hash of a job's scraped fields; a missing value and an empty one hash alike."""
+    values = (item.get(name) for name in FIELDNAMES)
+    text = "\x1f".join("" if value is None or value != value else str(value) for value in values)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def iter_content_hashes(store, chunksize: int = 50_000) -> Iterator[Tuple[str, str]]:
+    """``(id, content hash)`` of every stored row, in write order."""
+    for chunk in store.iter_chunks(FIELDNAMES, chunksize):
+        for item in chunk.to_dict("records"):
+            if isinstance(item["id"], str):
+                yield item["id"], content_hash(item)
+
+
+def _arrow_schema():
+    import pyarrow as pa
+
+    return pa.schema(
+        [pa.field(name, pa.string()) for name in FIELDNAMES]
+        + [pa.field("crawled_at", pa.timestamp("s", tz="UTC"))]
+    )
+
+
+class CsvJobStore:
+    """``jobs.csv`` followed by write-ahead segments.
+
+    Rows are buffered and every flush writes them as one complete CSV file,
+    header included, under a temporary name that is then renamed into
+    ``<path>.segments/``. A crash can lose the buffer but never leaves a
+    partial row, and readers see the base file followed by the segments in
+    write order. :meth:`compact` folds the segments into the base file.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.segments_dir = f"{path}.segments"
+        self.batch_size = batch_size
+        self.buffer: List[Dict] = []
+
+    def open(self):
+        os.makedirs(self.segments_dir, exist_ok=True)
+        self.buffer = []
+
+    def write(self, item: Dict):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        name = f"segment-{time.time_ns():020d}.csv"
+        tmp_path = os.path.join(self.segments_dir, f".{name}.tmp")
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+            writer.writeheader()
+            writer.writerows(self.buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.segments_dir, name))
+        self.buffer = []
+
+    def segments(self) -> List[str]:
+        if not os.path.isdir(self.segments_dir):
+            return []
+        names = sorted(name for name in os.listdir(self.segments_dir) if name.startswith("segment-") and name.endswith(".csv"))
+        return [os.path.join(self.segments_dir, name) for name in names]
+
+    def files(self) -> List[str]:
+        return ([self.path] if os.path.exists(self.path) else []) + self.segments()
+
+    def position(self) -> Dict:
+        """The last flushed segment, for :meth:`truncate` to return to."""
+        segments = self.segments()
+        return {"last_segment": os.path.basename(segments[-1]) if segments else None}
+
+    def truncate(self, position: Dict):
+        """Drop the segments flushed after ``position``; call before :meth:`open`."""
+        if "last_segment" not in position:
+            return
+        for path in self.segments():
+            if position["last_segment"] is None or os.path.basename(path) > position["last_segment"]:
+                os.remove(path)
+
+    def close(self):
+        self.flush()
+
+    def exists(self) -> bool:
+        return bool(self.files())
+
+    def iter_chunks(self, columns: Optional[List[str]] = None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        for path in self.files():
+            yield from pd.read_csv(path, usecols=columns, dtype=str, chunksize=chunksize)
+
+    def iter_ids(self) -> Iterator[str]:
+        for chunk in self.iter_chunks(["id"]):
+            yield from chunk["id"].dropna()
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        files = self.files()
+        if not files:
+            raise FileNotFoundError(self.path)
+        frames = [pd.read_csv(path, usecols=columns, dtype={"id": str}) for path in files]
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def compact(self, chunksize: int = 50_000) -> int:
+        """Fold the segments into the base file, keeping the last row of every id.
+
+        Streams in two passes (ids, then rows), so memory stays bounded by the
+        id column. The new base file replaces the old one atomically before the
+        segments are removed; a crash in between only leaves duplicates that the
+        next compaction drops. Returns the number of rows dropped.
+        """
+        files = self.files()
+        if not files:
+            return 0
+        ids = pd.concat(
+            [chunk["id"] for path in files for chunk in pd.read_csv(path, usecols=["id"], dtype=str, chunksize=chunksize)],
+            ignore_index=True,
+        )
+        keep = (~ids.duplicated(keep="last") | ids.isna()).to_numpy()
+
+        tmp_path = f"{self.path}.compact.tmp"
+        offset = 0
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            f.write(",".join(FIELDNAMES) + "\n")
+            for path in files:
+                for chunk in pd.read_csv(path, dtype=str, keep_default_na=False, chunksize=chunksize):
+                    mask = keep[offset : offset + len(chunk)]
+                    offset += len(chunk)
+                    chunk[mask].to_csv(f, header=False, index=False, columns=FIELDNAMES)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        for path in files[1:] if files[0] == self.path else files:
+            os.remove(path)
+        return int(len(keep) - keep.sum())
+
+
+class ParquetJobStore:
+    def __init__(self, root: str, batch_size: int = 5000, compression: str = "zstd"):
+        self.root = root
+        self.batch_size = batch_size
+        self.compression = compression
+        self.buffer: List[Dict] = []
+        self.parts: List[str] = []
+
+    def open(self):
+        os.makedirs(self.root, exist_ok=True)
+        self.crawled_at = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        self.partition = os.path.join(self.root, f"crawl_date={self.crawled_at.date().isoformat()}")
+        self.parts = []
+
+    def write(self, item: Dict):
+        self.buffer.append(item)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = {name: [item.get(name) for item in self.buffer] for name in FIELDNAMES}
+        columns["crawled_at"] = [self.crawled_at] * len(self.buffer)
+        table = pa.Table.from_pydict(columns, schema=_arrow_schema())
+
+        # Written under a temporary name and renamed, readers never see a partial part
+        os.makedirs(self.partition, exist_ok=True)
+        name = f"{self._part_prefix()}{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = os.path.join(self.partition, f".{name}.tmp")
+        pq.write_table(table, tmp_path, compression=self.compression)
+        os.replace(tmp_path, os.path.join(self.partition, name))
+        self.parts.append(name)
+        self.buffer = []
+
+    def _part_prefix(self) -> str:
+        return f"part-{self.crawled_at.strftime('%H%M%S')}-"
+
+    def position(self) -> Dict:
+        """The parts this run has flushed, for :meth:`truncate` to return to."""
+        return {"partition": os.path.basename(self.partition), "prefix": self._part_prefix(), "parts": list(self.parts)}
+
+    def truncate(self, position: Dict):
+        """Delete the parts the run behind ``position`` wrote after it."""
+        partition = os.path.join(self.root, position["partition"])
+        if not os.path.isdir(partition):
+            return
+        for name in os.listdir(partition):
+            if name.startswith(position["prefix"]) and name not in position["parts"]:
+                os.remove(os.path.join(partition, name))
+
+    def close(self):
+        self.flush()
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.root) and any(os.scandir(self.root))
+
+    def iter_chunks(self, columns: Optional[List[str]] = None, chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        if not self.exists():
+            return
+        import pyarrow.dataset as ds
+
+        dataset = ds.dataset(self.root, format="parquet", partitioning="hive")
+        for batch in dataset.to_batches(columns=columns, batch_size=chunksize):
+            yield batch.to_pandas()
+
+    def iter_ids(self) -> Iterator[str]:
+        for chunk in self.iter_chunks(["id"]):
+            yield from chunk["id"].dropna()
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        return pd.read_parquet(self.root, columns=columns)
+
+    def segments(self) -> List[str]:
+        """Every part, oldest first: partitions by date, parts by the time their crawl started."""
+        if not os.path.isdir(self.root):
+            return []
+        paths = []
+        for partition in sorted(os.listdir(self.root)):
+            directory = os.path.join(self.root, partition)
+            if os.path.isdir(directory):
+                paths += [os.path.join(directory, name) for name in sorted(os.listdir(directory)) if name.startswith("part-")]
+        return paths
+
+    def compact(self) -> int:
+        """Rewrite every partition as a single part, keeping the last row of every id.
+
+        Like :meth:`CsvJobStore.compact`, each new part is renamed into place
+        before the parts it replaces are removed. Returns the number of rows dropped.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        parts = self.segments()
+        if not parts:
+            return 0
+        ids = pd.concat([pq.read_table(path, columns=["id"]).column("id").to_pandas() for path in parts], ignore_index=True)
+        keep = (~ids.duplicated(keep="last") | ids.isna()).to_numpy()
+
+        offset = 0
+        for partition in sorted({os.path.dirname(path) for path in parts}):
+            tables = []
+            partition_parts = [path for path in parts if os.path.dirname(path) == partition]
+            for path in partition_parts:
+                table = pq.read_table(path, schema=_arrow_schema())
+                tables.append(table.filter(pa.array(keep[offset : offset + len(table)])))
+                offset += len(table)
+            # Sorts before the part-HHMMSS-* parts of later crawls of the same day
+            name = f"part-0-compacted-{uuid.uuid4().hex[:8]}.parquet"
+            tmp_path = os.path.join(partition, f".{name}.tmp")
+            pq.write_table(pa.concat_tables(tables), tmp_path, compression=self.compression)
+            os.replace(tmp_path, os.path.join(partition, name))
+            for path in partition_parts:
+                os.remove(path)
+        return int(len(keep) - keep.sum())
+
+
+def get_job_store(settings):
+    """Build the job store selected by ``EURAXESS_STORAGE``."""
+    backend = settings.get("EURAXESS_STORAGE")
+    if backend == "csv":
+        return CsvJobStore(settings.get("EURAXESS_JOBS_CSV"), batch_size=settings.getint("EURAXESS_WRITE_BATCH_SIZE"))
+    if backend == "parquet":
+        return ParquetJobStore(settings.get("EURAXESS_PARQUET_DIR"), batch_size=settings.getint("EURAXESS_WRITE_BATCH_SIZE"))
+    raise ValueError(f"Unknown EURAXESS_STORAGE backend: {backend!r}")
+
+
+def export_csv(store, path: str):
+    """Write the whole store as a CSV with a header row."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    store.read(columns=FIELDNAMES).to_csv(path, index=False)
+
+
+def import_csv(store, csv_path: str, chunksize: int = 50_000):
+    """Append the rows of an existing jobs CSV to ``store``."""
+    store.open()
+    for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunksize):
+        for item in chunk.astype(object).where(chunk.notna(), None).to_dict("records"):
+            store.write(item)
+    store.close()
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("export-csv", help="export the configured store to a CSV file").add_argument("path")
+    commands.add_parser("import-csv", help="append a jobs CSV to the configured store").add_argument("path")
+    commands.add_parser("compact", help="merge the store's files and drop duplicate ids")
+    args = arg_parser.parse_args()
+
+    store = get_job_store(get_project_settings())
+    if args.command == "export-csv":
+        export_csv(store, args.path)
+    elif args.command == "import-csv":
+        import_csv(store, args.path)
+    elif args.command == "compact":
+        files = len(store.segments())
+        dropped = store.compact()
+        print(f"Compacted {files} files, dropped {dropped} duplicate rows")
+
+
+if __name__ == "__main__":
+    main()
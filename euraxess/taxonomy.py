@@ -0,0 +1,237 @@
+"""Research-field taxonomy: the normalized table behind the field filters.
+
+A job's ``field`` text lists its research fields the way Euraxess renders
+them, text nodes joined by ";" with "»" between a field and a sub-field:
+
+    Engineering; » ;Civil engineering;Physics
+
+:func:`parse_field` turns that into (field, sub-field) pairs. A
+:class:`Taxonomy` gives every field and every (field, sub-field) an integer
+id, in a parent → child table, and maps a batch of ``field`` strings to the
+term ids of each row (:class:`FieldTerms`). Each distinct string is parsed
+once, by a process pool when a batch holds more than
+``PARALLEL_MIN_FIELDS`` of them, e.g. when the processed dataset is rebuilt
+from a long history.
+
+The processed dataset keeps its taxonomy in ``taxonomy.json`` next to the
+manifest and the term ids of every row in ``field_terms``. ``field_1`` and
+``field_2`` and the filter index's field and sub-field bitsets are derived
+from the table, so names are never split on a separator again. To print the
+table with the number of jobs per term:
+
+    python -m euraxess.taxonomy
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SUB_FIELD_MARK = "»"
+# Joins the names in field_1/field_2; ";" separates the text nodes of a field, so no name contains it
+LABEL_SEPARATOR = "; "
+
+# Distinct field strings in a batch from which parsing is spread over processes
+PARALLEL_MIN_FIELDS = 50_000
+
+
+def parse_field(text: Optional[str]) -> List[Tuple[str, Optional[str]]]:
+    """The distinct (field, sub-field) pairs of a ``field`` text, in order; the sub-field is None for a bare field."""
+    if not isinstance(text, str):
+        return []
+    items = [item.strip() for item in text.split(";")]
+    pairs = []
+    for i, item in enumerate(items):
+        if not item or item == SUB_FIELD_MARK:
+            continue
+        following = items[i + 1] if i + 1 < len(items) else ""
+        if following == SUB_FIELD_MARK:
+            child = items[i + 2] if i + 2 < len(items) else ""
+            pairs.append((item, child if child and child != SUB_FIELD_MARK else None))
+        elif i < 2 or items[i - 1] != SUB_FIELD_MARK or items[i - 2] in ("", SUB_FIELD_MARK):
+            # A bare field; a sub-field without a field before its mark counts as a field too
+            pairs.append((item, None))
+    return list(dict.fromkeys(pairs))
+
+
+def _parse_chunk(texts: Sequence[str]) -> List[List[Tuple[str, Optional[str]]]]:
+    return [parse_field(text) for text in texts]
+
+
+def parse_fields(texts: Sequence[str], processes: Optional[int] = None) -> List[List[Tuple[str, Optional[str]]]]:
+    """:func:`parse_field` over ``texts``; by default in a process pool from ``PARALLEL_MIN_FIELDS`` texts on."""
+    if processes is None:
+        processes = os.cpu_count() or 1 if len(texts) >= PARALLEL_MIN_FIELDS else 1
+    if processes <= 1 or len(texts) < 2:
+        return _parse_chunk(texts)
+    chunksize = -(-len(texts) // (processes * 4))
+    chunks = [texts[start : start + chunksize] for start in range(0, len(texts), chunksize)]
+    with ProcessPoolExecutor(processes) as pool:
+        return list(chain.from_iterable(pool.map(_parse_chunk, chunks)))
+
+
+class FieldTerms:
+    """Term ids of a batch of rows, held per distinct ``field`` string.
+
+    ``codes[i]`` is the distinct string of row ``i`` (-1 for a missing field)
+    and ``term_lists[code]`` the ids of its most specific terms: a sub-field's
+    id stands for its field as well. Slicing selects rows and shares the rest.
+    """
+
+    def __init__(self, taxonomy: "Taxonomy", codes: np.ndarray, term_lists: List[List[int]], _shared: Optional[Dict] = None):
+        self.taxonomy = taxonomy
+        self.codes = codes
+        self.term_lists = term_lists
+        # Per distinct string, computed once for all slices
+        self._shared = {} if _shared is None else _shared
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, rows: slice) -> "FieldTerms":
+        return FieldTerms(self.taxonomy, self.codes[rows], self.term_lists, self._shared)
+
+    def _flat(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if "flat" not in self._shared:
+            # A trailing empty list, so code -1 picks no terms
+            lengths = np.array([len(terms) for terms in self.term_lists] + [0], dtype=np.int64)
+            flat = np.fromiter(chain.from_iterable(self.term_lists), dtype=np.int32, count=int(lengths.sum()))
+            self._shared["flat"] = lengths, np.concatenate([[0], np.cumsum(lengths)]), flat
+        return self._shared["flat"]
+
+    def pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Row positions and term ids, one entry per term of every row."""
+        lengths, offsets, flat = self._flat()
+        row_lengths = lengths[self.codes]
+        rows = np.repeat(np.arange(len(self.codes)), row_lengths)
+        within = np.arange(len(rows)) - np.repeat(np.cumsum(row_lengths) - row_lengths, row_lengths)
+        return rows, flat[np.repeat(offsets[self.codes], row_lengths) + within]
+
+    def lists(self, index=None) -> pd.Series:
+        """The term ids of every row as an Arrow ``list<int32>`` column."""
+        import pyarrow as pa
+
+        lengths, _, _ = self._flat()
+        _, terms = self.pairs()
+        offsets = np.concatenate([[0], np.cumsum(lengths[self.codes])]).astype(np.int32)
+        lists = pa.ListArray.from_arrays(pa.array(offsets), pa.array(terms, type=pa.int32()))
+        return pd.Series(lists, dtype=pd.ArrowDtype(lists.type), index=index)
+
+    def labels(self) -> Tuple[np.ndarray, np.ndarray]:
+        """``field_1`` and ``field_2`` of every row: its field and sub-field names, or None."""
+        if "labels" not in self._shared:
+            names, roots, parents = self.taxonomy.names, self.taxonomy.roots(), self.taxonomy.parents
+            field_1, field_2 = [], []
+            for terms in self.term_lists:
+                fields = dict.fromkeys(names[roots[term]] for term in terms)
+                sub_fields = dict.fromkeys(names[term] for term in terms if parents[term] >= 0)
+                field_1.append(LABEL_SEPARATOR.join(fields) or None)
+                field_2.append(LABEL_SEPARATOR.join(sub_fields) or None)
+            self._shared["labels"] = np.array(field_1 + [None], dtype=object), np.array(field_2 + [None], dtype=object)
+        field_1, field_2 = self._shared["labels"]
+        return field_1[self.codes], field_2[self.codes]
+
+
+def list_pairs(field_terms: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Row positions and term ids of a stored ``field_terms`` column."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    lists = pa.chunked_array(pa.array(field_terms)).combine_chunks() if len(field_terms) else pa.array([], pa.list_(pa.int32()))
+    return pc.list_parent_indices(lists).to_numpy(), pc.list_flatten(lists).to_numpy()
+
+
+class Taxonomy:
+    """Fields and sub-fields by id; ``parents[i]`` is the id of term ``i``'s field, -1 for a field."""
+
+    def __init__(self, names: Iterable[str] = (), parents: Iterable[int] = ()):
+        self.names: List[str] = list(names)
+        self.parents: List[int] = list(parents)
+        self.ids = {(parent, name): term for term, (name, parent) in enumerate(zip(self.names, self.parents))}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def term_id(self, name: str, parent: int = -1) -> int:
+        """Id of a term, added to the table if it is new."""
+        term = self.ids.get((parent, name))
+        if term is None:
+            term = self.ids[(parent, name)] = len(self.names)
+            self.names.append(name)
+            self.parents.append(parent)
+        return term
+
+    def _pair_id(self, pair: Tuple[str, Optional[str]]) -> int:
+        field, sub_field = pair
+        field_id = self.term_id(field)
+        return field_id if sub_field is None else self.term_id(sub_field, field_id)
+
+    def map_fields(self, fields: pd.Series, processes: Optional[int] = None) -> FieldTerms:
+        """Term ids of every row of a ``field`` column; new terms are added to the table."""
+        codes, uniques = pd.factorize(fields)
+        parsed = parse_fields(list(uniques), processes)
+        return FieldTerms(self, codes, [[self._pair_id(pair) for pair in pairs] for pairs in parsed])
+
+    def roots(self) -> List[int]:
+        """The field of every term: its parent, or itself for a field."""
+        return [term if parent < 0 else parent for term, parent in enumerate(self.parents)]
+
+    def frame(self) -> pd.DataFrame:
+        """The table, one row per term: its id, field, sub-field (None for a field) and parent id."""
+        parents = np.array(self.parents, dtype=np.int64)
+        names = np.array(self.names, dtype=object)
+        return pd.DataFrame(
+            {
+                "term_id": np.arange(len(self.names)),
+                "field": np.where(parents < 0, names, names[np.maximum(parents, 0)]),
+                "sub_field": np.where(parents < 0, None, names),
+                "parent_id": parents,
+            }
+        )
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"names": self.names, "parents": self.parents}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Taxonomy":
+        try:
+            with open(path, encoding="utf-8") as f:
+                table = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls(table["names"], table["parents"])
+
+
+def main():
+    from scrapy.utils.project import get_project_settings
+
+    from euraxess.processing import ProcessedDataset
+
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument("--out", help="also write the table to this CSV file")
+    args = arg_parser.parse_args()
+
+    dataset = ProcessedDataset(get_project_settings().get("EURAXESS_PROCESSED_DIR"))
+    taxonomy = dataset.read_taxonomy()
+    rows, terms = list_pairs(dataset.load(["id", "field_terms"])["field_terms"])
+    table = taxonomy.frame()
+    n_terms = len(table)
+    # A job counts once for a field, however many of its sub-fields it lists
+    roots = np.array(taxonomy.roots(), dtype=np.int64)[terms]
+    field_jobs = np.bincount(pd.unique(rows.astype(np.int64) * n_terms + roots) % n_terms, minlength=n_terms)
+    table["jobs"] = np.where(table["parent_id"] < 0, field_jobs, np.bincount(terms, minlength=n_terms))
+    if args.out:
+        table.to_csv(args.out, index=False)
+    print(table.to_string(index=False, na_rep=""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""Crawl telemetry collected by the middlewares in ``euraxess/middlewares.py``.
+
+The downloader middleware records every download (latency, bytes, status,
+retries), the spider middleware every parsed page (items, callback time) and
+the pipeline reports duplicates through the ``duplicate_skipped`` signal. At
+the end of the run the summary is written as JSON, and optionally in the
+Prometheus text format to a file or a small HTTP endpoint.
+"""
+
+import datetime
+import json
+import os
+import statistics
+import threading
+import time
+import weakref
+from collections import Counter
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from scrapy import signals
+
+# Sent by the pipeline with ``item`` and ``spider`` for a job that is already stored
+duplicate_skipped = object()
+
+LATENCY_QUANTILES = (0.5, 0.9, 0.99)
+
+_telemetry = weakref.WeakKeyDictionary()
+
+
+@dataclass
+class PageStats:
+    url: str
+    status: int
+    items: int = 0
+    requests: int = 0
+    duplicates: int = 0
+    parse_seconds: float = 0.0
+
+
+def get_telemetry(crawler) -> "CrawlTelemetry":
+    """The telemetry of a crawl, shared by both middlewares."""
+    telemetry = _telemetry.get(crawler)
+    if telemetry is None:
+        telemetry = _telemetry[crawler] = CrawlTelemetry(crawler)
+    return telemetry
+
+
+def _quantile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class CrawlTelemetry:
+    def __init__(self, crawler):
+        settings = crawler.settings
+        self.output_dir = settings.get("EURAXESS_TELEMETRY_DIR")
+        self.prometheus_file = settings.get("EURAXESS_TELEMETRY_PROMETHEUS_FILE")
+        self.prometheus_host = settings.get("EURAXESS_TELEMETRY_PROMETHEUS_HOST", "127.0.0.1")
+        self.prometheus_port = settings.getint("EURAXESS_TELEMETRY_PROMETHEUS_PORT")
+        self.server: Optional[ThreadingHTTPServer] = None
+
+        self.started = self.finished = None
+        self.latencies: List[float] = []
+        self.response_bytes = 0
+        self.statuses = Counter()
+        self.exceptions = Counter()
+        self.retries = 0
+        self.pages: List[PageStats] = []
+        # Page each job was yielded from, until the pipeline is done with it
+        self.item_pages: Dict[str, PageStats] = {}
+        self.lock = threading.Lock()
+
+        crawler.signals.connect(self.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(self.spider_closed, signal=signals.spider_closed)
+        crawler.signals.connect(self.item_done, signal=signals.item_scraped)
+        crawler.signals.connect(self.item_done, signal=signals.item_dropped)
+        crawler.signals.connect(self.item_done, signal=signals.item_error)
+        crawler.signals.connect(self.duplicate, signal=duplicate_skipped)
+
+    def request_sent(self, request):
+        if request.meta.get("retry_times"):
+            self.retries += 1
+
+    def response_received(self, response, latency: float):
+        with self.lock:
+            self.latencies.append(latency)
+            self.response_bytes += len(response.body)
+            self.statuses[response.status] += 1
+
+    def download_failed(self, exception):
+        with self.lock:
+            self.exceptions[type(exception).__name__] += 1
+
+    def page_parsed(self, response) -> PageStats:
+        page = PageStats(response.url, response.status)
+        self.pages.append(page)
+        return page
+
+    def item_yielded(self, page: PageStats, item):
+        page.items += 1
+        job_id = item.get("id") if hasattr(item, "get") else None
+        if job_id is not None:
+            self.item_pages[job_id] = page
+
+    def item_done(self, item, **kwargs):
+        self.item_pages.pop(item.get("id"), None)
+
+    def duplicate(self, item, **kwargs):
+        page = self.item_pages.get(item.get("id"))
+        if page is not None:
+            page.duplicates += 1
+
+    def spider_opened(self, spider):
+        self.started = time.time()
+        if self.prometheus_port:
+            self.serve_prometheus(spider)
+
+    def spider_closed(self, spider, reason):
+        self.finished = time.time()
+        summary = self.summary(spider.name, reason)
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = datetime.datetime.fromtimestamp(self.started).strftime("%Y%m%dT%H%M%S")
+            path = os.path.join(self.output_dir, f"{spider.name}_{stamp}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({**summary, "pages": [asdict(page) for page in self.pages]}, f, indent=2)
+            spider.logger.info(
+                f"Crawl telemetry written to {path}: {summary['pages']} pages at {summary['pages_per_minute']:.1f} pages/min"
+            )
+        if self.prometheus_file:
+            os.makedirs(os.path.dirname(self.prometheus_file) or ".", exist_ok=True)
+            tmp_path = f"{self.prometheus_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text(spider.name))
+            os.replace(tmp_path, self.prometheus_file)
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def latency_summary(self) -> Dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return {"count": 0}
+        summary = {"count": len(latencies), "mean": statistics.fmean(latencies), "max": latencies[-1]}
+        for q in LATENCY_QUANTILES:
+            summary[f"p{round(q * 100)}"] = _quantile(latencies, q)
+        return summary
+
+    def summary(self, spider_name: str, reason: Optional[str] = None) -> Dict:
+        elapsed = self.elapsed()
+        pages = len(self.pages)
+        items = sum(page.items for page in self.pages)
+        return {
+            "spider": spider_name,
+            "started_at": datetime.datetime.fromtimestamp(self.started).isoformat(timespec="seconds") if self.started else None,
+            "finish_reason": reason,
+            "elapsed_seconds": elapsed,
+            "requests": sum(self.statuses.values()) + sum(self.exceptions.values()),
+            "retries": self.retries,
+            "response_bytes": self.response_bytes,
+            "status_codes": {str(status): count for status, count in sorted(self.statuses.items())},
+            "exceptions": dict(self.exceptions),
+            "latency_seconds": self.latency_summary(),
+            "pages": pages,
+            "items": items,
+            "duplicates": sum(page.duplicates for page in self.pages),
+            "items_per_page": items / pages if pages else 0.0,
+            "parse_seconds": sum(page.parse_seconds for page in self.pages),
+            "pages_per_minute": pages / elapsed * 60 if elapsed else 0.0,
+        }
+
+    def prometheus_text(self, spider_name: str) -> str:
+        summary = self.summary(spider_name)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            """``samples`` are (series suffix, extra labels, value) tuples."""
+            lines.append(f"# HELP euraxess_{name} {help_text}")
+            lines.append(f"# TYPE euraxess_{name} {kind}")
+            for suffix, labels, value in samples:
+                label_text = ",".join([f'spider="{spider_name}"', *labels])
+                lines.append(f"euraxess_{name}{suffix}{{{label_text}}} {value}")
+
+        def total(name, help_text, value):
+            metric(name, "counter", help_text, [("", [], value)])
+
+        latency = summary["latency_seconds"]
+        quantiles = [("", [f'quantile="{q}"'], latency[f"p{round(q * 100)}"]) for q in LATENCY_QUANTILES] if latency["count"] else []
+        with self.lock:
+            latency_sum = sum(self.latencies)
+        metric(
+            "request_latency_seconds",
+            "summary",
+            "Download latency per response.",
+            quantiles + [("_sum", [], latency_sum), ("_count", [], latency["count"])],
+        )
+        metric(
+            "responses_total",
+            "counter",
+            "Responses by status code.",
+            [("", [f'status="{status}"'], count) for status, count in summary["status_codes"].items()],
+        )
+        metric(
+            "download_errors_total",
+            "counter",
+            "Failed downloads by exception.",
+            [("", [f'exception="{name}"'], count) for name, count in summary["exceptions"].items()],
+        )
+        total("retries_total", "Retried requests.", summary["retries"])
+        total("response_bytes_total", "Response body bytes received.", summary["response_bytes"])
+        total("pages_total", "Pages parsed by the spider.", summary["pages"])
+        total("items_total", "Items yielded by the spider.", summary["items"])
+        total("duplicates_total", "Items skipped as already stored.", summary["duplicates"])
+        total("parse_seconds_total", "Time spent in spider callbacks.", summary["parse_seconds"])
+        metric("pages_per_minute", "gauge", "Pages parsed per minute since the crawl started.", [("", [], summary["pages_per_minute"])])
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, spider):
+        telemetry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = telemetry.prometheus_text(spider.name).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((self.prometheus_host, self.prometheus_port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        spider.logger.info(f"Prometheus metrics served on {self.prometheus_host}:{self.prometheus_port}")
@@ -0,0 +1,78 @@
+"""Crawl watermark persisted between runs for the incremental (delta) crawl.
+
+The Euraxess listing is ordered newest first, so a crawl that ran to the end
+has seen every job posted up to its newest ``posted_on`` date. The watermark
+keeps that date plus the ids posted on it, since several jobs share a day.
+"""
+
+import datetime
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Set
+
+from dateutil import parser
+
+
+def parse_posted_on(text: Optional[str]) -> Optional[datetime.date]:
+    """Parse a scraped ``posted_on`` value such as "Posted on: 15 October 2025"."""
+    if not text:
+        return None
+    try:
+        return parser.parse(text.replace("Posted on:", "").replace("Posted on", "").strip()).date()
+    except (ValueError, OverflowError):
+        return None
+
+
+@dataclass
+class Watermark:
+    newest_posted_on: Optional[datetime.date] = None
+    boundary_ids: Set[str] = field(default_factory=set)
+
+    def is_known(self, job_id: str, posted_on: Optional[datetime.date]) -> bool:
+        """Whether a job was already covered by the crawl that set this watermark."""
+        if self.newest_posted_on is None or posted_on is None:
+            return False
+        if posted_on < self.newest_posted_on:
+            return True
+        return posted_on == self.newest_posted_on and job_id in self.boundary_ids
+
+    def advance(self, job_id: str, posted_on: Optional[datetime.date]):
+        if posted_on is None:
+            return
+        if self.newest_posted_on is None or posted_on > self.newest_posted_on:
+            self.newest_posted_on = posted_on
+            self.boundary_ids = {job_id}
+        elif posted_on == self.newest_posted_on:
+            self.boundary_ids.add(job_id)
+
+    def copy(self) -> "Watermark":
+        return Watermark(self.newest_posted_on, set(self.boundary_ids))
+
+
+def load_watermark(path: str) -> Watermark:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return Watermark()
+    newest = data.get("newest_posted_on")
+    return Watermark(
+        newest_posted_on=datetime.date.fromisoformat(newest) if newest else None,
+        boundary_ids=set(data.get("boundary_ids", [])),
+    )
+
+
+def save_watermark(path: str, watermark: Watermark):
+    """Write the watermark atomically so an interrupted run never leaves half a file."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = {
+        "newest_posted_on": watermark.newest_posted_on.isoformat() if watermark.newest_posted_on else None,
+        "boundary_ids": sorted(watermark.boundary_ids),
+        "updated_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+